@@ -1 +1,6 @@
- 
\ No newline at end of file
+# -*- coding: utf-8 -*-
+import os
+
+# --- CONSTANTES ---
+# Répertoire des données persistantes (résultats, caches, miroirs), relatif au dossier de lancement
+DOSSIER_STOCKAGE = os.path.join("storage", "data")
@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+"""
+Détection des fichiers binaires à ne pas scanner (images, archives,
+bibliothèques, poids de modèles...). Les règles les moins coûteuses passent
+en premier : extension, puis taille, puis
+lecture des premiers Ko pour les nombres magiques et la proportion d'octets
+NUL. Les fichiers ignorés sont comptés par motif d'exclusion. Les règles par
+défaut peuvent être ajustées (`regles_binaires`) depuis la section
+"_binary_filter" de la configuration ou la ligne de commande.
+"""
+import os
+import threading
+from typing import Iterable, Optional
+
+# --- CONSTANTES ---
+TAILLE_ECHANTILLON = 8192
+# Au-delà de cette proportion d'octets NUL dans l'échantillon, le fichier est binaire
+RATIO_NUL_MAX = 0.01
+EXTENSIONS_BINAIRES = frozenset((
+    # Images, audio, vidéo
+    ".png", ".jpg", ".jpeg", ".gif", ".bmp", ".ico", ".webp", ".tif", ".tiff", ".psd",
+    ".mp3", ".wav", ".ogg", ".flac", ".mp4", ".mkv", ".mov", ".avi", ".webm",
+    # Archives et paquets
+    ".zip", ".gz", ".tgz", ".bz2", ".xz", ".7z", ".rar", ".tar", ".jar", ".war", ".whl", ".egg", ".deb", ".rpm", ".dmg", ".iso",
+    # Binaires compilés
+    ".so", ".dll", ".dylib", ".exe", ".o", ".a", ".lib", ".class", ".pyc", ".pyo", ".wasm",
+    # Poids de modèles et données
+    ".bin", ".pt", ".pth", ".ckpt", ".onnx", ".h5", ".safetensors", ".npy", ".npz", ".parquet", ".tflite",
+    # Polices et documents
+    ".woff", ".woff2", ".ttf", ".otf", ".eot", ".pdf",
+))
+# Signatures courtes et ambiguës (BM, MZ, ID3) omises : ces fichiers contiennent de toute façon des NUL
+NOMBRES_MAGIQUES = (
+    b"\x89PNG", b"GIF8", b"\xff\xd8\xff", b"RIFF", b"OggS", b"fLaC",
+    b"PK\x03\x04", b"\x1f\x8b", b"BZh", b"\xfd7zXZ\x00", b"7z\xbc\xaf\x27\x1c", b"Rar!",
+    b"\x7fELF", b"\xca\xfe\xba\xbe", b"\xcf\xfa\xed\xfe", b"\xce\xfa\xed\xfe", b"\x00asm",
+    b"%PDF", b"SQLite format 3\x00", b"\x89HDF", b"\x93NUMPY", b"wOFF", b"wOF2",
+)
+
+
+def normaliser_extension(extension: str) -> str:
+    """'.EXT', 'ext' ou '*.ext' -> '.ext'."""
+    return "." + extension.strip().lstrip("*").lstrip(".").lower()
+
+
+def regles_binaires(extensions_ajoutees: Iterable[str] = (), extensions_retirees: Iterable[str] = (), ratio_nul_max: Optional[float] = None,
+                    taille_echantillon: Optional[int] = None) -> dict:
+    """Arguments de `FiltreBinaires` : règles par défaut, complétées ou allégées."""
+    regles = {"extensions": (EXTENSIONS_BINAIRES | {normaliser_extension(e) for e in extensions_ajoutees}) - {normaliser_extension(e) for e in extensions_retirees}}
+    if ratio_nul_max is not None:
+        if not 0 <= ratio_nul_max <= 1:
+            raise ValueError(f"proportion d'octets NUL invalide : {ratio_nul_max} (attendu entre 0 et 1)")
+        regles["ratio_nul_max"] = ratio_nul_max
+    if taille_echantillon is not None:
+        if taille_echantillon < 1:
+            raise ValueError(f"taille d'échantillon invalide : {taille_echantillon}")
+        regles["taille_echantillon"] = taille_echantillon
+    return regles
+
+
+class FiltreBinaires:
+    """
+    Décide, pour chaque fichier, s'il doit être ignoré et tient les statistiques.
+
+    `extensions` et `taille_max` (en octets, None = illimitée) sont
+    configurables, ainsi que l'échantillon et la proportion de NUL (voir
+    `regles_binaires`) ; `actif=False` ne conserve que la règle de taille.
+    """
+
+    def __init__(self, extensions: Iterable[str] = EXTENSIONS_BINAIRES, taille_max: Optional[int] = None, actif: bool = True,
+                 taille_echantillon: int = TAILLE_ECHANTILLON, ratio_nul_max: float = RATIO_NUL_MAX):
+        self.extensions = frozenset(e.lower() for e in extensions) if actif else frozenset()
+        self.taille_max = taille_max
+        self.actif = actif
+        self.taille_echantillon = taille_echantillon
+        self.ratio_nul_max = ratio_nul_max
+        self.ignores = {}
+        self.octets_ignores = 0
+        self._lock = threading.Lock()
+
+    def raison_exclusion(self, chemin: str, taille: Optional[int] = None) -> Optional[str]:
+        """Retourne le motif d'exclusion ('extension', 'taille', 'magique', 'nul') ou None."""
+        if os.path.splitext(chemin)[1].lower() in self.extensions:
+            return "extension"
+        if self.taille_max is not None:
+            if taille is None:
+                try:
+                    taille = os.path.getsize(chemin)
+                except OSError:
+                    return None
+            if taille > self.taille_max:
+                return "taille"
+        if not self.actif:
+            return None
+        try:
+            with open(chemin, 'rb') as f:
+                echantillon = f.read(self.taille_echantillon)
+        except OSError:
+            return None
+        return raison_contenu_binaire(echantillon, self.ratio_nul_max)
+
+    def accepter(self, chemin: str, taille: Optional[int] = None) -> bool:
+        """Vrai si le fichier doit être scanné ; sinon il est compté comme ignoré."""
+        raison = self.raison_exclusion(chemin, taille)
+        if raison is None:
+            return True
+        with self._lock:
+            self.ignores[raison] = self.ignores.get(raison, 0) + 1
+            if taille is None:
+                try:
+                    taille = os.path.getsize(chemin)
+                except OSError:
+                    taille = 0
+            self.octets_ignores += taille
+        return False
+
+    @property
+    def total_ignores(self) -> int:
+        return sum(self.ignores.values())
+
+    def resume(self) -> str:
+        """Résumé lisible des fichiers ignorés, pour les messages de fin de scan."""
+        details = ", ".join(f"{raison}: {nombre}" for raison, nombre in sorted(self.ignores.items()))
+        return f"{self.total_ignores} fichier(s) binaire(s) ou trop volumineux ignoré(s) ({self.octets_ignores / (1 << 20):.1f} Mo ; {details})"
+
+
+def raison_contenu_binaire(echantillon: bytes, ratio_nul_max: float = RATIO_NUL_MAX) -> Optional[str]:
+    """'magique' ou 'nul' si le début du contenu est celui d'un binaire, sinon None."""
+    if echantillon.startswith(NOMBRES_MAGIQUES):
+        return "magique"
+    if echantillon and echantillon.count(0) / len(echantillon) > ratio_nul_max:
+        return "nul"
+    return None
@@ -14,7 +14,17 @@ import time
 # même si le script est exécuté directement.
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from apikey_validator import config, core
+from apikey_validator import binary_filter, config, core, entropy, findings_store, git_history, scan_cache, validation_cache
+
+def entier_positif(valeur: str) -> int:
+    """Type argparse : entier supérieur ou égal à 1."""
+    try:
+        entier = int(valeur)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"entier attendu : '{valeur}'")
+    if entier < 1:
+        raise argparse.ArgumentTypeError(f"doit être au moins 1 : {entier}")
+    return entier
 
 def main():
     """Fonction principale du CLI."""
@@ -34,6 +44,9 @@ def main():
     )
     parser.add_argument("-o", "--output-file", type=str, help="Chemin du fichier pour sauvegarder les résultats.")
     parser.add_argument("-f", "--output-format", type=str, choices=['json', 'csv'], default='json', help="Format du fichier de sortie (défaut: json).")
+    parser.add_argument("--no-store", action="store_true", help=f"Ne pas conserver les clés trouvées dans '{findings_store.CHEMIN_RESULTATS_DEFAUT}' : la session utilise une base temporaire supprimée à la fin (seul -o les enregistre).")
+    parser.add_argument("--keep-sessions", type=entier_positif, default=findings_store.SESSIONS_CONSERVEES_DEFAUT, metavar="N", help=f"Nombre de sessions de scan conservées dans le stockage des résultats, la session courante comprise ; les plus anciennes sont supprimées au démarrage (défaut: {findings_store.SESSIONS_CONSERVEES_DEFAUT}).")
+    parser.add_argument("--validation-cache", type=str, nargs='?', const=validation_cache.CHEMIN_CACHE_VALIDATION_DEFAUT, help=f"Conserver les résultats de validation entre les exécutions (défaut: {validation_cache.CHEMIN_CACHE_VALIDATION_DEFAUT}).")
 
     subparsers = parser.add_subparsers(dest="command", help="Commandes disponibles", required=True)
 
@@ -60,22 +73,85 @@ def main():
     # --- Commande 'scan' ---
     parser_scan = subparsers.add_parser("scan", help="Scanner un répertoire à la recherche de clés.")
     parser_scan.add_argument("--path", required=True, type=str, help="Chemin du répertoire à scanner.")
+    parser_scan.add_argument("--workers", type=int, default=core.MAX_WORKERS, help=f"Nombre de workers (threads ou processus) (défaut: {core.MAX_WORKERS}).")
+    parser_scan.add_argument("--backend", type=str, choices=['thread', 'process'], default='thread', help="Backend d'exécution des regex : 'process' répartit les fichiers sur plusieurs processus (défaut: thread).")
+    parser_scan.add_argument("--no-cache", action="store_true", help="Désactiver le cache incrémental et rescanner tous les fichiers.")
+    parser_scan.add_argument("--scan-binaries", action="store_true", help="Scanner aussi les fichiers détectés comme binaires (extension, nombres magiques, octets NUL).")
+    parser_scan.add_argument("--max-size", type=float, help="Ignorer les fichiers de plus de N Mo.")
+    parser_scan.add_argument("--binary-ext", action="append", default=[], metavar="EXT", help="Traiter aussi cette extension comme binaire (répétable ; s'ajoute à la section _binary_filter de config.json).")
+    parser_scan.add_argument("--text-ext", action="append", default=[], metavar="EXT", help="Ne plus ignorer cette extension par défaut binaire, ex. '.pdf' (répétable).")
+    parser_scan.add_argument("--null-ratio", type=float, help=f"Proportion d'octets NUL au-delà de laquelle un fichier est binaire (défaut: {binary_filter.RATIO_NUL_MAX}).")
+    parser_scan.add_argument("--exclude", action="append", default=[], metavar="GLOB", help="Exclure les chemins correspondant à ce glob (syntaxe .gitignore, répétable).")
+    parser_scan.add_argument("--include", action="append", default=[], metavar="GLOB", help="Ne scanner que les fichiers (ou dossiers) correspondant à l'un de ces globs (syntaxe .gitignore, répétable).")
+    parser_scan.add_argument("--gitignore", action="store_true", help="Respecter aussi les fichiers .gitignore (les .secretsignore le sont toujours).")
+    parser_scan.add_argument("--no-verify", action="store_true", help="Détection seule, hors ligne : les clés trouvées sont enregistrées sans être testées auprès des API.")
+    parser_scan.add_argument("--verify-workers", type=int, help=f"Nombre de vérifications simultanées des clés uniques trouvées (défaut: {core.MAX_WORKERS_VERIFICATION}, ou --workers avec le backend thread).")
 
     # --- Commande 'scan-git' ---
     parser_scan_git = subparsers.add_parser("scan-git", help="Scanner l'historique d'un dépôt Git local.")
     parser_scan_git.add_argument("--path", required=True, type=str, help="Chemin du dépôt Git local à scanner.")
+    parser_scan_git.add_argument("--full", action="store_true", help="Rescanner tout l'historique, y compris les commits déjà analysés.")
+    parser_scan_git.add_argument("--workers", type=int, default=core.MAX_WORKERS, help=f"Nombre de processus pour le backend 'process' (défaut: {core.MAX_WORKERS}).")
+    parser_scan_git.add_argument("--backend", type=str, choices=['thread', 'process'], default='thread', help="'process' répartit des tranches de commits sur plusieurs processus (défaut: thread).")
+    parser_scan_git.add_argument("--no-verify", action="store_true", help="Détection seule, hors ligne : les clés trouvées sont enregistrées sans être testées auprès des API.")
+    parser_scan_git.add_argument("--verify-workers", type=int, default=core.MAX_WORKERS_VERIFICATION, help=f"Nombre de vérifications simultanées des clés uniques trouvées (défaut: {core.MAX_WORKERS_VERIFICATION}).")
 
     # --- Commande 'scan-remote-git' ---
     parser_scan_remote_git = subparsers.add_parser("scan-remote-git", help="Cloner et scanner un dépôt Git distant.")
     parser_scan_remote_git.add_argument("--url", required=True, type=str, help="URL du dépôt Git distant.")
+    parser_scan_remote_git.add_argument("--full", action="store_true", help="Rescanner tout l'historique, y compris les commits déjà analysés.")
+    parser_scan_remote_git.add_argument("--workers", type=int, default=core.MAX_WORKERS, help=f"Nombre de processus pour le backend 'process' (défaut: {core.MAX_WORKERS}).")
+    parser_scan_remote_git.add_argument("--backend", type=str, choices=['thread', 'process'], default='thread', help="'process' répartit des tranches de commits sur plusieurs processus (défaut: thread).")
+    parser_scan_remote_git.add_argument("--filter", type=str, help="Clone partiel, ex. 'blob:limit=1m' : les blobs exclus ne sont ni téléchargés ni scannés.")
+    parser_scan_remote_git.add_argument("--depth", type=int, help="Clone superficiel limité aux N derniers commits.")
+    parser_scan_remote_git.add_argument("--shallow-since", type=str, help="Clone superficiel limité aux commits postérieurs à cette date.")
+    parser_scan_remote_git.add_argument("--branch", type=str, help="Branche à cloner.")
+    parser_scan_remote_git.add_argument("--single-branch", action="store_true", help="Ne récupérer qu'une seule branche.")
+    parser_scan_remote_git.add_argument("--mirror-cache", type=str, nargs='?', const=git_history.CHEMIN_MIROIRS_DEFAUT, help=f"Conserver un miroir local et ne récupérer que les nouveaux objets aux scans suivants (défaut: {git_history.CHEMIN_MIROIRS_DEFAUT}).")
+    parser_scan_remote_git.add_argument("--no-verify", action="store_true", help="Détection seule, hors ligne : les clés trouvées sont enregistrées sans être testées auprès des API.")
+    parser_scan_remote_git.add_argument("--verify-workers", type=int, default=core.MAX_WORKERS_VERIFICATION, help=f"Nombre de vérifications simultanées des clés uniques trouvées (défaut: {core.MAX_WORKERS_VERIFICATION}).")
 
     # --- Commande 'scan-entropy' ---
     parser_entropy = subparsers.add_parser("scan-entropy", help="Scanner un répertoire pour des chaînes à haute entropie.")
     parser_entropy.add_argument("--path", required=True, type=str, help="Chemin du répertoire à scanner.")
     parser_entropy.add_argument("--threshold", type=float, default=4.0, help="Seuil d'entropie pour signaler un secret (défaut: 4.0).")
+    parser_entropy.add_argument("--window", type=entier_positif, help="Fenêtre glissante (en caractères) : rapporte la sous-chaîne d'entropie maximale de chaque jeton, même long. Son entropie ne dépasse pas log2(W) : la fenêtre doit dépasser 2^seuil caractères (16 pour 4.0).")
+    parser_entropy.add_argument("--scan-binaries", action="store_true", help="Scanner aussi les fichiers détectés comme binaires (extension, nombres magiques, octets NUL).")
+    parser_entropy.add_argument("--max-size", type=float, help="Ignorer les fichiers de plus de N Mo.")
+    parser_entropy.add_argument("--binary-ext", action="append", default=[], metavar="EXT", help="Traiter aussi cette extension comme binaire (répétable ; s'ajoute à la section _binary_filter de config.json).")
+    parser_entropy.add_argument("--text-ext", action="append", default=[], metavar="EXT", help="Ne plus ignorer cette extension par défaut binaire, ex. '.pdf' (répétable).")
+    parser_entropy.add_argument("--null-ratio", type=float, help=f"Proportion d'octets NUL au-delà de laquelle un fichier est binaire (défaut: {binary_filter.RATIO_NUL_MAX}).")
+    parser_entropy.add_argument("--exclude", action="append", default=[], metavar="GLOB", help="Exclure les chemins correspondant à ce glob (syntaxe .gitignore, répétable).")
+    parser_entropy.add_argument("--include", action="append", default=[], metavar="GLOB", help="Ne scanner que les fichiers (ou dossiers) correspondant à l'un de ces globs (syntaxe .gitignore, répétable).")
+    parser_entropy.add_argument("--gitignore", action="store_true", help="Respecter aussi les fichiers .gitignore (les .secretsignore le sont toujours).")
+    parser_entropy.add_argument("--charset-thresholds", type=str, nargs='?', const="", help="Seuils par alphabet (digits, hex, alnum, base64, base64url) au lieu d'un seuil unique ; valeurs par défaut ajustables, ex. 'hex=3.2,base64=4.8'. Les suites de chiffres ne sont pas signalées par défaut (seuil 3.4 > log2(10)).")
 
     args = parser.parse_args()
 
+    if args.validation_cache:
+        validation_cache.cache_validation.activer_persistance(args.validation_cache)
+    core.configurer_stockage_resultats(persistant=not args.no_store, sessions_conservees=args.keep_sessions)
+
+    taille_max = int(args.max_size * (1 << 20)) if getattr(args, "max_size", None) else None
+    # Règles de détection des binaires : config.json, puis ligne de commande
+    regles_binaires = None
+    if args.command in ("scan", "scan-entropy"):
+        if args.null_ratio is not None and not 0 <= args.null_ratio <= 1:
+            parser.error(f"--null-ratio doit être compris entre 0 et 1 : {args.null_ratio}")
+        regles_binaires = config.charger_regles_binaires(config_path, args.binary_ext, args.text_ext, args.null_ratio)
+
+    # Seuils par alphabet : valeurs par défaut, éventuellement surchargées ("hex=3.2,base64=4.8")
+    seuils_alphabet = None
+    if getattr(args, "charset_thresholds", None) is not None:
+        seuils_alphabet = dict(entropy.SEUILS_ALPHABET_DEFAUT)
+        for element in filter(None, args.charset_thresholds.split(",")):
+            nom, _, valeur = element.partition("=")
+            try:
+                if nom.strip() not in seuils_alphabet: raise ValueError
+                seuils_alphabet[nom.strip()] = float(valeur)
+            except ValueError:
+                parser.error(f"seuil par alphabet invalide : '{element}' (alphabets : {', '.join(seuils_alphabet)})")
+
     # Événements pour le contrôle des tâches en arrière-plan (pause/annulation)
     pause_event = threading.Event()
     pause_event.set() # Actif par défaut
@@ -90,13 +166,21 @@ def main():
         elif args.command == "dictionary":
             core.mode_dictionnaire(patterns, args.partial_key, args.type, args.wordlist, pause_event, cancel_event)
         elif args.command == "scan":
-            core.mode_scan(patterns, args.path, pause_event, cancel_event)
+            core.mode_scan(patterns, args.path, pause_event, cancel_event, workers=args.workers, backend=args.backend, cache_path=None if args.no_cache else scan_cache.CHEMIN_CACHE_DEFAUT,
+                           ignorer_binaires=not args.scan_binaries, taille_max=taille_max,
+                           exclusions=args.exclude, inclusions=args.include, respecter_gitignore=args.gitignore,
+                           verifier=not args.no_verify, workers_verification=args.verify_workers, regles_binaires=regles_binaires)
         elif args.command == "scan-git":
-            core.mode_scan_git(patterns, args.path, pause_event, cancel_event)
+            core.mode_scan_git(patterns, args.path, pause_event, cancel_event, watermark_path=None if args.full else git_history.CHEMIN_WATERMARKS_DEFAUT, workers=args.workers, backend=args.backend,
+                               verifier=not args.no_verify, workers_verification=args.verify_workers)
         elif args.command == "scan-remote-git":
-            core.mode_scan_remote_git(patterns, args.url, pause_event, cancel_event)
+            core.mode_scan_remote_git(patterns, args.url, pause_event, cancel_event, watermark_path=None if args.full else git_history.CHEMIN_WATERMARKS_DEFAUT, workers=args.workers, backend=args.backend,
+                                      filtre=args.filter, profondeur=args.depth, depuis=args.shallow_since, branche=args.branch, branche_unique=args.single_branch, dossier_miroirs=args.mirror_cache,
+                                      verifier=not args.no_verify, workers_verification=args.verify_workers)
         elif args.command == "scan-entropy":
-            core.mode_scan_entropy(args.path, args.threshold, pause_event, cancel_event)
+            core.mode_scan_entropy(args.path, args.threshold, pause_event, cancel_event, fenetre=args.window, seuils_alphabet=seuils_alphabet,
+                                   ignorer_binaires=not args.scan_binaries, taille_max=taille_max,
+                                   exclusions=args.exclude, inclusions=args.include, respecter_gitignore=args.gitignore, regles_binaires=regles_binaires)
 
     except KeyboardInterrupt:
         print("\n\n[!] Opération annulée par l'utilisateur.")
@@ -106,6 +190,8 @@ def main():
         time.sleep(1)
         if args.output_file:
             core.enregistrer_resultats(args.output_file, args.output_format)
+        # Les résultats restent consultables dans le stockage SQLite, même sans -o (sauf avec --no-store)
+        core.fermer_magasin_resultats()
 
 if __name__ == "__main__":
     main()
@@ -6,6 +6,12 @@ des patterns de secrets à partir d'un fichier JSON.
 import json
 import re
 from . import validators
+from .binary_filter import regles_binaires
+from .matcher import PatternSet, compiler_version_octets
+
+# --- CONSTANTES ---
+# Section de la configuration qui ajuste la détection des fichiers binaires (pas un service)
+CLE_FILTRE_BINAIRES = "_binary_filter"
 
 def charger_patterns(config_path: str) -> dict:
     """
@@ -20,6 +26,8 @@ def charger_patterns(config_path: str) -> dict:
         
         patterns = {}
         for service_name, details in config_data.items():
+            if service_name == CLE_FILTRE_BINAIRES:
+                continue
             if "pattern" in details:
                 # Définir le validateur approprié selon le service
                 if service_name == "Gemini":
@@ -32,12 +40,17 @@ def charger_patterns(config_path: str) -> dict:
                 
                 patterns[service_name] = {
                     "regex": re.compile(details["pattern"]),
+                    # Version octets pour scanner les fichiers sans les décoder
+                    "regex_bytes": compiler_version_octets(details["pattern"]),
+                    # Littéraux du préfiltre ; extraits du motif s'ils ne sont pas déclarés
+                    "keywords": details.get("keywords"),
                     "validator": validator
                 }
             else:
                 print(f"[!] Avertissement: Le service '{service_name}' n'a pas de pattern défini.")
                 
-        return patterns
+        # Compile une seule fois le matcher combiné utilisé par les modes de scan
+        return PatternSet(patterns)
     except FileNotFoundError:
         print(f"[!] Erreur critique: Le fichier de configuration '{config_path}' est introuvable.")
         return {}
@@ -47,3 +60,26 @@ def charger_patterns(config_path: str) -> dict:
     except Exception as e:
         print(f"[!] Erreur critique lors du chargement de '{config_path}': {e}")
         return {}
+
+def charger_regles_binaires(config_path: str, extensions_ajoutees=(), extensions_retirees=(), ratio_nul_max=None) -> dict:
+    """
+    Règles de détection des binaires : section "_binary_filter" de la configuration
+    ({"add_extensions": [...], "remove_extensions": [...], "null_ratio": 0.01, "sample_size": 8192}),
+    complétée par les valeurs passées (ligne de commande), qui l'emportent.
+    """
+    section = {}
+    try:
+        with open(config_path, 'r', encoding='utf-8-sig') as f:
+            section = json.load(f).get(CLE_FILTRE_BINAIRES) or {}
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        return regles_binaires(
+            list(section.get("add_extensions", [])) + list(extensions_ajoutees),
+            list(section.get("remove_extensions", [])) + list(extensions_retirees),
+            ratio_nul_max if ratio_nul_max is not None else section.get("null_ratio"),
+            section.get("sample_size"),
+        )
+    except (TypeError, ValueError) as e:
+        print(f"[!] Avertissement: section '{CLE_FILTRE_BINAIRES}' invalide ({e}), règles par défaut utilisées.")
+        return regles_binaires()
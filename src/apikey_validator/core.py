@@ -4,16 +4,14 @@ Module principal contenant la logique métier de l'outil de scan de secrets.
 Toutes les fonctions ici sont conçues pour être indépendantes de l'interface
 (CLI ou GUI) et être réutilisables.
 """
-import concurrent.futures
-import csv
 import getpass
 import itertools
-import json
 import math
 import os
 import re
 import shutil
 import string
+import subprocess
 import sys
 import tempfile
 import threading
@@ -27,14 +25,39 @@ try:
 except ImportError:
     git = None
 
+from .binary_filter import FiltreBinaires
+from .dedup import CAPACITE_BLOOM_DEFAUT, IndexDoublons
+from .entropy import calculer_entropie, entropies_lot, fenetre_entropie_max, seuil_candidat
+from .findings_store import CHEMIN_RESULTATS_DEFAUT, SESSIONS_CONSERVEES_DEFAUT, FindingsStore
+from .git_history import ErreurParcoursGit, GitWatermark, ScannerHistorique, arguments_rev_list, chemin_miroir, compter_commits, est_clone_partiel, est_superficiel, lister_commits
+from .matcher import obtenir_matcher
+from .path_filter import FiltreChemins
+from .progress import RapporteurProgression
+from .parallel import scanner_en_processus, scanner_historique_en_processus
+from .scan_cache import ScanCache, empreinte_patterns
+from .streaming import nouvelle_empreinte, rechercher_dans_flux, scanner_fichier
+from .verification import MAX_WORKERS_VERIFICATION, verifier_resultats
+from .walker import ParcoursFichiers
+
 # --- VARIABLES GLOBALES ET VERROUS ---
-resultats_trouves = []
 result_lock = threading.Lock()
+# Résultats de la session, créés au premier résultat (voir obtenir_magasin_resultats)
+_magasin_resultats = None
+_magasin_lock = threading.Lock()
+# Stockage sur disque (sinon base temporaire) et nombre de sessions conservées, voir configurer_stockage_resultats
+_stockage_persistant = True
+_sessions_conservees = SESSIONS_CONSERVEES_DEFAUT
 
 # --- CONSTANTES ---
 CHARSET = string.ascii_letters + string.digits + "-_"
 MAX_WORKERS = 10
 POTENTIAL_SECRET_REGEX = re.compile(r'([a-zA-Z0-9\-_/+]{20,64})')
+POTENTIAL_SECRET_REGEX_BYTES = re.compile(POTENTIAL_SECRET_REGEX.pattern.encode('ascii'))
+POTENTIAL_SECRET_MAX_LEN = 64
+TAILLE_LOT_ENTROPIE = 4096
+# Mode fenêtre glissante : jetons de longueur quelconque (coupés au-delà de JETON_MAX_LEN)
+JETON_REGEX_BYTES = re.compile(rb'[a-zA-Z0-9\-_/+]{20,4096}')
+JETON_MAX_LEN = 4096
 
 # --- TYPES DE CALLBACKS ---
 # ProgressCallback = Callable[[int, int, str], None]  # current, total, message
@@ -42,12 +65,44 @@ POTENTIAL_SECRET_REGEX = re.compile(r'([a-zA-Z0-9\-_/+]{20,64})')
 
 # --- FONCTIONS UTILITAIRES ---
 
-def ajouter_resultat(resultat: dict):
-    """Ajoute une entrée à la liste globale des résultats de manière thread-safe."""
-    with result_lock:
-        resultats_trouves.append(resultat)
+def configurer_stockage_resultats(persistant: bool = True, sessions_conservees: int = SESSIONS_CONSERVEES_DEFAUT):
+    """
+    Règle le stockage des résultats des sessions suivantes.
+
+    Sans `persistant`, les clés trouvées ne sont écrites que dans une base
+    temporaire supprimée à la fermeture. Sinon, seules les
+    `sessions_conservees` dernières sessions restent sur disque.
+    """
+    global _stockage_persistant, _sessions_conservees
+    _stockage_persistant = persistant
+    _sessions_conservees = max(1, sessions_conservees)
+
+def obtenir_magasin_resultats(chemin_db: str = CHEMIN_RESULTATS_DEFAUT) -> FindingsStore:
+    """Retourne le stockage des résultats de la session en cours, en le créant si besoin."""
+    global _magasin_resultats
+    with _magasin_lock:
+        if _magasin_resultats is None:
+            _magasin_resultats = FindingsStore(chemin_db if _stockage_persistant else None, sessions_conservees=_sessions_conservees)
+        return _magasin_resultats
 
-def valider_et_rapporter(validator, service, cle, source_type, source_info, result_callback=None):
+def ajouter_resultat(resultat: dict):
+    """Ajoute une entrée aux résultats de la session (thread-safe, écrit par lots)."""
+    obtenir_magasin_resultats().ajouter(resultat)
+
+def vider_resultats():
+    """Écrit les résultats encore en attente ; appelé à la fin de chaque mode."""
+    if _magasin_resultats is not None:
+        _magasin_resultats.vider()
+
+def fermer_magasin_resultats():
+    """Écrit les résultats en attente et ferme le stockage de la session."""
+    global _magasin_resultats
+    with _magasin_lock:
+        if _magasin_resultats is not None:
+            _magasin_resultats.fermer()
+            _magasin_resultats = None
+
+def valider_et_rapporter(validator, service, cle, source_type, source_info, result_callback=None, offset=None):
     """Valide une clé et rapporte le résultat via callback ou print."""
     est_valide = validator(cle, silencieux=True)
     
@@ -59,12 +114,15 @@ def valider_et_rapporter(validator, service, cle, source_type, source_info, resu
         "source_type": source_type,
         "source_info": source_info,
     }
+    if offset is not None:
+        resultat["offset"] = offset
     
     if result_callback:
         result_callback(resultat)
     else:
         with result_lock:
-            print(f"\n[*] Clé potentielle ({service}) trouvée dans : {source_info}")
+            position = f" (octet {offset})" if offset is not None else ""
+            print(f"\n[*] Clé potentielle ({service}) trouvée dans : {source_info}{position}")
             if est_valide:
                 print(f"[+] SUCCÈS ! La clé trouvée est VALIDE : {cle}")
             else:
@@ -73,16 +131,65 @@ def valider_et_rapporter(validator, service, cle, source_type, source_info, resu
             
     ajouter_resultat(resultat)
 
+def rapporter_trouvaille(service, cle, source_type, source_info, result_callback=None, offset=None):
+    """Rapporte une clé trouvée sans la valider ; la vérification se fait ensuite par paire unique."""
+    resultat = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "service": service,
+        "key": cle,
+        "is_valid": None,
+        "source_type": source_type,
+        "source_info": source_info,
+    }
+    if offset is not None:
+        resultat["offset"] = offset
+
+    if result_callback:
+        result_callback(resultat)
+    else:
+        with result_lock:
+            position = f" (octet {offset})" if offset is not None else ""
+            print(f"\n[*] Clé potentielle ({service}) trouvée dans : {source_info}{position}")
+
+    ajouter_resultat(resultat)
+
+def _verifier_trouvailles(patterns: dict, pause_event: threading.Event, cancel_event: threading.Event, progress_callback, result_callback, verifier: bool, workers: int):
+    """Seconde phase d'un scan : vérifie les clés uniques trouvées, sauf si la vérification est désactivée."""
+    if cancel_event.is_set():
+        return
+    if not verifier:
+        if not progress_callback: print("[*] Vérification désactivée : les clés trouvées sont enregistrées sans être testées.")
+        return
+    verifier_resultats(patterns, obtenir_magasin_resultats(), pause_event, cancel_event, progress_callback, result_callback, workers)
+
 def calculate_entropy(s: str) -> float:
     """Calcule l'entropie de Shannon pour une chaîne de caractères."""
-    if not s: return 0.0
-    freq_map = {c: s.count(c) for c in set(s)}
-    entropy = 0.0
-    str_len = len(s)
-    for char in freq_map:
-        freq = freq_map[char] / str_len
-        entropy -= freq * math.log2(freq)
-    return entropy
+    return calculer_entropie(s)
+
+def _candidats_entropie(bloc: bytes):
+    """Adapte POTENTIAL_SECRET_REGEX_BYTES au format (etiquette, match) du lecteur en flux."""
+    for match in POTENTIAL_SECRET_REGEX_BYTES.finditer(bloc):
+        yield None, match
+
+def _jetons_entropie(bloc: bytes):
+    """Adapte JETON_REGEX_BYTES au format (etiquette, match) du lecteur en flux."""
+    for match in JETON_REGEX_BYTES.finditer(bloc):
+        yield None, match
+
+def _evaluer_candidats_entropie(flux, fenetre: Optional[int]):
+    """Génère (offset, candidat, entropie) pour les candidats d'un fichier ouvert en binaire."""
+    if fenetre:
+        # Fenêtre glissante : seule la sous-chaîne d'entropie maximale de chaque jeton est retenue
+        for _, offset, jeton in rechercher_dans_flux(flux, _jetons_entropie, JETON_MAX_LEN):
+            debut, fin, entropy = fenetre_entropie_max(jeton.encode('ascii'), fenetre)
+            yield offset + debut, jeton[debut:fin], entropy
+        return
+    # Les candidats sont évalués par lots : une seule passe vectorisée par lot
+    candidats = rechercher_dans_flux(flux, _candidats_entropie, POTENTIAL_SECRET_MAX_LEN)
+    for lot in iter(lambda: list(itertools.islice(candidats, TAILLE_LOT_ENTROPIE)), []):
+        entropies = entropies_lot([secret_str.encode('ascii') for _, _, secret_str in lot])
+        for (_, offset, secret_str), entropy in zip(lot, entropies):
+            yield offset, secret_str, entropy
 
 def generate_random_string(length: int, chars: str = CHARSET) -> str:
     """Génère une chaîne de caractères aléatoires d'une longueur donnée."""
@@ -166,6 +273,7 @@ def mode_validation(patterns: dict, api_key: str = None, service_specifie: str =
             status = "VALIDE" if is_valid else "INVALIDE"
             print(f"\n[*] Résultat pour '{service}': {status}")
         ajouter_resultat(res)
+        vider_resultats()
 
     if service_specifie:
         if service_specifie not in patterns:
@@ -194,22 +302,20 @@ def mode_find_keys(patterns: dict, service_specifie: str, num_keys_to_generate:
     validator = patterns[service_specifie]["validator"]
     if not progress_callback: print(f"[*] Génération et validation de {num_keys_to_generate} clés pour {service_specifie}...")
 
-    keys_generated = 0
-    for i in range(num_keys_to_generate):
-        if cancel_event.is_set(): return
-        pause_event.wait()
-
-        key_candidate = generate_key(service_specifie)
-        keys_generated += 1
+    progression = RapporteurProgression(progress_callback, num_keys_to_generate, "Génération", "clés")
+    try:
+        for i in range(num_keys_to_generate):
+            if cancel_event.is_set(): return
+            pause_event.wait()
 
-        if progress_callback:
-            progress_callback(keys_generated, num_keys_to_generate, f"Génération: {key_candidate[:10]}...")
-        else:
-            sys.stdout.write(f"\r[*] Génération {keys_generated}/{num_keys_to_generate} : {key_candidate[:10]}...")
-            sys.stdout.flush()
+            key_candidate = generate_key(service_specifie)
+            progression.avancer(f"{key_candidate[:10]}...")
 
-        if validator(key_candidate, silencieux=True):
-            valider_et_rapporter(validator, service_specifie, key_candidate, "generated", f"Generated key for {service_specifie}", result_callback)
+            if validator(key_candidate, silencieux=True):
+                valider_et_rapporter(validator, service_specifie, key_candidate, "generated", f"Generated key for {service_specifie}", result_callback)
+    finally:
+        progression.terminer()
+        vider_resultats()
 
 def mode_brute_force(patterns: dict, cle_partielle: str, service_specifie: str, depth: int, pause_event: threading.Event, cancel_event: threading.Event, progress_callback=None, result_callback=None):
     if service_specifie not in patterns:
@@ -219,10 +325,9 @@ def mode_brute_force(patterns: dict, cle_partielle: str, service_specifie: str,
     validator = patterns[service_specifie]["validator"]
     if not progress_callback: print(f"[*] Lancement de la recherche pour {depth} caractère(s) manquant(s).")
     
+    total_combinaisons = sum([len(CHARSET)**l for l in range(1, depth + 1)])
+    progression = RapporteurProgression(progress_callback, total_combinaisons, "Essai", "essais")
     try:
-        total_combinaisons = sum([len(CHARSET)**l for l in range(1, depth + 1)])
-        essais_effectues = 0
-        
         for longueur in range(1, depth + 1):
             if cancel_event.is_set(): return
             combinaisons = itertools.product(CHARSET, repeat=longueur)
@@ -233,19 +338,16 @@ def mode_brute_force(patterns: dict, cle_partielle: str, service_specifie: str,
                 pause_event.wait()
 
                 cle_candidate = cle_partielle + "".join(combo)
-                essais_effectues += 1
-                
-                if progress_callback:
-                    progress_callback(essais_effectues, total_combinaisons, f"Essai: {cle_candidate}")
-                else:
-                    sys.stdout.write(f"\r[*] Essai {essais_effectues}/{total_combinaisons} : {cle_candidate}")
-                    sys.stdout.flush()
+                progression.avancer(cle_candidate)
 
                 if validator(cle_candidate, silencieux=True):
                     valider_et_rapporter(validator, service_specifie, cle_candidate, "brute-force", f"Partial key: {cle_partielle}", result_callback)
                     return
     except KeyboardInterrupt:
         print("\n\n[!] Opération annulée par l'utilisateur.")
+    finally:
+        progression.terminer()
+        vider_resultats()
 
 def mode_dictionnaire(patterns: dict, cle_partielle: str, service_specifie: str, wordlist_path: str, pause_event: threading.Event, cancel_event: threading.Event, progress_callback=None, result_callback=None):
     if service_specifie not in patterns:
@@ -262,51 +364,129 @@ def mode_dictionnaire(patterns: dict, cle_partielle: str, service_specifie: str,
     total_mots = len(mots)
     if not progress_callback: print(f"[*] Chargement de {total_mots} mots depuis la liste.")
     
-    for i, mot in enumerate(mots):
-        if cancel_event.is_set(): return
-        pause_event.wait()
-
-        cle_candidate = cle_partielle + mot
-        
-        if progress_callback:
-            progress_callback(i + 1, total_mots, f"Essai: {cle_candidate}")
-        else:
-            sys.stdout.write(f"\r[*] Essai {i+1}/{total_mots} : {cle_candidate}")
-            sys.stdout.flush()
-            
-        if validator(cle_candidate, silencieux=True):
-            valider_et_rapporter(validator, service_specifie, cle_candidate, "dictionary", f"Wordlist: {wordlist_path}", result_callback)
-            return
+    progression = RapporteurProgression(progress_callback, total_mots, "Essai", "essais")
+    try:
+        for mot in mots:
+            if cancel_event.is_set(): return
+            pause_event.wait()
 
-def mode_scan(patterns: dict, scan_path: str, pause_event: threading.Event, cancel_event: threading.Event, progress_callback=None, result_callback=None):
+            cle_candidate = cle_partielle + mot
+            progression.avancer(cle_candidate)
+                
+            if validator(cle_candidate, silencieux=True):
+                valider_et_rapporter(validator, service_specifie, cle_candidate, "dictionary", f"Wordlist: {wordlist_path}", result_callback)
+                return
+    finally:
+        progression.terminer()
+        vider_resultats()
+
+def _afficher_filtrage(filtre_chemins: FiltreChemins, filtre_binaires: FiltreBinaires, progression: RapporteurProgression, rejoues: int = 0):
+    """
+    Statistiques de fin de scan sur les chemins élagués, les fichiers ignorés
+    et ceux rejoués depuis le cache ; l'interface les reçoit en un seul
+    message via le callback de progression.
+    """
+    messages = []
+    if filtre_chemins.dossiers_elagues or filtre_chemins.fichiers_exclus:
+        messages.append(("*", f"{filtre_chemins.dossiers_elagues} dossier(s) élagué(s), {filtre_chemins.fichiers_exclus} fichier(s) exclu(s) par les règles de chemins."))
+    if filtre_chemins.inclusions is not None and not filtre_chemins.fichiers_acceptes:
+        messages.append(("!", "Aucun fichier ne correspond aux globs --include."))
+    if filtre_binaires.total_ignores:
+        messages.append(("*", filtre_binaires.resume() + "."))
+    if rejoues:
+        messages.append(("*", f"{rejoues} fichier(s) inchangé(s) rejoué(s) depuis le cache."))
+    if not messages:
+        return
+    if progression.progress_callback:
+        progression.annoncer(" ".join(texte for _, texte in messages))
+    else:
+        for niveau, texte in messages:
+            progression.annoncer(texte, niveau)
+
+def _scanner_fichiers_localement(fichiers, matcher, cache=None):
+    """Backend 'thread' : les regex s'exécutent sur le thread appelant. Génère (chemin, trouvailles, octets lus)."""
+    for file_path in fichiers:
+        trouvailles = cache.consulter(file_path) if cache else None
+        octets = 0
+        if trouvailles is None:
+            empreinte = nouvelle_empreinte()
+            try:
+                trouvailles, octets = scanner_fichier(file_path, matcher.finditer, matcher.longueur_max, empreinte=empreinte)
+                if cache: cache.enregistrer(file_path, trouvailles, empreinte.hexdigest())
+            except (IOError, OSError):
+                trouvailles = []
+        yield file_path, trouvailles, octets
+
+def mode_scan(patterns: dict, scan_path: str, pause_event: threading.Event, cancel_event: threading.Event, progress_callback=None, result_callback=None, workers: int = MAX_WORKERS, backend: str = "thread", cache_path: Optional[str] = None, ignorer_binaires: bool = True, taille_max: Optional[int] = None,
+              exclusions: Optional[list] = None, inclusions: Optional[list] = None, respecter_gitignore: bool = False, verifier: bool = True, workers_verification: Optional[int] = None,
+              regles_binaires: Optional[dict] = None):
+    """
+    Scanne les fichiers de `scan_path` en deux phases.
+
+    Les clés trouvées sont d'abord enregistrées sans être validées, au rythme
+    du scan ; chaque paire (service, clé) unique est ensuite vérifiée avec au
+    plus `workers_verification` appels simultanés (par défaut `workers` avec
+    le backend 'thread'). `verifier=False` laisse les résultats non vérifiés.
+    `regles_binaires` (voir binary_filter.regles_binaires) remplace les
+    règles par défaut de détection des binaires.
+    """
     if not os.path.isdir(scan_path):
         print(f"[!] Erreur : '{scan_path}' n'est pas un répertoire valide.")
         return
 
     if not progress_callback: print(f"[*] Démarrage du scan dans : {scan_path}")
+    # Cache incrémental : les fichiers inchangés depuis le dernier scan sont rejoués
+    cache = ScanCache(cache_path, empreinte_patterns(patterns)) if cache_path else None
     
-    fichiers_a_scanner = [os.path.join(r, file) for r, d, fs in os.walk(scan_path) for file in fs if not any(folder in r for folder in ['.git', '.venv', 'node_modules', '__pycache__'])]
-    total_fichiers = len(fichiers_a_scanner)
-
-    with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
-        futures = []
-        for i, file_path in enumerate(fichiers_a_scanner):
-            if cancel_event.is_set(): break
-            pause_event.wait()
-            
-            if progress_callback: progress_callback(i + 1, total_fichiers, os.path.basename(file_path))
-
-            try:
-                with open(file_path, 'r', errors='ignore') as f:
-                    content = f.read()
-                    for nom_cle, details in patterns.items():
-                        for match in re.finditer(details["regex"], content):
-                            futures.append(executor.submit(valider_et_rapporter, details["validator"], nom_cle, match.group(0), "scan", file_path, result_callback))
-            except (IOError, OSError):
-                pass
-        concurrent.futures.wait(futures)
+    # Parcours paresseux : le scan démarre dès le premier fichier trouvé, binaires écartés au passage
+    filtre_binaires = FiltreBinaires(actif=ignorer_binaires, taille_max=taille_max, **(regles_binaires or {}))
+    filtre_chemins = FiltreChemins(scan_path, exclusions or (), inclusions or (), respecter_gitignore=respecter_gitignore)
+    fichiers_a_scanner = ParcoursFichiers(scan_path, filtre_binaires=filtre_binaires, filtre_chemins=filtre_chemins)
+
+    if backend == "process":
+        # Les regex tournent dans `workers` processus ; la vérification garde sa propre limite
+        trouvailles_par_fichier = scanner_en_processus(fichiers_a_scanner, patterns, workers, pause_event, cancel_event, cache=cache)
+        workers_verification = workers_verification or MAX_WORKERS_VERIFICATION
+    else:
+        trouvailles_par_fichier = _scanner_fichiers_localement(fichiers_a_scanner, obtenir_matcher(patterns), cache)
+        workers_verification = workers_verification or workers
+
+    # Le total estimé par le parcours n'est évalué qu'au moment d'émettre
+    progression = RapporteurProgression(progress_callback, fichiers_a_scanner.estimation_total, "Analyse", "fichiers")
+    # Paires (clé, fichier) déjà rapportées pendant ce scan
+    doublons = IndexDoublons()
+    for file_path, trouvailles, octets in trouvailles_par_fichier:
+        if cancel_event.is_set(): break
+        pause_event.wait()
+        
+        # Les fichiers rejoués depuis le cache (0 octet lu) ne comptent pas dans le débit
+        progression.avancer(os.path.basename(file_path), octets=octets)
+
+        for nom_cle, offset, cle in trouvailles:
+            if not doublons.ajouter(cle, file_path): continue
+            rapporter_trouvaille(nom_cle, cle, "scan", file_path, result_callback, offset)
+    trouvailles_par_fichier.close()
+    fichiers_a_scanner.fermer()
+    progression.terminer()
+    vider_resultats()
+    _afficher_filtrage(filtre_chemins, filtre_binaires, progression, cache.rejoues if cache else 0)
+    if cache:
+        cache.fermer()
+    _verifier_trouvailles(patterns, pause_event, cancel_event, progress_callback, result_callback, verifier, workers_verification)
+
+def _scanner_historique_localement(git_dir: str, arguments_rev: list, matcher):
+    """Backend 'thread' : deux processus git persistants (`git log --raw -p`, `cat-file --batch`)."""
+    scanner = ScannerHistorique(git_dir, matcher)
+    try:
+        yield from scanner.parcourir(arguments_rev)
+    finally:
+        if scanner.blobs_ignores:
+            print(f"[*] Clone partiel : {scanner.blobs_ignores} blob(s) exclu(s) par le filtre non scanné(s).")
+        scanner.fermer()
 
-def mode_scan_git(patterns: dict, repo_path: str, pause_event: threading.Event, cancel_event: threading.Event, progress_callback=None, result_callback=None):
+def mode_scan_git(patterns: dict, repo_path: str, pause_event: threading.Event, cancel_event: threading.Event, progress_callback=None, result_callback=None, watermark_path: Optional[str] = None, cle_depot: Optional[str] = None, workers: int = MAX_WORKERS, backend: str = "thread",
+                  verifier: bool = True, workers_verification: int = MAX_WORKERS_VERIFICATION):
+    """Scanne l'historique du dépôt, puis vérifie les clés uniques trouvées (voir `mode_scan`)."""
     if git is None:
         print("[!] Erreur: GitPython non installé.")
         return
@@ -316,99 +496,220 @@ def mode_scan_git(patterns: dict, repo_path: str, pause_event: threading.Event,
         print(f"[!] Erreur : '{repo_path}' n'est pas un dépôt Git valide.")
         return
 
-    commits = list(repo.iter_commits('--all'))
-    total_commits = len(commits)
+    # Watermark : seuls les commits inaccessibles depuis les sommets déjà scannés sont parcourus
+    watermark = GitWatermark(watermark_path, cle_depot or os.path.abspath(repo.git_dir), empreinte_patterns(patterns)) if watermark_path else None
+    sommets_actuels = repo.git.rev_parse('--all').split()
+    # Clone superficiel ou partiel : une partie de l'historique n'est pas lue, ses sommets ne doivent pas être mémorisés
+    historique_complet = not est_superficiel(repo.git_dir) and not est_clone_partiel(repo.git_dir)
+    if watermark and not historique_complet and not progress_callback:
+        print("[*] Historique incomplet (clone superficiel ou partiel) : le watermark ne sera pas mis à jour.")
+    arguments_rev = arguments_rev_list(watermark.sommets_scannes() if watermark else [])
+    try:
+        if backend == "process":
+            # Tranches topologiques contiguës scannées en parallèle, chaque worker a son propre dépôt
+            commits = lister_commits(repo.git_dir, arguments_rev)
+            total_commits = len(commits)
+            resultats_par_commit = scanner_historique_en_processus(repo.git_dir, commits, patterns, workers, pause_event, cancel_event)
+        else:
+            total_commits = compter_commits(repo.git_dir, arguments_rev)
+            resultats_par_commit = _scanner_historique_localement(repo.git_dir, arguments_rev, obtenir_matcher(patterns))
+    except subprocess.CalledProcessError as e:
+        print(f"[!] Erreur lors du parcours de l'historique : {e}")
+        return
     if not progress_callback: print(f"[*] {total_commits} commits à analyser...")
 
-    with concurrent.futures.ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
-        futures = []
-        for i, commit in enumerate(commits):
+    progression = RapporteurProgression(progress_callback, total_commits, "Analyse", "commits")
+    doublons = IndexDoublons()
+    parcours_termine = True
+    try:
+        for sha_commit, resultats in resultats_par_commit:
             if cancel_event.is_set(): break
             pause_event.wait()
             
-            if progress_callback: progress_callback(i + 1, total_commits, f"Commit {commit.hexsha[:7]}")
-
-            try:
-                parent = commit.parents[0] if commit.parents else git.NULL_TREE
-                diffs = parent.diff(commit, create_patch=True)
-                for d in diffs:
-                    diff_content = d.diff.decode('utf-8', errors='ignore')
-                    for nom_cle, details in patterns.items():
-                        for match in re.finditer(details["regex"], diff_content):
-                            source_info = f"commit: {commit.hexsha[:7]}, file: {d.a_path or d.b_path}"
-                            futures.append(executor.submit(valider_et_rapporter, details["validator"], nom_cle, match.group(0), "git-history", source_info, result_callback))
-            except Exception:
-                pass
-        concurrent.futures.wait(futures)
-
-def mode_scan_remote_git(patterns: dict, repo_url: str, pause_event: threading.Event, cancel_event: threading.Event, progress_callback=None, result_callback=None):
+            progression.avancer(f"Commit {sha_commit[:7]}")
+
+            for chemin, trouvailles in resultats:
+                for nom_cle, numero_ligne, offset, cle in trouvailles:
+                    source_info = f"commit: {sha_commit[:7]}, file: {chemin}"
+                    if numero_ligne is not None: source_info += f", line: {numero_ligne}"
+                    if not doublons.ajouter(cle, source_info): continue
+                    rapporter_trouvaille(nom_cle, cle, "git-history", source_info, result_callback, offset)
+    except (ErreurParcoursGit, subprocess.CalledProcessError) as e:
+        # Les commits suivants n'ont pas été lus : le watermark n'est pas mis à jour
+        parcours_termine = False
+        print(f"\n[!] Erreur lors du parcours de l'historique ({progression.courant}/{total_commits} commits analysés) : {e}")
+    resultats_par_commit.close()
+    progression.terminer()
+    vider_resultats()
+    if watermark:
+        if not cancel_event.is_set() and historique_complet and parcours_termine:
+            watermark.enregistrer(sommets_actuels)
+        watermark.fermer()
+    _verifier_trouvailles(patterns, pause_event, cancel_event, progress_callback, result_callback, verifier, workers_verification)
+
+def _options_clone(bare: bool, filtre: Optional[str], profondeur: Optional[int], depuis: Optional[str], branche: Optional[str], branche_unique: bool) -> dict:
+    """Options GitPython de `clone` (et de `fetch` pour les limites de profondeur)."""
+    options = {}
+    if bare: options["bare"] = True
+    if filtre: options["filter"] = filtre
+    if profondeur: options["depth"] = profondeur
+    if depuis: options["shallow_since"] = depuis
+    if branche: options["branch"] = branche
+    if branche_unique: options["single_branch"] = True
+    return options
+
+def _preparer_miroir(repo_url: str, dossier_miroirs: str, options: dict) -> str:
+    """Clone le dépôt en miroir au premier scan, puis ne récupère que les nouveaux objets."""
+    chemin = chemin_miroir(dossier_miroirs, repo_url)
+    if os.path.isdir(chemin):
+        options_fetch = {cle: valeur for cle, valeur in options.items() if cle in ("depth", "shallow_since")}
+        if not options_fetch and os.path.exists(os.path.join(chemin, "shallow")):
+            # Miroir créé par un scan superficiel : un scan complet récupère tout l'historique
+            options_fetch["unshallow"] = True
+        git.Repo(chemin).git.fetch("origin", prune=True, **options_fetch)
+    else:
+        os.makedirs(dossier_miroirs, exist_ok=True)
+        # --mirror implique --bare et n'est pas compatible avec --single-branch/--branch
+        options = {cle: valeur for cle, valeur in options.items() if cle not in ("bare", "branch", "single_branch")}
+        git.Repo.clone_from(repo_url, chemin, mirror=True, **options)
+    return chemin
+
+def mode_scan_remote_git(patterns: dict, repo_url: str, pause_event: threading.Event, cancel_event: threading.Event, progress_callback=None, result_callback=None, watermark_path: Optional[str] = None, workers: int = MAX_WORKERS, backend: str = "thread",
+                         bare: bool = True, filtre: Optional[str] = None, profondeur: Optional[int] = None, depuis: Optional[str] = None, branche: Optional[str] = None, branche_unique: bool = False, dossier_miroirs: Optional[str] = None,
+                         verifier: bool = True, workers_verification: int = MAX_WORKERS_VERIFICATION):
+    """
+    Clone un dépôt distant puis scanne son historique.
+
+    Seule la base d'objets est nécessaire : le clone est nu (`bare`) par défaut.
+    `filtre` (ex. "blob:limit=1m") produit un clone partiel, `profondeur` et
+    `depuis` un clone superficiel, `branche`/`branche_unique` limitent les refs.
+    Avec `dossier_miroirs`, le clone est conservé en miroir et les scans
+    suivants de la même URL ne récupèrent que les nouveaux objets.
+    """
     if git is None:
         print("[!] Erreur: GitPython non installé.")
         return
-    temp_dir = tempfile.mkdtemp()
-    if not progress_callback: print(f"[*] Clonage de {repo_url}...")
+    options = _options_clone(bare, filtre, profondeur, depuis, branche, branche_unique)
+    temp_dir = None if dossier_miroirs else tempfile.mkdtemp()
+    if not progress_callback: print(f"[*] {'Mise à jour du miroir' if dossier_miroirs else 'Clonage'} de {repo_url}...")
 
     try:
         if cancel_event.is_set(): return
-        git.Repo.clone_from(repo_url, temp_dir)
+        if dossier_miroirs:
+            chemin_depot = _preparer_miroir(repo_url, dossier_miroirs, options)
+        else:
+            git.Repo.clone_from(repo_url, temp_dir, **options)
+            chemin_depot = temp_dir
         if cancel_event.is_set(): return
         
-        mode_scan_git(patterns, temp_dir, pause_event, cancel_event, progress_callback, result_callback)
+        # Le clone change à chaque fois : le watermark est indexé par l'URL
+        mode_scan_git(patterns, chemin_depot, pause_event, cancel_event, progress_callback, result_callback, watermark_path, cle_depot=repo_url, workers=workers, backend=backend,
+                      verifier=verifier, workers_verification=workers_verification)
     except git.exc.GitCommandError as e:
         print(f"\n[!] Erreur de clonage : {e}")
     finally:
-        if not progress_callback: print(f"[*] Nettoyage du répertoire temporaire.")
-        shutil.rmtree(temp_dir)
-
-def mode_scan_entropy(scan_path: str, threshold: float, pause_event: threading.Event, cancel_event: threading.Event, progress_callback=None, result_callback=None):
+        if temp_dir:
+            if not progress_callback: print(f"[*] Nettoyage du répertoire temporaire.")
+            shutil.rmtree(temp_dir)
+
+def mode_scan_entropy(scan_path: str, threshold: float, pause_event: threading.Event, cancel_event: threading.Event, progress_callback=None, result_callback=None, fenetre: Optional[int] = None, seuils_alphabet: Optional[dict] = None, ignorer_binaires: bool = True, taille_max: Optional[int] = None,
+                      exclusions: Optional[list] = None, inclusions: Optional[list] = None, respecter_gitignore: bool = False, capacite_doublons: Optional[int] = CAPACITE_BLOOM_DEFAUT,
+                      regles_binaires: Optional[dict] = None):
+    """
+    Signale les chaînes dont l'entropie dépasse `threshold`.
+
+    Avec `seuils_alphabet` (ex. entropy.SEUILS_ALPHABET_DEFAUT), l'alphabet de
+    chaque candidat (digits, hex, alnum, base64, base64url) est déterminé et le seuil
+    propre à cet alphabet remplace `threshold`, qui reste appliqué aux autres.
+
+    Par défaut, les suites de 20 à 64 caractères sont évaluées en entier. Avec
+    `fenetre`, une fenêtre glissante de `fenetre` caractères parcourt chaque
+    jeton (de longueur quelconque) et seule la fenêtre d'entropie maximale est
+    rapportée : un secret noyé dans un jeton plus long est aussi détecté.
+    L'entropie d'une fenêtre de W caractères ne dépasse pas log2(W) : un seuil
+    supérieur ou égal est signalé comme inaccessible.
+
+    Les doublons (chaîne, fichier) sont écartés par un filtre de Bloom
+    dimensionné pour `capacite_doublons` entrées, dont la mémoire ne dépend
+    pas du nombre de candidats ; None conserve un ensemble exact. Le filtre
+    peut prendre une paire nouvelle pour un doublon : environ une sur un
+    million jusqu'à `capacite_doublons` paires, davantage au-delà (2e-4 à
+    1,5 fois, 3e-3 au double), ce qui est signalé une fois pendant le scan.
+    """
     if not os.path.isdir(scan_path):
         print(f"[!] Erreur : '{scan_path}' n'est pas un répertoire valide.")
         return
-
-    fichiers_a_scanner = [os.path.join(r, file) for r, d, fs in os.walk(scan_path) for file in fs if not any(folder in r for folder in ['.git', '.venv', 'node_modules', '__pycache__'])]
-    total_fichiers = len(fichiers_a_scanner)
-    if not progress_callback: print(f"[*] Démarrage du scan par entropie (seuil > {threshold})")
-
-    for i, file_path in enumerate(fichiers_a_scanner):
-        if cancel_event.is_set(): return
+    if fenetre is not None:
+        if fenetre < 1:
+            print(f"[!] Erreur : la fenêtre doit contenir au moins 1 caractère (reçu : {fenetre}).")
+            return
+        plafond = math.log2(fenetre)
+        seuils = {"par défaut": threshold, **(seuils_alphabet or {})}
+        inaccessibles = [f"{nom} ({seuil})" for nom, seuil in seuils.items() if seuil >= plafond]
+        if len(inaccessibles) == len(seuils):
+            print(f"[!] Erreur : une fenêtre de {fenetre} caractères plafonne l'entropie à {plafond:.2f}, aucun seuil n'est atteignable. Agrandissez la fenêtre.")
+            return
+        if inaccessibles:
+            print(f"[!] Avertissement : une fenêtre de {fenetre} caractères plafonne l'entropie à {plafond:.2f} ; seuils inaccessibles : {', '.join(inaccessibles)}.")
+
+    filtre_binaires = FiltreBinaires(actif=ignorer_binaires, taille_max=taille_max, **(regles_binaires or {}))
+    filtre_chemins = FiltreChemins(scan_path, exclusions or (), inclusions or (), respecter_gitignore=respecter_gitignore)
+    fichiers_a_scanner = ParcoursFichiers(scan_path, filtre_binaires=filtre_binaires, filtre_chemins=filtre_chemins)
+    # Sous le plus petit seuil, inutile de classer le candidat
+    seuil_min = min([threshold] + list((seuils_alphabet or {}).values()))
+    if not progress_callback: print(f"[*] Démarrage du scan par entropie (seuil > {threshold}{f', fenêtre de {fenetre}' if fenetre else ''})")
+
+    progression = RapporteurProgression(progress_callback, fichiers_a_scanner.estimation_total, "Analyse", "fichiers")
+    # Les candidats peuvent se compter en millions : filtre de Bloom de taille fixe
+    doublons = IndexDoublons(capacite_max=capacite_doublons)
+    for file_path in fichiers_a_scanner:
+        if cancel_event.is_set(): break
         pause_event.wait()
         
-        if progress_callback: progress_callback(i + 1, total_fichiers, os.path.basename(file_path))
+        progression.avancer(os.path.basename(file_path))
 
         try:
-            with open(file_path, 'r', errors='ignore') as f:
-                content = f.read()
-                for potential_secret in POTENTIAL_SECRET_REGEX.finditer(content):
-                    secret_str = potential_secret.group(0)
-                    entropy = calculate_entropy(secret_str)
-                    if entropy > threshold:
-                        source_info = f"file: {file_path}"
-                        if any(r['key'] == secret_str and r['source_info'] == source_info for r in resultats_trouves):
-                            continue
-                        
-                        res = {"service": "Entropy", "key": secret_str, "is_valid": False, "source_type": "entropy-scan", "source_info": source_info, "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())}
-                        if result_callback: result_callback(res)
-                        else: print(f"\n[*] Secret potentiel (entropie: {entropy:.2f}) trouvé dans : {file_path}")
-                        ajouter_resultat(res)
+            with open(file_path, 'rb') as f:
+                for offset, secret_str, entropy in _evaluer_candidats_entropie(f, fenetre):
+                    if entropy <= seuil_min:
+                        continue
+                    alphabet, seuil = seuil_candidat(secret_str.encode('ascii'), threshold, seuils_alphabet)
+                    if entropy <= seuil:
+                        continue
+                    source_info = f"file: {file_path}"
+                    if not doublons.ajouter(secret_str, source_info):
+                        continue
+                
+                    res = {"service": "Entropy", "key": secret_str, "is_valid": False, "source_type": "entropy-scan", "source_info": source_info, "offset": offset, "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())}
+                    if alphabet: res["charset"] = alphabet
+                    if result_callback: result_callback(res)
+                    else: print(f"\n[*] Secret potentiel (entropie: {entropy:.2f}) trouvé dans : {file_path}")
+                    ajouter_resultat(res)
+                # Octets effectivement lus, ajoutés au débit une fois le fichier parcouru
+                progression.avancer(os.path.basename(file_path), n=0, octets=f.tell())
         except (IOError, OSError):
             pass
+    fichiers_a_scanner.fermer()
+    progression.terminer()
+    vider_resultats()
+    _afficher_filtrage(filtre_chemins, filtre_binaires, progression)
 
 def enregistrer_resultats(output_file, output_format):
-    """Enregistre les résultats trouvés dans un fichier JSON ou CSV."""
-    if not output_file or not resultats_trouves:
+    """Enregistre les résultats de la session dans un fichier JSON ou CSV, en flux."""
+    if not output_file or _magasin_resultats is None:
+        return
+    total = _magasin_resultats.compter()
+    if not total:
         return
     
-    print(f"\n[*] Enregistrement de {len(resultats_trouves)} résultat(s) dans '{output_file}'...")
+    print(f"\n[*] Enregistrement de {total} résultat(s) dans '{output_file}'...")
     try:
         with open(output_file, 'w', newline='', encoding='utf-8') as f:
             if output_format == 'json':
-                json.dump(resultats_trouves, f, indent=4)
+                _magasin_resultats.exporter_json(f)
             elif output_format == 'csv':
-                if not resultats_trouves: return
-                fieldnames = resultats_trouves[0].keys()
-                writer = csv.DictWriter(f, fieldnames=fieldnames)
-                writer.writeheader()
-                writer.writerows(resultats_trouves)
+                # Union ordonnée des champs : certains modes ajoutent 'offset'
+                _magasin_resultats.exporter_csv(f)
         print("[+] Enregistrement terminé.")
     except IOError as e:
         print(f"[!] Erreur lors de l'écriture du fichier de résultats : {e}")
\ No newline at end of file
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""
+Index de déduplication des résultats, créé pour chaque scan. Une
+paire (clé, source) est réduite à une empreinte BLAKE2b : la vérification
+d'un doublon se fait en O(1), sans parcourir les résultats déjà trouvés.
+Avec une capacité maximale, un filtre de Bloom de taille fixe remplace
+l'ensemble exact et borne la mémoire, au prix de faux positifs : une paire
+nouvelle peut être prise pour un doublon et écartée. Le taux vaut
+`taux_faux_positifs` (1e-6 par défaut) tant que la capacité n'est pas
+atteinte, puis croît rapidement (environ 2e-4 à 1,5 fois la capacité, 3e-3
+au double) ; le dépassement est signalé une fois.
+"""
+import hashlib
+import math
+import threading
+from typing import Optional
+
+# --- CONSTANTES ---
+TAUX_FAUX_POSITIFS_DEFAUT = 1e-6
+# Environ 3,6 Mo de bits au taux par défaut ; au-delà, le taux de faux positifs augmente
+CAPACITE_BLOOM_DEFAUT = 1000000
+
+
+def empreinte_resultat(cle: str, source: str) -> bytes:
+    """Empreinte de 16 octets d'une paire (clé, source)."""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(cle.encode('utf-8', errors='surrogatepass'))
+    h.update(b"\0")
+    h.update(source.encode('utf-8', errors='surrogatepass'))
+    return h.digest()
+
+
+class FiltreBloom:
+    """Filtre de Bloom dimensionné pour `capacite` éléments et un taux de faux positifs donné."""
+
+    def __init__(self, capacite: int, taux_faux_positifs: float = TAUX_FAUX_POSITIFS_DEFAUT):
+        capacite = max(1, capacite)
+        self.nb_bits = max(8, int(-capacite * math.log(taux_faux_positifs) / (math.log(2) ** 2)))
+        self.nb_hachages = max(1, round(self.nb_bits / capacite * math.log(2)))
+        self.bits = bytearray((self.nb_bits + 7) // 8)
+        self.capacite = capacite
+        self.elements = 0
+
+    def taux_estime(self) -> float:
+        """Taux de faux positifs attendu pour le nombre d'éléments déjà ajoutés."""
+        return (1 - math.exp(-self.nb_hachages * self.elements / self.nb_bits)) ** self.nb_hachages
+
+    def _positions(self, empreinte: bytes):
+        # Double hachage (Kirsch-Mitzenmacher) à partir des deux moitiés de l'empreinte
+        h1 = int.from_bytes(empreinte[:8], 'little')
+        h2 = int.from_bytes(empreinte[8:], 'little') | 1
+        return [(h1 + i * h2) % self.nb_bits for i in range(self.nb_hachages)]
+
+    def ajouter(self, empreinte: bytes) -> bool:
+        """Ajoute l'empreinte ; retourne False si elle était (probablement) déjà présente."""
+        nouveau = False
+        for position in self._positions(empreinte):
+            octet, masque = position >> 3, 1 << (position & 7)
+            if not self.bits[octet] & masque:
+                self.bits[octet] |= masque
+                nouveau = True
+        self.elements += nouveau
+        return nouveau
+
+
+class IndexDoublons:
+    """
+    Ensemble thread-safe des paires (clé, source) déjà rapportées.
+
+    Sans `capacite_max`, les empreintes sont conservées dans un ensemble
+    (8 octets utiles par entrée, aucun faux positif). Avec `capacite_max`,
+    un `FiltreBloom` de taille fixe est utilisé ; au-delà de `capacite_max`
+    paires, un avertissement indique le taux de faux positifs qui augmente.
+    """
+
+    def __init__(self, capacite_max: Optional[int] = None, taux_faux_positifs: float = TAUX_FAUX_POSITIFS_DEFAUT):
+        self._lock = threading.Lock()
+        self._bloom = FiltreBloom(capacite_max, taux_faux_positifs) if capacite_max else None
+        self._vus = set()
+        self.sature = False
+
+    def ajouter(self, cle: str, source: str) -> bool:
+        """Enregistre la paire ; retourne True si elle n'avait jamais été vue."""
+        empreinte = empreinte_resultat(cle, source)
+        with self._lock:
+            if self._bloom is not None:
+                nouveau = self._bloom.ajouter(empreinte)
+                if not self.sature and self._bloom.elements > self._bloom.capacite:
+                    self.sature = True
+                    print(f"\n[!] Index de doublons saturé ({self._bloom.capacite} paires) : des résultats nouveaux peuvent être écartés comme doublons, "
+                          f"avec un taux qui augmente (actuellement {self._bloom.taux_estime():.1e}). Augmentez la capacité pour les gros scans.")
+                return nouveau
+            valeur = int.from_bytes(empreinte[:8], 'little')
+            if valeur in self._vus:
+                return False
+            self._vus.add(valeur)
+            return True
+
+    def vider(self):
+        with self._lock:
+            self._vus.clear()
+            if self._bloom is not None:
+                self._bloom.bits = bytearray(len(self._bloom.bits))
+                self._bloom.elements = 0
+            self.sature = False
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+"""
+Calcul de l'entropie de Shannon. Les candidats d'un fichier sont évalués par
+lots : avec NumPy, les histogrammes de tout le lot sont obtenus par un seul
+`bincount` sur les octets concaténés (indice de ligne * 256 + octet), puis
+les termes -p·log2(p) des cases non nulles sont sommés par ligne avec un
+second `bincount`. Sans NumPy, un `Counter` par candidat est utilisé.
+
+Pour les jetons plus longs qu'une fenêtre, `fenetre_entropie_max` fait
+glisser une fenêtre de taille fixe W en maintenant l'histogramme et la somme
+S = Σ c·log2(c) : l'entropie de la fenêtre vaut log2(W) - S/W et chaque pas
+ne modifie que deux termes de S, soit une mise à jour en O(1).
+"""
+import functools
+import math
+import string
+from collections import Counter
+from typing import Dict, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# --- CONSTANTES ---
+# En dessous de cette taille, le coût de préparation NumPy dépasse le gain
+TAILLE_MIN_LOT_NUMPY = 16
+
+# Alphabets reconnus, du plus spécifique au plus large (premier alphabet qui contient tout le candidat)
+ALPHABETS = (
+    ("digits", string.digits),
+    ("hex", string.hexdigits),
+    ("alnum", string.ascii_letters + string.digits),
+    ("base64", string.ascii_letters + string.digits + "+/="),
+    ("base64url", string.ascii_letters + string.digits + "-_="),
+)
+# Tables précalculées pour bytes.translate : un candidat appartient à l'alphabet
+# si la suppression de tous les octets de l'alphabet ne laisse rien
+_TABLES_ALPHABETS = tuple((nom, alphabet.encode('ascii')) for nom, alphabet in ALPHABETS)
+# Une chaîne hexadécimale aléatoire plafonne vers 4 bits, une chaîne base64 vers 6 bits.
+# Une suite de chiffres plafonne à log2(10) ≈ 3.32 : le seuil par défaut, au-delà, écarte
+# les identifiants numériques. Un candidat de n caractères plafonne aussi à log2(n) : les
+# seuils base64 (4.5) ne sont atteignables qu'à partir de 23 caractères.
+SEUILS_ALPHABET_DEFAUT = {"digits": 3.4, "hex": 3.0, "alnum": 4.2, "base64": 4.5, "base64url": 4.5}
+
+
+def calculer_entropie(s) -> float:
+    """Entropie de Shannon (bits par symbole) d'une chaîne ou d'une suite d'octets."""
+    if not s:
+        return 0.0
+    longueur = len(s)
+    entropie = 0.0
+    for compte in Counter(s).values():
+        p = compte / longueur
+        entropie -= p * math.log2(p)
+    return entropie
+
+
+def classer_alphabet(candidat: bytes) -> Optional[str]:
+    """Nom du plus petit alphabet de ALPHABETS contenant tout le candidat, sinon None."""
+    for nom, octets in _TABLES_ALPHABETS:
+        if not candidat.translate(None, octets):
+            return nom
+    return None
+
+
+def seuil_candidat(candidat: bytes, seuil_defaut: float, seuils_alphabet: Optional[Dict[str, float]]) -> Tuple[Optional[str], float]:
+    """
+    Retourne (alphabet, seuil) applicable au candidat ; `seuil_defaut` hors alphabet connu.
+
+    Le seuil n'est pas ajusté à la longueur : un candidat de n caractères ne
+    dépasse jamais log2(n) bits, quel que soit son alphabet.
+    """
+    if not seuils_alphabet:
+        return None, seuil_defaut
+    alphabet = classer_alphabet(candidat)
+    return alphabet, seuils_alphabet.get(alphabet, seuil_defaut)
+
+
+def entropies_lot(candidats: Sequence[bytes]) -> List[float]:
+    """Entropie de chaque candidat (bytes) d'un lot, vectorisée si NumPy est disponible."""
+    if np is None or len(candidats) < TAILLE_MIN_LOT_NUMPY:
+        return [calculer_entropie(c) for c in candidats]
+    longueurs = np.fromiter((len(c) for c in candidats), dtype=np.int64, count=len(candidats))
+    octets = np.frombuffer(b"".join(candidats), dtype=np.uint8)
+    lignes = np.repeat(np.arange(len(candidats), dtype=np.int64), longueurs)
+    comptes = np.bincount(lignes * 256 + octets, minlength=len(candidats) * 256)
+    # Seules les cases non nulles des histogrammes contribuent à l'entropie
+    cases = np.flatnonzero(comptes)
+    lignes_cases = cases >> 8
+    p = comptes[cases] / longueurs[lignes_cases]
+    return (-np.bincount(lignes_cases, weights=p * np.log2(p), minlength=len(candidats))).tolist()
+
+
+@functools.lru_cache(maxsize=16)
+def _table_clog(fenetre: int) -> Tuple[float, ...]:
+    """c·log2(c) pour c = 0..fenetre."""
+    return (0.0,) + tuple(c * math.log2(c) for c in range(1, fenetre + 1))
+
+
+def fenetre_entropie_max(jeton: bytes, fenetre: int) -> Tuple[int, int, float]:
+    """
+    Retourne (debut, fin, entropie) de la fenêtre d'entropie maximale du jeton.
+
+    Un jeton plus court que `fenetre` est évalué en entier.
+    """
+    if fenetre < 1:
+        raise ValueError(f"fenêtre invalide : {fenetre}")
+    if len(jeton) <= fenetre:
+        return 0, len(jeton), calculer_entropie(jeton)
+    table = _table_clog(fenetre)
+    comptes = [0] * 256
+    for octet in jeton[:fenetre]:
+        comptes[octet] += 1
+    somme = sum(table[c] for c in comptes)
+    # Entropie maximale <=> somme minimale ; en cas d'égalité la première fenêtre est gardée
+    meilleure, debut = somme, 0
+    for i in range(fenetre, len(jeton)):
+        sortant, entrant = jeton[i - fenetre], jeton[i]
+        if sortant == entrant:
+            continue
+        c = comptes[sortant]
+        somme += table[c - 1] - table[c]
+        comptes[sortant] = c - 1
+        c = comptes[entrant]
+        somme += table[c + 1] - table[c]
+        comptes[entrant] = c + 1
+        if somme < meilleure - 1e-9:
+            meilleure, debut = somme, i - fenetre + 1
+    return debut, debut + fenetre, math.log2(fenetre) - meilleure / fenetre
@@ -0,0 +1,237 @@
+# -*- coding: utf-8 -*-
+"""
+Stockage persistant des résultats de scan (SQLite, mode WAL). Les résultats
+sont insérés par lots depuis les threads de scan et relus par curseur :
+aucune liste de résultats n'est conservée en mémoire, quel que soit leur
+nombre. Chaque instance correspond à une session (un lancement de l'outil)
+et peut être interrogée par service, source et validité. Les résultats
+enregistrés avant vérification (`is_valid` à NULL) sont regroupés par paire
+(service, clé) pour que chaque clé ne soit vérifiée qu'une fois.
+
+Les clés y sont en clair : le fichier est créé lisible par son seul
+propriétaire (0600), les sessions de scan les plus anciennes sont purgées
+à l'ouverture d'une nouvelle session (`sessions_conservees`) et une base
+temporaire, supprimée à la fermeture, peut remplacer le fichier partagé.
+"""
+import csv
+import json
+import os
+import sqlite3
+import tempfile
+import textwrap
+import threading
+import time
+import uuid
+from typing import Dict, Iterator, List, Optional
+
+from . import DOSSIER_STOCKAGE
+
+# --- CONSTANTES ---
+CHEMIN_RESULTATS_DEFAUT = os.path.join(DOSSIER_STOCKAGE, "findings.sqlite3")
+# Sessions de scan conservées (la session courante comprise) ; les autres sont purgées
+SESSIONS_CONSERVEES_DEFAUT = 1
+# Seules les sessions nommées automatiquement sont purgées (pas celle des expositions, par ex.)
+PREFIXE_SESSION_SCAN = "scan-"
+LOT_ECRITURE = 500
+# Champs stockés dans des colonnes dédiées, dans l'ordre des exports
+CHAMPS = ("timestamp", "service", "key", "is_valid", "source_type", "source_info", "offset")
+
+
+def _creer_fichier_prive(chemin: str):
+    """Crée le fichier s'il n'existe pas et le restreint à son propriétaire."""
+    os.close(os.open(chemin, os.O_CREAT | os.O_WRONLY, 0o600))
+    try:
+        os.chmod(chemin, 0o600)
+    except OSError:
+        pass
+
+
+class FindingsStore:
+    """
+    Résultats d'une session de scan, persistés dans une base SQLite partagée.
+
+    Avec `chemin_db` à None, la base est un fichier temporaire supprimé par
+    `fermer` : rien ne reste sur disque. Avec `sessions_conservees`, seules
+    les N sessions de scan les plus récentes sont gardées.
+    """
+
+    def __init__(self, chemin_db: Optional[str] = CHEMIN_RESULTATS_DEFAUT, session: Optional[str] = None, sessions_conservees: Optional[int] = None):
+        self.temporaire = chemin_db is None
+        if self.temporaire:
+            # mkstemp crée le fichier en 0600
+            descripteur, chemin_db = tempfile.mkstemp(prefix="findings-", suffix=".sqlite3")
+            os.close(descripteur)
+        else:
+            dossier = os.path.dirname(chemin_db)
+            if dossier:
+                os.makedirs(dossier, exist_ok=True)
+            _creer_fichier_prive(chemin_db)
+        self.chemin_db = chemin_db
+        self.session = session or PREFIXE_SESSION_SCAN + time.strftime("%Y%m%dT%H%M%S") + "-" + uuid.uuid4().hex[:8]
+        self._lock = threading.Lock()
+        self._en_attente = []
+        # Une seule connexion, partagée entre threads sous le verrou
+        self.connexion = sqlite3.connect(chemin_db, check_same_thread=False)
+        # Les clés supprimées sont écrasées, pas seulement libérées dans le fichier
+        self.connexion.execute("PRAGMA secure_delete=ON")
+        self.connexion.execute("PRAGMA journal_mode=WAL")
+        self.connexion.execute("PRAGMA synchronous=NORMAL")
+        self.connexion.execute(
+            "CREATE TABLE IF NOT EXISTS resultats ("
+            "id INTEGER PRIMARY KEY, session TEXT, timestamp TEXT, service TEXT, key TEXT, is_valid INTEGER, "
+            "source_type TEXT, source_info TEXT, offset INTEGER, extra TEXT)"
+        )
+        self.connexion.execute("CREATE INDEX IF NOT EXISTS idx_resultats_service ON resultats (session, service)")
+        self.connexion.execute("CREATE INDEX IF NOT EXISTS idx_resultats_source ON resultats (session, source_info)")
+        self.connexion.execute("CREATE INDEX IF NOT EXISTS idx_resultats_valide ON resultats (session, is_valid)")
+        self.connexion.execute("CREATE INDEX IF NOT EXISTS idx_resultats_cle ON resultats (session, key)")
+        self.connexion.commit()
+        if sessions_conservees is not None:
+            self.purger_sessions(sessions_conservees)
+
+    def ajouter(self, resultat: dict):
+        """Met un résultat en attente ; l'écriture se fait par lots de LOT_ECRITURE."""
+        extra = {k: v for k, v in resultat.items() if k not in CHAMPS}
+        ligne = (self.session,) + tuple(resultat.get(champ) for champ in CHAMPS) + (json.dumps(extra) if extra else None,)
+        with self._lock:
+            self._en_attente.append(ligne)
+            if len(self._en_attente) >= LOT_ECRITURE:
+                self._vider()
+
+    def ajouter_lot(self, resultats: List[dict]):
+        """Ajoute plusieurs résultats puis les écrit immédiatement."""
+        for resultat in resultats:
+            self.ajouter(resultat)
+        self.vider()
+
+    def _vider(self):
+        if self._en_attente:
+            with self.connexion:
+                self.connexion.executemany("INSERT INTO resultats (session, " + ", ".join(CHAMPS) + ", extra) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", self._en_attente)
+            self._en_attente = []
+
+    def vider(self):
+        """Écrit les résultats encore en attente."""
+        with self._lock:
+            self._vider()
+
+    def _filtres(self, service: Optional[str], source: Optional[str], est_valide: Optional[bool], cle: Optional[str] = None):
+        clauses, parametres = ["session = ?"], [self.session]
+        if cle is not None:
+            clauses.append("key = ?")
+            parametres.append(cle)
+        if service is not None:
+            clauses.append("service = ?")
+            parametres.append(service)
+        if source is not None:
+            clauses.append("source_info = ?")
+            parametres.append(source)
+        if est_valide is not None:
+            clauses.append("is_valid = ?")
+            parametres.append(int(est_valide))
+        return " AND ".join(clauses), parametres
+
+    def compter(self, service: Optional[str] = None, source: Optional[str] = None, est_valide: Optional[bool] = None, cle: Optional[str] = None) -> int:
+        """Nombre de résultats de la session correspondant aux filtres."""
+        where, parametres = self._filtres(service, source, est_valide, cle)
+        with self._lock:
+            self._vider()
+            return self.connexion.execute(f"SELECT COUNT(*) FROM resultats WHERE {where}", parametres).fetchone()[0]
+
+    def iterer(self, service: Optional[str] = None, source: Optional[str] = None, est_valide: Optional[bool] = None) -> Iterator[Dict]:
+        """Génère les résultats de la session (dans l'ordre d'insertion) sans les charger tous."""
+        where, parametres = self._filtres(service, source, est_valide)
+        self.vider()
+        # Curseur sur une connexion dédiée : les insertions concurrentes ne sont pas bloquées
+        lecture = sqlite3.connect(self.chemin_db)
+        try:
+            curseur = lecture.execute(f"SELECT {', '.join(CHAMPS)}, extra FROM resultats WHERE {where} ORDER BY id", parametres)
+            for ligne in curseur:
+                resultat = {champ: valeur for champ, valeur in zip(CHAMPS, ligne) if not (champ == "offset" and valeur is None)}
+                if resultat["is_valid"] is not None:
+                    resultat["is_valid"] = bool(resultat["is_valid"])
+                if ligne[-1]:
+                    resultat.update(json.loads(ligne[-1]))
+                yield resultat
+        finally:
+            lecture.close()
+
+    def compter_paires_non_verifiees(self) -> int:
+        """Nombre de paires (service, clé) distinctes dont la validité n'est pas encore connue."""
+        with self._lock:
+            self._vider()
+            return self.connexion.execute(
+                "SELECT COUNT(*) FROM (SELECT DISTINCT service, key FROM resultats WHERE session = ? AND is_valid IS NULL)", (self.session,)
+            ).fetchone()[0]
+
+    def paires_non_verifiees(self) -> Iterator[tuple]:
+        """Génère (service, clé, occurrences) pour chaque paire encore non vérifiée de la session."""
+        self.vider()
+        lecture = sqlite3.connect(self.chemin_db)
+        try:
+            yield from lecture.execute(
+                "SELECT service, key, COUNT(*) FROM resultats WHERE session = ? AND is_valid IS NULL GROUP BY service, key ORDER BY MIN(id)", (self.session,)
+            )
+        finally:
+            lecture.close()
+
+    def marquer_validite(self, service: str, cle: str, est_valide: bool) -> int:
+        """Enregistre le résultat de la vérification sur toutes les occurrences de la paire ; retourne leur nombre."""
+        with self._lock:
+            self._vider()
+            with self.connexion:
+                return self.connexion.execute(
+                    "UPDATE resultats SET is_valid = ? WHERE session = ? AND service = ? AND key = ? AND is_valid IS NULL",
+                    (int(bool(est_valide)), self.session, service, cle),
+                ).rowcount
+
+    def purger_sessions(self, conserver: int) -> int:
+        """Supprime les sessions de scan au-delà des `conserver` plus récentes (la session courante comprise) ; retourne leur nombre."""
+        with self._lock:
+            self._vider()
+            sessions = self.connexion.execute(
+                "SELECT session FROM resultats WHERE session LIKE ? AND session != ? GROUP BY session ORDER BY MAX(id) DESC",
+                (PREFIXE_SESSION_SCAN + "%", self.session),
+            ).fetchall()
+            anciennes = sessions[max(0, conserver - 1):]
+            with self.connexion:
+                self.connexion.executemany("DELETE FROM resultats WHERE session = ?", anciennes)
+        return len(anciennes)
+
+    def effacer(self):
+        """Supprime tous les résultats de la session."""
+        with self._lock:
+            self._en_attente = []
+            with self.connexion:
+                self.connexion.execute("DELETE FROM resultats WHERE session = ?", (self.session,))
+
+    def exporter_json(self, f, **filtres):
+        """Écrit les résultats en JSON (même format que json.dump(..., indent=4)), un par un."""
+        premier = True
+        f.write("[")
+        for resultat in self.iterer(**filtres):
+            f.write("\n" if premier else ",\n")
+            f.write(textwrap.indent(json.dumps(resultat, indent=4), "    "))
+            premier = False
+        f.write("]" if premier else "\n]")
+
+    def exporter_csv(self, f, **filtres):
+        """Écrit les résultats en CSV ; les colonnes sont l'union ordonnée des champs présents."""
+        # Première passe pour les colonnes, seconde pour les lignes : la mémoire reste constante
+        fieldnames = {}
+        for resultat in self.iterer(**filtres):
+            fieldnames.update(dict.fromkeys(resultat))
+        writer = csv.DictWriter(f, fieldnames=list(fieldnames))
+        writer.writeheader()
+        writer.writerows(self.iterer(**filtres))
+
+    def fermer(self):
+        self.vider()
+        with self._lock:
+            self.connexion.close()
+        if self.temporaire:
+            for suffixe in ("", "-wal", "-shm"):
+                try:
+                    os.remove(self.chemin_db + suffixe)
+                except OSError:
+                    pass
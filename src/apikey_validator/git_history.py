@@ -0,0 +1,473 @@
+# -*- coding: utf-8 -*-
+"""
+Outils pour le scan de l'historique Git. Un "watermark" mémorise, par dépôt
+et par ensemble de patterns, les sommets (refs) déjà analysés : les scans
+suivants ne parcourent que les commits qui n'en sont pas accessibles, via
+`rev-list --all --not <sommets>`. Les patchs et les blobs sont lus par deux
+processus git persistants (`git log -p` et `git cat-file --batch`)
+plutôt qu'un sous-processus et des objets diff Python par commit.
+"""
+import bisect
+import difflib
+import hashlib
+import os
+import re
+import sqlite3
+import subprocess
+import tempfile
+import threading
+from typing import Iterator, List, Optional, Tuple
+
+from . import DOSSIER_STOCKAGE
+from .streaming import TAILLE_BLOC, decoder_match, rechercher_dans_flux
+
+# --- CONSTANTES ---
+CHEMIN_WATERMARKS_DEFAUT = os.path.join(DOSSIER_STOCKAGE, "git_watermarks.sqlite3")
+CHEMIN_MIROIRS_DEFAUT = os.path.join(DOSSIER_STOCKAGE, "git_mirrors")
+
+
+class ErreurParcoursGit(Exception):
+    """Un processus git a échoué ou un objet manque : l'historique n'a pas été lu entièrement."""
+
+
+class GitWatermark:
+    """Sommets de l'historique déjà scannés pour un dépôt et un ensemble de patterns."""
+
+    def __init__(self, chemin_db: str, cle_depot: str, empreinte_patterns: str):
+        dossier = os.path.dirname(chemin_db)
+        if dossier:
+            os.makedirs(dossier, exist_ok=True)
+        self.cle_depot = cle_depot
+        self.empreinte_patterns = empreinte_patterns
+        self.connexion = sqlite3.connect(chemin_db)
+        self.connexion.execute(
+            "CREATE TABLE IF NOT EXISTS watermarks ("
+            "depot TEXT, patterns TEXT, sommet TEXT, PRIMARY KEY (depot, patterns, sommet))"
+        )
+        self.connexion.commit()
+
+    def sommets_scannes(self) -> List[str]:
+        """Retourne les SHA dont tout l'historique accessible a déjà été scanné."""
+        lignes = self.connexion.execute(
+            "SELECT sommet FROM watermarks WHERE depot = ? AND patterns = ?",
+            (self.cle_depot, self.empreinte_patterns),
+        ).fetchall()
+        return [ligne[0] for ligne in lignes]
+
+    def enregistrer(self, sommets: List[str]):
+        """Remplace les sommets mémorisés par ceux d'un scan terminé."""
+        with self.connexion:
+            self.connexion.execute(
+                "DELETE FROM watermarks WHERE depot = ? AND patterns = ?",
+                (self.cle_depot, self.empreinte_patterns),
+            )
+            self.connexion.executemany(
+                "INSERT OR IGNORE INTO watermarks VALUES (?, ?, ?)",
+                [(self.cle_depot, self.empreinte_patterns, sommet) for sommet in sommets],
+            )
+
+    def fermer(self):
+        self.connexion.close()
+
+
+def chemin_miroir(dossier_miroirs: str, repo_url: str) -> str:
+    """Emplacement du miroir local d'un dépôt distant, dérivé de son URL."""
+    return os.path.join(dossier_miroirs, hashlib.sha256(repo_url.encode('utf-8')).hexdigest()[:16] + ".git")
+
+
+def arguments_rev_list(sommets_scannes: List[str]) -> List[str]:
+    """Arguments `rev-list` pour ne parcourir que les commits pas encore scannés."""
+    if not sommets_scannes:
+        return ['--all']
+    # --ignore-missing : un sommet disparu (force-push, gc) est simplement ignoré
+    return ['--all', '--ignore-missing', '--not'] + sommets_scannes
+
+
+# --- LECTURE RAPIDE DES OBJETS GIT ---
+
+MODE_SOUS_MODULE = "160000"
+# "@@ -a[,b] +c[,d] @@" : seul le début du hunk côté nouveau fichier est utile
+_ENTETE_HUNK = re.compile(rb'^@@ -\d+(?:,\d+)? \+(\d+)(?:,\d+)? @@')
+# "index <ancien>..<nouveau>[ <mode>]" (SHA complets avec --full-index, SHA-1 ou SHA-256)
+_LIGNE_INDEX = re.compile(rb'^index ([0-9a-f]{40}|[0-9a-f]{64})\.\.([0-9a-f]{40}|[0-9a-f]{64})(?: (\d+))?')
+# Échappements de quote_c_style (git) autres que les séquences octales
+_ECHAPPEMENTS_C = {ord('a'): 7, ord('b'): 8, ord('t'): 9, ord('n'): 10, ord('v'): 11, ord('f'): 12, ord('r'): 13, ord('"'): 34, ord('\\'): 92}
+
+
+def est_sha_nul(sha: str) -> bool:
+    """SHA nul (fichier absent d'un côté du diff), quel que soit l'algorithme de hachage."""
+    return not sha.strip("0")
+
+
+def decoder_chemin(brut: bytes) -> str:
+    """Décode un chemin tel qu'affiché par git, entre guillemets et échappé à la C si besoin."""
+    if len(brut) < 2 or not (brut.startswith(b'"') and brut.endswith(b'"')):
+        return brut.decode('utf-8', errors='replace')
+    octets, i, fin = bytearray(), 1, len(brut) - 1
+    while i < fin:
+        c = brut[i]
+        if c == 0x5c and i + 1 < fin:
+            suivant = brut[i + 1]
+            if 0x30 <= suivant <= 0x37:
+                octets.append(int(brut[i + 1:i + 4], 8) & 0xff)
+                i += 4
+            else:
+                octets.append(_ECHAPPEMENTS_C.get(suivant, suivant))
+                i += 2
+        else:
+            octets.append(c)
+            i += 1
+    return octets.decode('utf-8', errors='replace')
+
+
+def _chemin_entete_diff(ligne: bytes) -> str:
+    """Chemin d'une ligne `diff --git a/<p> b/<p>` (sans renommage, les deux côtés sont identiques)."""
+    corps = ligne[len(b"diff --git "):].rstrip(b"\r\n")
+    if corps.startswith(b'"'):
+        return decoder_chemin(corps[:(len(corps) - 1) // 2])[2:]
+    return corps[2:2 + (len(corps) - 5) // 2].decode('utf-8', errors='replace')
+
+
+def compter_commits(git_dir: str, arguments_rev: List[str]) -> int:
+    """Nombre de commits à parcourir, pour la progression."""
+    sortie = subprocess.run(['git', '--git-dir', git_dir, 'rev-list', '--count'] + arguments_rev, capture_output=True, check=True)
+    return int(sortie.stdout.strip() or 0)
+
+
+def lister_commits(git_dir: str, arguments_rev: List[str]) -> List[str]:
+    """SHA des commits à parcourir, dans l'ordre topologique."""
+    sortie = subprocess.run(['git', '--git-dir', git_dir, 'rev-list', '--topo-order'] + arguments_rev, capture_output=True, check=True)
+    return sortie.stdout.decode('ascii').split()
+
+
+def est_clone_partiel(git_dir: str) -> bool:
+    """Indique si le dépôt est un clone partiel (`--filter`) dont des blobs peuvent manquer."""
+    # Selon la version de git : extensions.partialclone=<remote> ou remote.<nom>.promisor=true
+    sortie = subprocess.run(['git', '--git-dir', git_dir, 'config', '--get-regexp', r'^(extensions\.partialclone|remote\..*\.promisor)$'],
+                            capture_output=True)
+    return any(valeur not in (b"", b"false") for _, _, valeur in (ligne.partition(b" ") for ligne in sortie.stdout.splitlines()))
+
+
+def est_superficiel(git_dir: str) -> bool:
+    """Indique si le dépôt est un clone superficiel (`--depth`, `--shallow-since`) dont l'historique est tronqué."""
+    sortie = subprocess.run(['git', '--git-dir', git_dir, 'rev-parse', '--is-shallow-repository'], capture_output=True)
+    return sortie.stdout.strip() == b"true"
+
+
+def lister_blobs_absents(git_dir: str) -> set:
+    """SHA des objets référencés mais absents localement (exclus par le filtre du clone)."""
+    sortie = subprocess.run(['git', '--git-dir', git_dir, 'rev-list', '--objects', '--all', '--missing=print', '--no-object-names'],
+                            capture_output=True, check=True)
+    return {ligne[1:] for ligne in sortie.stdout.decode('ascii').split() if ligne.startswith("?")}
+
+
+def _lignes_log(git_dir: str, arguments_rev: List[str], commits: Optional[List[str]] = None, patchs: bool = True) -> Iterator[bytes]:
+    """
+    Génère les lignes de `git log -p -U0 --full-index` produites par un seul processus.
+
+    Chaque commit est comparé à son premier parent (ou à l'arbre vide pour un
+    commit racine), sans contexte autour des hunks. Les commits sont parcourus
+    dans l'ordre topologique, comme `lister_commits` ; si `commits` est
+    fourni, seuls ces commits sont lus, dans cet ordre (via `--no-walk --stdin`). Sans `patchs`, seules
+    les entrées `--raw` sont produites : aucun blob n'est lu par git.
+    """
+    commande = ['git', '--git-dir', git_dir, '-c', 'core.quotepath=off', 'log'] + (['-p', '-U0', '--full-index'] if patchs else ['--raw']) + [
+                '--no-abbrev', '--no-renames', '--no-color', '--no-ext-diff', '--no-textconv',
+                '--diff-merges=first-parent', '--root', '--format=%x01%H']
+    if commits is not None:
+        commande += ['--no-walk=unsorted', '--stdin']
+    else:
+        commande += ['--topo-order'] + arguments_rev
+    # Erreurs dans un fichier temporaire : un tube non lu pourrait bloquer git
+    erreurs = tempfile.TemporaryFile()
+    processus = subprocess.Popen(commande, stdin=subprocess.PIPE if commits is not None else subprocess.DEVNULL,
+                                 stdout=subprocess.PIPE, stderr=erreurs)
+    if commits is not None:
+        # Écriture dans un thread pour ne pas bloquer si git remplit sa sortie d'abord
+        def ecrire():
+            try:
+                processus.stdin.write("".join(f"{sha}\n" for sha in commits).encode('ascii'))
+                processus.stdin.close()
+            except (BrokenPipeError, OSError):
+                pass
+        threading.Thread(target=ecrire, daemon=True).start()
+    try:
+        yield from processus.stdout
+        # Flux terminé : un code non nul signifie que git s'est arrêté avant la fin (dépôt corrompu, objet manquant)
+        if processus.wait():
+            erreurs.seek(0)
+            raise ErreurParcoursGit(f"git log a échoué (code {processus.returncode}) : {erreurs.read().decode('utf-8', errors='replace').strip()}")
+    finally:
+        processus.stdout.close()
+        if processus.poll() is None:
+            processus.kill()
+        processus.wait()
+        erreurs.close()
+
+
+class _FluxBlob:
+    """Vue fichier (lecture seule) sur un blob en cours de lecture dans `cat-file --batch`."""
+
+    def __init__(self, flux, taille: int):
+        self._flux = flux
+        self.restant = taille
+
+    def read(self, n: int = -1) -> bytes:
+        if self.restant <= 0:
+            return b""
+        if n < 0 or n > self.restant:
+            n = self.restant
+        donnees = self._flux.read(n)
+        self.restant -= len(donnees)
+        return donnees
+
+
+class LecteurObjetsGit:
+    """
+    Processus `git cat-file --batch` persistant pour lire les blobs.
+
+    Le contenu est exposé en flux (`read(n)`) : un blob volumineux est lu
+    par blocs, jamais chargé entièrement en mémoire.
+    """
+
+    def __init__(self, git_dir: str):
+        self._erreurs = tempfile.TemporaryFile()
+        self.processus = subprocess.Popen(['git', '--git-dir', git_dir, 'cat-file', '--batch'],
+                                          stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=self._erreurs)
+        self._courant = None
+
+    def ouvrir(self, sha: str):
+        """Retourne un flux sur le contenu du blob `sha`, ou None s'il est introuvable."""
+        self._terminer_courant()
+        try:
+            self.processus.stdin.write(sha.encode('ascii') + b"\n")
+            self.processus.stdin.flush()
+            entete = self.processus.stdout.readline().split()
+        except (BrokenPipeError, OSError):
+            entete = []
+        if not entete:
+            # Processus arrêté : plus aucun blob ne pourra être lu
+            self.processus.wait()
+            self._erreurs.seek(0)
+            raise ErreurParcoursGit(f"git cat-file a échoué (code {self.processus.returncode}) : {self._erreurs.read().decode('utf-8', errors='replace').strip()}")
+        if len(entete) != 3 or entete[1] != b"blob":
+            # "<sha> missing" : aucun contenu ne suit
+            return None
+        self._courant = _FluxBlob(self.processus.stdout, int(entete[2]))
+        return self._courant
+
+    def _terminer_courant(self):
+        # Consomme la fin du blob précédent et le saut de ligne final
+        if self._courant is not None:
+            while self._courant.read(1 << 16):
+                pass
+            self.processus.stdout.read(1)
+            self._courant = None
+
+    def fermer(self):
+        try:
+            self.processus.stdin.close()
+        except (BrokenPipeError, OSError):
+            pass
+        self.processus.stdout.close()
+        self.processus.wait()
+        self._erreurs.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fermer()
+
+
+class _FichierDiff:
+    """État de lecture du patch d'un fichier dans la sortie de `git log`."""
+
+    __slots__ = ("chemin", "cle", "a_scanner", "binaire", "dans_hunk", "ligne_courante", "lignes", "taille", "trouvailles")
+
+    def __init__(self, chemin: str, cle: bytes, a_scanner: bool):
+        self.chemin = chemin
+        self.cle = cle
+        self.a_scanner = a_scanner
+        self.binaire = False
+        self.dans_hunk = False
+        self.ligne_courante = 0
+        self.lignes = []
+        self.taille = 0
+        self.trouvailles = []
+
+
+class ScannerHistorique:
+    """
+    Scanne les lignes ajoutées par des commits successifs.
+
+    Seules les lignes `+` des hunks sont évaluées, avec leur numéro de ligne
+    dans la nouvelle version du fichier : un secret déjà présent n'est pas
+    rapporté à nouveau par chaque commit qui modifie le fichier. Chaque paire
+    (blob avant, blob après) n'est analysée qu'une fois et ses correspondances
+    sont attribuées à chaque (commit, fichier) qui l'introduit. Les fichiers
+    binaires, sans patch texte, sont lus entièrement via `cat-file --batch`.
+
+    Dans un clone partiel, `git log -p` irait chercher un à un les blobs
+    absents auprès du dépôt distant : seules les entrées `--raw` sont alors
+    lues, les lignes ajoutées sont calculées localement (difflib) et les blobs
+    exclus par le filtre sont ignorés et comptés dans `blobs_ignores`.
+    """
+
+    def __init__(self, git_dir: str, matcher, blobs_absents: Optional[set] = None):
+        self.git_dir = git_dir
+        self.matcher = matcher
+        self.lecteur = LecteurObjetsGit(git_dir)
+        self.paires_vues = set()
+        self.trouvailles_par_paire = {}
+        self.partiel = est_clone_partiel(git_dir)
+        # Fourni par l'appelant quand plusieurs scanners partagent le même dépôt
+        if blobs_absents is None:
+            blobs_absents = lister_blobs_absents(git_dir) if self.partiel else set()
+        self.blobs_absents = blobs_absents
+        self.blobs_ignores = 0
+
+    def parcourir(self, arguments_rev: List[str], commits: Optional[List[str]] = None) -> Iterator[Tuple[str, List[Tuple[str, list]]]]:
+        """
+        Génère (sha_commit, [(chemin, trouvailles), ...]) pour chaque commit.
+
+        Les trouvailles sont des tuples (service, ligne, offset, cle) ; `ligne`
+        vaut None pour un fichier binaire, `offset` pour un patch texte.
+        """
+        commit, resultats, fichier = None, [], None
+        # Section de patch en cours dont l'en-tête (ligne `index`) n'a pas encore été lu
+        chemin_section, mode_section = None, None
+        for ligne in _lignes_log(self.git_dir, arguments_rev, commits, patchs=not self.partiel):
+            if ligne.startswith(b"\x01"):
+                self._terminer_fichier(fichier, resultats)
+                if commit is not None:
+                    yield commit, resultats
+                commit, resultats, fichier, chemin_section = ligne[1:].strip().decode('ascii'), [], None, None
+            elif ligne.startswith(b":") and self.partiel:
+                self._scanner_sans_patch(self._ouvrir_entree_raw(ligne), resultats)
+            elif ligne.startswith(b"diff --git "):
+                # Chaque section porte son propre chemin et ses blobs : un changement de type en produit deux
+                self._terminer_fichier(fichier, resultats)
+                fichier, chemin_section, mode_section = None, _chemin_entete_diff(ligne), None
+            elif chemin_section is not None:
+                if ligne.startswith((b"new file mode ", b"new mode ")):
+                    mode_section = ligne.split()[-1].decode('ascii')
+                elif ligne.startswith(b"index "):
+                    index = _LIGNE_INDEX.match(ligne)
+                    if not index:
+                        raise ErreurParcoursGit(f"ligne d'en-tête non reconnue pour '{chemin_section}' : {ligne.strip().decode('ascii', errors='replace')}")
+                    mode = index.group(3).decode('ascii') if index.group(3) else mode_section
+                    fichier = self._ouvrir_fichier(chemin_section, index.group(1).decode('ascii'), index.group(2).decode('ascii'), mode)
+                    chemin_section = None
+            elif fichier is not None:
+                self._ajouter_ligne(fichier, ligne)
+        self._terminer_fichier(fichier, resultats)
+        if commit is not None:
+            yield commit, resultats
+
+    def _ouvrir_entree_raw(self, entree: bytes) -> _FichierDiff:
+        meta, _, chemin = entree[1:].rstrip(b"\n").partition(b"\t")
+        _, nouveau_mode, sha_ancien, sha_nouveau, statut = meta.decode('ascii').split()
+        if statut[0] not in "AMT":
+            sha_nouveau = "0" * len(sha_nouveau)
+        return self._ouvrir_fichier(decoder_chemin(chemin), sha_ancien, sha_nouveau, nouveau_mode)
+
+    def _ouvrir_fichier(self, chemin: str, sha_ancien: str, sha_nouveau: str, nouveau_mode: Optional[str]) -> _FichierDiff:
+        cle = bytes.fromhex(sha_ancien + sha_nouveau)
+        a_scanner = not est_sha_nul(sha_nouveau) and nouveau_mode != MODE_SOUS_MODULE
+        if cle in self.paires_vues:
+            a_scanner = False
+        fichier = _FichierDiff(chemin, cle, a_scanner)
+        if a_scanner:
+            self.paires_vues.add(cle)
+        return fichier
+
+    def _ajouter_ligne(self, fichier: _FichierDiff, ligne: bytes):
+        if ligne.startswith(b"@@"):
+            entete = _ENTETE_HUNK.match(ligne)
+            if entete:
+                fichier.dans_hunk = True
+                fichier.ligne_courante = int(entete.group(1))
+        elif not fichier.dans_hunk:
+            if ligne.startswith(b"Binary files "):
+                fichier.binaire = True
+        elif ligne.startswith(b"+"):
+            if fichier.a_scanner:
+                contenu = ligne[1:].rstrip(b"\r\n")
+                fichier.lignes.append((fichier.ligne_courante, contenu))
+                fichier.taille += len(contenu) + 1
+                if fichier.taille >= TAILLE_BLOC:
+                    self._analyser_lignes(fichier)
+            fichier.ligne_courante += 1
+        elif ligne.startswith(b" "):
+            fichier.ligne_courante += 1
+
+    def _lire_blob(self, sha: str) -> Optional[bytes]:
+        """Contenu d'un blob présent localement, sans jamais déclencher de téléchargement."""
+        if est_sha_nul(sha):
+            return b""
+        if sha in self.blobs_absents:
+            return None
+        return self._ouvrir_blob(sha).read()
+
+    def _ouvrir_blob(self, sha: str):
+        """Flux d'un blob qui doit être présent : son absence signale un dépôt corrompu."""
+        flux = self.lecteur.ouvrir(sha)
+        if flux is None:
+            raise ErreurParcoursGit(f"objet {sha} introuvable dans le dépôt")
+        return flux
+
+    def _scanner_sans_patch(self, fichier: _FichierDiff, resultats: list):
+        """Calcule les lignes ajoutées d'une entrée `--raw` à partir des blobs locaux."""
+        if fichier.a_scanner:
+            moitie = len(fichier.cle) // 2
+            sha_ancien, sha_nouveau = fichier.cle[:moitie].hex(), fichier.cle[moitie:].hex()
+            nouveau = self._lire_blob(sha_nouveau)
+            if nouveau is None:
+                self.blobs_ignores += 1
+                fichier.a_scanner = False
+            elif b"\0" in nouveau[:8000]:
+                # Même heuristique que git : le blob est lu entièrement
+                fichier.binaire = True
+            else:
+                # Blob précédent absent : tout le fichier est considéré comme ajouté
+                ancien = self._lire_blob(sha_ancien) or b""
+                lignes_anciennes, lignes_nouvelles = ancien.splitlines(), nouveau.splitlines()
+                comparaison = difflib.SequenceMatcher(None, lignes_anciennes, lignes_nouvelles, autojunk=False)
+                for operation, _, _, debut, fin in comparaison.get_opcodes():
+                    if operation in ("replace", "insert"):
+                        fichier.lignes.extend((numero + 1, lignes_nouvelles[numero]) for numero in range(debut, fin))
+        self._terminer_fichier(fichier, resultats)
+
+    def _analyser_lignes(self, fichier: _FichierDiff):
+        """Évalue en une passe les lignes ajoutées accumulées du fichier."""
+        if not fichier.lignes:
+            return
+        debuts, position = [], 0
+        for _, contenu in fichier.lignes:
+            debuts.append(position)
+            position += len(contenu) + 1
+        tampon = b"\n".join(contenu for _, contenu in fichier.lignes)
+        for nom_service, match in self.matcher.finditer(tampon):
+            numero = fichier.lignes[bisect.bisect_right(debuts, match.start()) - 1][0]
+            fichier.trouvailles.append((nom_service, numero, None, decoder_match(match.group(0))))
+        fichier.lignes, fichier.taille = [], 0
+
+    def _terminer_fichier(self, fichier: Optional[_FichierDiff], resultats: list):
+        if fichier is None:
+            return
+        if fichier.a_scanner:
+            if fichier.binaire:
+                sha_nouveau = fichier.cle[len(fichier.cle) // 2:].hex()
+                flux = None if sha_nouveau in self.blobs_absents else self._ouvrir_blob(sha_nouveau)
+                if flux:
+                    fichier.trouvailles = [(nom, None, offset, cle) for nom, offset, cle in rechercher_dans_flux(flux, self.matcher.finditer, self.matcher.longueur_max)]
+            else:
+                self._analyser_lignes(fichier)
+            if fichier.trouvailles:
+                self.trouvailles_par_paire[fichier.cle] = fichier.trouvailles
+        if fichier.cle in self.trouvailles_par_paire:
+            resultats.append((fichier.chemin, self.trouvailles_par_paire[fichier.cle]))
+
+    def fermer(self):
+        self.lecteur.fermer()
@@ -0,0 +1,394 @@
+# -*- coding: utf-8 -*-
+"""
+Module de détection combinée : toutes les regex de secrets sont fusionnées
+en une seule alternation à groupes nommés afin de parcourir chaque buffer
+une seule fois, quel que soit le nombre de services configurés. Les
+correspondances rapportées sont celles qu'aurait données un `finditer` par
+motif, y compris lorsque les motifs de deux services se chevauchent.
+
+Les motifs qui possèdent des mots-clés littéraux (déclarés via "keywords"
+ou extraits du motif, ex. `ghp_`, `sk-`, `AIza`) passent par un préfiltre :
+une recherche multi-motifs (Aho-Corasick) localise les mots-clés et la regex
+n'est exécutée que dans une fenêtre autour de chaque occurrence.
+"""
+import re
+
+try:
+    import re2
+except ImportError:
+    re2 = None
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+try:
+    from re import _parser as sre_parse
+except ImportError:
+    import sre_parse
+
+# Plafond appliqué aux motifs non bornés (`+`, `*`) pour le chevauchement des blocs
+LONGUEUR_MAX_NON_BORNEE = 4096
+
+# Constructions qui ne survivent pas à la fusion (références arrière numérotées
+# ou nommées, groupes nommés susceptibles d'entrer en collision).
+_MOTIF_INCOMPATIBLE = re.compile(r'\\[1-9]|\(\?P[<=]')
+# Drapeaux globaux en tête de motif, ex: (?i)
+_DRAPEAUX_GLOBAUX = re.compile(r'^\(\?([aiLmsux]+)\)')
+# Un mot-clé plus court déclencherait la regex presque partout
+LONGUEUR_MIN_MOT_CLE = 3
+
+
+def longueur_max_match(motif) -> int:
+    """Longueur maximale (en caractères) d'une correspondance, plafonnée."""
+    try:
+        largeur = sre_parse.parse(motif).getwidth()[1]
+    except Exception:
+        return LONGUEUR_MAX_NON_BORNEE
+    return min(largeur, LONGUEUR_MAX_NON_BORNEE)
+
+
+def _elements_sequence(sous_motif):
+    """Aplatit les groupes d'une séquence sre_parse : leur contenu est obligatoire."""
+    for operation, argument in sous_motif:
+        if operation is sre_parse.SUBPATTERN:
+            yield from _elements_sequence(argument[-1])
+        else:
+            yield operation, argument
+
+
+def _plus_long_litteral(sous_motif):
+    """Plus longue suite de caractères littéraux ASCII obligatoires d'une séquence."""
+    meilleur, courant = "", ""
+    for operation, argument in _elements_sequence(sous_motif):
+        if operation is sre_parse.LITERAL and argument < 128:
+            courant += chr(argument)
+            if len(courant) > len(meilleur):
+                meilleur = courant
+        else:
+            courant = ""
+    return meilleur
+
+
+def _mots_cles_sequence(sous_motif) -> list:
+    """Mots-clés d'une séquence : sa plus longue suite littérale, sinon un mot par branche d'une alternation."""
+    mot = _plus_long_litteral(sous_motif)
+    if len(mot) >= LONGUEUR_MIN_MOT_CLE:
+        return [mot]
+    for operation, argument in _elements_sequence(sous_motif):
+        if operation is sre_parse.BRANCH:
+            mots_cles = [_mots_cles_sequence(branche) for branche in argument[1]]
+            if all(mots_cles):
+                return sorted({mot for mots in mots_cles for mot in mots})
+    return []
+
+
+def extraire_mots_cles(motif) -> list:
+    """
+    Extrait du motif les littéraux dont l'un au moins figure dans toute correspondance.
+
+    Retourne une liste vide si aucun littéral assez long n'est garanti ; une
+    alternation donne un mot-clé par branche.
+    """
+    if isinstance(motif, bytes):
+        motif = motif.decode('ascii', errors='replace')
+    try:
+        return _mots_cles_sequence(sre_parse.parse(motif))
+    except Exception:
+        return []
+
+
+def compiler_version_octets(motif):
+    """Compile la version `bytes` d'un motif ASCII, ou retourne None."""
+    if isinstance(motif, bytes):
+        return re.compile(motif)
+    if not motif.isascii():
+        return None
+    try:
+        return re.compile(motif.encode('ascii'))
+    except re.error:
+        return None
+
+
+def _rendre_fusionnable(motif: str) -> str:
+    """
+    Retourne une version du motif utilisable dans une alternation, ou None.
+
+    Les drapeaux globaux (?i) sont convertis en drapeaux locaux (?i:...)
+    puisque Python refuse les drapeaux globaux ailleurs qu'en tête de motif.
+    """
+    if _MOTIF_INCOMPATIBLE.search(motif):
+        return None
+    drapeaux = _DRAPEAUX_GLOBAUX.match(motif)
+    if drapeaux:
+        if set(drapeaux.group(1)) & set("aLu"):
+            return None
+        return f"(?{drapeaux.group(1)}:{motif[drapeaux.end():]})"
+    return motif
+
+
+class _Moteur:
+    """
+    Alternation compilée pour un type de contenu donné (str ou bytes).
+
+    L'alternation ne rapporte qu'une correspondance par position et reprend
+    après elle : un autre motif qui correspond dans la portée consommée
+    serait perdu. Après chaque correspondance, les autres motifs sont donc
+    recherchés séparément dans cette portée (fenêtre bornée par leur
+    longueur maximale), et chaque motif ignore, comme son propre `finditer`,
+    les correspondances qui chevauchent sa correspondance précédente.
+    """
+
+    def __init__(self, entrees: list):
+        self.services = {}
+        # Motifs de l'alternation, dans l'ordre des groupes : (nom_service, regex, longueur_max)
+        self.fusionnes = []
+        self.separes = []
+        alternatives = []
+        en_octets = False
+        for nom_service, regex in entrees:
+            motif = regex.pattern
+            en_octets = isinstance(motif, bytes)
+            fusionnable = _rendre_fusionnable(motif.decode('ascii') if en_octets else motif)
+            if fusionnable is None:
+                self.separes.append((nom_service, regex))
+                continue
+            groupe = f"s{len(alternatives)}"
+            self.services[groupe] = len(self.fusionnes)
+            self.fusionnes.append((nom_service, regex, longueur_max_match(motif)))
+            alternatives.append(f"(?P<{groupe}>{fusionnable})")
+
+        self.combinee = None
+        self.backend = "re"
+        if alternatives:
+            source = "|".join(alternatives)
+            if en_octets:
+                source = source.encode('ascii')
+            if re2 is not None:
+                try:
+                    self.combinee = re2.compile(source)
+                    self.backend = "re2"
+                except Exception:
+                    self.combinee = None
+            if self.combinee is None:
+                try:
+                    self.combinee = re.compile(source)
+                except re.error:
+                    # Repli : chaque motif est évalué séparément
+                    self.separes = list(entrees)
+                    self.services = {}
+                    self.fusionnes = []
+
+    def __bool__(self):
+        return self.combinee is not None or bool(self.separes)
+
+    def _finditer_combinee(self, contenu):
+        # Fin de la dernière correspondance rapportée pour chaque motif
+        fins = [0] * len(self.fusionnes)
+        for match in self.combinee.finditer(contenu):
+            debut = match.start()
+            fin = max(match.end(), debut + 1)
+            indice = self.services[match.lastgroup]
+            trouvees = []
+            if debut >= fins[indice]:
+                trouvees.append((debut, indice, match))
+                fins[indice] = fin
+            for autre, (_, regex, longueur) in enumerate(self.fusionnes):
+                position = max(fins[autre], debut)
+                while position < fin:
+                    # Une correspondance qui débute avant `fin` se termine avant `fin + longueur` ; la marge couvre les assertions
+                    trouvee = regex.search(contenu, position, min(len(contenu), fin + 2 * longueur))
+                    if trouvee is None or trouvee.start() >= fin:
+                        break
+                    trouvees.append((trouvee.start(), autre, trouvee))
+                    fins[autre] = position = max(trouvee.end(), trouvee.start() + 1)
+            # De gauche à droite, puis dans l'ordre de déclaration
+            trouvees.sort(key=lambda t: (t[0], t[1]))
+            for _, autre, trouvee in trouvees:
+                yield self.fusionnes[autre][0], trouvee
+
+    def finditer(self, contenu):
+        if self.combinee is not None:
+            yield from self._finditer_combinee(contenu)
+        for nom_service, regex in self.separes:
+            for match in regex.finditer(contenu):
+                yield nom_service, match
+
+
+class PrefiltreMotsCles:
+    """
+    Évalue des regex `bytes` uniquement autour des occurrences de leurs mots-clés.
+
+    Les mots-clés sont recherchés sans tenir compte de la casse (une
+    occurrence en trop ne fait qu'élargir la recherche) en une seule passe
+    Aho-Corasick si `pyahocorasick` est installé, sinon par `bytes.find`
+    pour chaque mot-clé. Pour chaque service, les fenêtres
+    [occurrence - longueur_max, occurrence + longueur_max] sont fusionnées
+    puis la regex est exécutée sur chacune via `finditer(contenu, debut, fin)`,
+    ce qui conserve les positions absolues et la sémantique de `^` et `\\b`.
+    """
+
+    def __init__(self, entrees: list):
+        # entrees : [(nom_service, regex_octets, mots_cles, longueur_max), ...]
+        self.entrees = entrees
+        services_par_mot = {}
+        for indice, (_, _, mots_cles, _) in enumerate(entrees):
+            for mot in mots_cles:
+                services_par_mot.setdefault(mot.lower().encode('ascii'), []).append(indice)
+        self.mots = list(services_par_mot.items())
+        self.automate = None
+        if ahocorasick is not None and self.mots:
+            self.automate = ahocorasick.Automaton()
+            for mot, indices in self.mots:
+                self.automate.add_word(mot.decode('latin-1'), (len(mot), indices))
+            self.automate.make_automaton()
+
+    def __bool__(self):
+        return bool(self.entrees)
+
+    def _occurrences(self, contenu_minuscule: bytes):
+        """Génère (position, longueur_mot, indices_services) pour chaque occurrence."""
+        if self.automate is not None:
+            for fin, (longueur, indices) in self.automate.iter(contenu_minuscule.decode('latin-1')):
+                yield fin - longueur + 1, longueur, indices
+            return
+        for mot, indices in self.mots:
+            position = contenu_minuscule.find(mot)
+            while position != -1:
+                yield position, len(mot), indices
+                position = contenu_minuscule.find(mot, position + 1)
+
+    def finditer(self, contenu):
+        fenetres = {}
+        for position, longueur, indices in self._occurrences(bytes(contenu).lower()):
+            for indice in indices:
+                marge = self.entrees[indice][3]
+                fenetres.setdefault(indice, []).append((max(0, position - marge), position + longueur + marge))
+        if not fenetres:
+            # Aucun mot-clé : aucune regex n'est exécutée
+            return
+        trouvees = []
+        for indice, intervalles in fenetres.items():
+            nom_service, regex = self.entrees[indice][:2]
+            intervalles.sort()
+            debut, fin = intervalles[0]
+            for suivant_debut, suivant_fin in intervalles[1:] + [(None, None)]:
+                if suivant_debut is not None and suivant_debut <= fin:
+                    fin = max(fin, suivant_fin)
+                    continue
+                for match in regex.finditer(contenu, debut, min(fin, len(contenu))):
+                    trouvees.append((match.start(), indice, nom_service, match))
+                debut, fin = suivant_debut, suivant_fin
+        # Même ordre qu'une passe unique : de gauche à droite, puis ordre de déclaration
+        trouvees.sort(key=lambda t: (t[0], t[1]))
+        for _, _, nom_service, match in trouvees:
+            yield nom_service, match
+
+
+class _MatchEnOctets:
+    """Match obtenu sur un texte décodé, dont les positions sont ramenées en octets."""
+
+    __slots__ = ("_debut", "_fin", "_valeur")
+
+    def __init__(self, texte: str, match):
+        # surrogateescape garantit un ré-encodage identique aux octets d'origine
+        self._debut = len(texte[:match.start()].encode('utf-8', 'surrogateescape'))
+        self._valeur = match.group(0).encode('utf-8', 'surrogateescape')
+        self._fin = self._debut + len(self._valeur)
+
+    def start(self):
+        return self._debut
+
+    def end(self):
+        return self._fin
+
+    def group(self, index=0):
+        return self._valeur
+
+
+class CombinedMatcher:
+    """
+    Recherche en une passe les correspondances de tous les services.
+
+    Les motifs compatibles sont réunis dans `(?P<s0>...)|(?P<s1>...)|...`,
+    compilé avec RE2 lorsqu'il est installé, sinon avec `re`. Les motifs qui
+    ne peuvent pas être fusionnés sont conservés à part et évalués séparément.
+
+    Deux alternations sont construites : une pour le texte (`str`) et une pour
+    les octets (`bytes`, `mmap`), afin de scanner les fichiers sans les
+    décoder. Seuls les motifs non ASCII, qui n'ont pas de version octets,
+    imposent un décodage UTF-8 du contenu binaire. Sur un contenu binaire, les
+    motifs à mots-clés sont évalués par `PrefiltreMotsCles` plutôt que par
+    l'alternation.
+
+    Sémantique : chaque service rapporte les mêmes correspondances qu'un
+    `finditer` de son propre motif ; deux services dont les motifs se
+    chevauchent (ex. 32 et 40 caractères hexadécimaux) sont tous deux
+    rapportés. Les correspondances sont produites de gauche à droite, puis
+    dans l'ordre de déclaration de la configuration.
+    """
+
+    def __init__(self, patterns: dict, prefiltre: bool = True):
+        self.longueur_max = 0
+        entrees_texte, entrees_octets, texte_seulement, entrees_prefiltre = [], [], [], []
+        for nom_service, details in patterns.items():
+            regex = details["regex"]
+            longueur = longueur_max_match(regex.pattern)
+            entrees_texte.append((nom_service, regex))
+            regex_octets = details.get("regex_bytes") or compiler_version_octets(regex.pattern)
+            mots_cles = (details.get("keywords") or extraire_mots_cles(regex.pattern)) if prefiltre else None
+            if mots_cles and not all(mot.isascii() for mot in mots_cles):
+                # Une correspondance peut ne contenir que le mot-clé écarté : pas de préfiltre pour ce service
+                print(f"[!] Avertissement: mots-clés non ASCII ignorés pour le service '{nom_service}', préfiltre désactivé.")
+                mots_cles = None
+            if regex_octets is not None and mots_cles:
+                entrees_prefiltre.append((nom_service, regex_octets, mots_cles, longueur))
+            elif regex_octets is not None:
+                entrees_octets.append((nom_service, regex_octets))
+            else:
+                texte_seulement.append((nom_service, regex))
+                # Un caractère UTF-8 occupe jusqu'à 4 octets
+                longueur *= 4
+            self.longueur_max = max(self.longueur_max, longueur)
+
+        self.texte = _Moteur(entrees_texte)
+        self.octets = _Moteur(entrees_octets)
+        self.texte_seulement = _Moteur(texte_seulement)
+        # Motifs à mots-clés : évalués seulement autour des occurrences (contenu binaire)
+        self.prefiltre = PrefiltreMotsCles(entrees_prefiltre)
+        self.backend = self.octets.backend if self.octets else self.texte.backend
+
+    def finditer(self, contenu):
+        """
+        Génère des tuples (nom_service, match) pour tout le contenu.
+
+        Sur un contenu binaire, `match.group(0)` est de type `bytes` et les
+        positions sont des offsets en octets.
+        """
+        if isinstance(contenu, str):
+            yield from self.texte.finditer(contenu)
+            return
+        if self.prefiltre:
+            yield from self.prefiltre.finditer(contenu)
+        yield from self.octets.finditer(contenu)
+        if self.texte_seulement:
+            texte = bytes(contenu).decode('utf-8', 'surrogateescape')
+            for nom_service, match in self.texte_seulement.finditer(texte):
+                yield nom_service, _MatchEnOctets(texte, match)
+
+
+class PatternSet(dict):
+    """Dictionnaire de patterns portant son `CombinedMatcher` pré-compilé."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.matcher = CombinedMatcher(self)
+
+
+def obtenir_matcher(patterns: dict) -> CombinedMatcher:
+    """Retourne le matcher attaché aux patterns, ou en compile un à la volée."""
+    matcher = getattr(patterns, "matcher", None)
+    if matcher is None:
+        matcher = CombinedMatcher(patterns)
+    return matcher
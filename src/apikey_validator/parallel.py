@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+"""
+Backend de scan multiprocessus : la liste des fichiers (ou des commits) est
+découpée en lots répartis sur un `ProcessPoolExecutor`. Chaque processus compile ses propres
+patterns (les validateurs ne sont pas sérialisables) et renvoie les
+correspondances lot par lot, ce qui contourne le GIL pour le travail regex.
+"""
+import collections
+import concurrent.futures
+import re
+import threading
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from .git_history import ScannerHistorique, est_clone_partiel, lister_blobs_absents
+from .matcher import CombinedMatcher, compiler_version_octets
+from .streaming import nouvelle_empreinte, scanner_fichier
+
+# --- CONSTANTES ---
+TAILLE_LOT = 64
+LOTS_EN_VOL_PAR_WORKER = 2
+TRANCHES_PAR_WORKER = 4
+TAILLE_MAX_TRANCHE = 1000
+
+# Matcher propre à chaque processus worker, construit par l'initialiseur
+_matcher_worker = None
+# Blobs absents d'un clone partiel, calculés une seule fois par le processus parent
+_blobs_absents_worker = None
+# Scanners d'historique (processus cat-file inclus) conservés par dépôt dans chaque worker
+_scanners_historique = {}
+
+
+def motifs_serialisables(patterns: dict) -> dict:
+    """Extrait des patterns les seules données transmissibles aux processus."""
+    return {nom: (details["regex"].pattern, details["regex"].flags, details.get("keywords")) for nom, details in patterns.items()}
+
+
+def _initialiser_worker(motifs: dict, blobs_absents: Optional[set] = None):
+    """Compile les patterns une seule fois par processus."""
+    global _matcher_worker, _blobs_absents_worker
+    _blobs_absents_worker = blobs_absents
+    patterns = {}
+    for nom, (motif, drapeaux, mots_cles) in motifs.items():
+        patterns[nom] = {"regex": re.compile(motif, drapeaux), "regex_bytes": compiler_version_octets(motif), "keywords": mots_cles}
+    _matcher_worker = CombinedMatcher(patterns)
+
+
+def _scanner_lot(chemins: List[str]) -> List[Tuple[str, list, str, int]]:
+    """Scanne un lot de fichiers et renvoie [(chemin, [(service, offset, cle), ...], empreinte, octets lus), ...]."""
+    resultats = []
+    for chemin in chemins:
+        empreinte = nouvelle_empreinte()
+        try:
+            trouvailles, octets = scanner_fichier(chemin, _matcher_worker.finditer, _matcher_worker.longueur_max, empreinte=empreinte)
+            resultats.append((chemin, trouvailles, empreinte.hexdigest(), octets))
+        except (IOError, OSError):
+            resultats.append((chemin, [], None, 0))
+    return resultats
+
+
+def scanner_en_processus(fichiers: Iterable[str], patterns: dict, workers: int, pause_event: threading.Event, cancel_event: threading.Event, taille_lot: int = TAILLE_LOT, cache=None) -> Iterator[Tuple[str, list, int]]:
+    """
+    Répartit les fichiers sur `workers` processus et génère (chemin, trouvailles, octets lus).
+
+    Le nombre de lots soumis est borné afin que la mémoire reste constante,
+    et les résultats sont produits dans l'ordre de complétion des lots. Avec
+    un `ScanCache`, les fichiers inchangés sont rejoués sans être soumis
+    (0 octet lu).
+    """
+    fichiers = iter(fichiers)
+    max_en_vol = max(1, workers) * LOTS_EN_VOL_PAR_WORKER
+    executor = concurrent.futures.ProcessPoolExecutor(max_workers=workers, initializer=_initialiser_worker, initargs=(motifs_serialisables(patterns),))
+    try:
+        en_vol = set()
+        fichiers_epuises = False
+        while en_vol or not fichiers_epuises:
+            while not fichiers_epuises and len(en_vol) < max_en_vol and not cancel_event.is_set():
+                pause_event.wait()
+                lot = []
+                for chemin in fichiers:
+                    trouvailles = cache.consulter(chemin) if cache else None
+                    if trouvailles is not None:
+                        yield chemin, trouvailles, 0
+                        continue
+                    lot.append(chemin)
+                    if len(lot) >= taille_lot:
+                        break
+                else:
+                    fichiers_epuises = True
+                if lot:
+                    en_vol.add(executor.submit(_scanner_lot, lot))
+            if cancel_event.is_set() or not en_vol:
+                break
+            termines, en_vol = concurrent.futures.wait(en_vol, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in termines:
+                for chemin, trouvailles, empreinte, octets in future.result():
+                    if cache:
+                        cache.enregistrer(chemin, trouvailles, empreinte)
+                    yield chemin, trouvailles, octets
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+# --- HISTORIQUE GIT ---
+
+def _scanner_tranche(git_dir: str, commits: List[str]) -> List[Tuple[str, list]]:
+    """Scanne une tranche contiguë de commits avec le dépôt propre au worker."""
+    scanner = _scanners_historique.get(git_dir)
+    if scanner is None:
+        scanner = _scanners_historique[git_dir] = ScannerHistorique(git_dir, _matcher_worker, _blobs_absents_worker)
+    return list(scanner.parcourir([], commits))
+
+
+def scanner_historique_en_processus(git_dir: str, commits: List[str], patterns: dict, workers: int, pause_event: threading.Event, cancel_event: threading.Event) -> Iterator[Tuple[str, list]]:
+    """
+    Découpe la liste topologique des commits en tranches et les scanne en parallèle.
+
+    Génère (sha_commit, [(chemin, trouvailles), ...]) dans l'ordre de la liste :
+    les tranches sont fusionnées dans leur ordre de soumission.
+    """
+    workers = max(1, workers)
+    taille_tranche = max(1, min(TAILLE_MAX_TRANCHE, -(-len(commits) // (workers * TRANCHES_PAR_WORKER))))
+    tranches = (commits[i:i + taille_tranche] for i in range(0, len(commits), taille_tranche))
+    max_en_vol = workers * LOTS_EN_VOL_PAR_WORKER
+    blobs_absents = lister_blobs_absents(git_dir) if est_clone_partiel(git_dir) else set()
+    executor = concurrent.futures.ProcessPoolExecutor(max_workers=workers, initializer=_initialiser_worker, initargs=(motifs_serialisables(patterns), blobs_absents))
+    try:
+        en_vol = collections.deque()
+        for tranche in tranches:
+            if cancel_event.is_set():
+                break
+            pause_event.wait()
+            en_vol.append(executor.submit(_scanner_tranche, git_dir, tranche))
+            if len(en_vol) >= max_en_vol:
+                yield from en_vol.popleft().result()
+        while en_vol and not cancel_event.is_set():
+            yield from en_vol.popleft().result()
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+"""
+Filtrage des chemins pendant le parcours. Les motifs de style `.gitignore`
+(fichiers `.secretsignore`, `.gitignore` en option, globs `--exclude` et
+`--include`) sont traduits une seule fois en regex ; un dossier exclu est
+élagué sans être parcouru. Les fichiers d'ignore sont lus dossier par
+dossier et s'appliquent, comme pour git, au dossier qui les contient et à
+ses descendants. Un glob `--include` qui désigne un dossier (`src`, `src/`)
+sélectionne tous les fichiers de ce dossier.
+"""
+import os
+import re
+from typing import Iterable, List, Optional, Tuple
+
+# --- CONSTANTES ---
+DOSSIERS_EXCLUS = ('.git', '.venv', 'node_modules', '__pycache__')
+FICHIER_SECRETSIGNORE = ".secretsignore"
+FICHIER_GITIGNORE = ".gitignore"
+
+
+def _traduire_glob(motif: str) -> str:
+    """Traduit un glob de style gitignore (`*`, `?`, `[...]`, `**`) en regex."""
+    morceaux, i = [], 0
+    while i < len(motif):
+        c = motif[i]
+        if motif.startswith("**/", i) and (i == 0 or motif[i - 1] == "/"):
+            morceaux.append("(?:.*/)?")
+            i += 3
+        elif motif.startswith("**", i) and i + 2 == len(motif) and (i == 0 or motif[i - 1] == "/"):
+            morceaux.append(".*")
+            i += 2
+        elif c == "*":
+            morceaux.append("[^/]*")
+            i += 1
+        elif c == "?":
+            morceaux.append("[^/]")
+            i += 1
+        elif c == "[":
+            fin = motif.find("]", i + 2)
+            if fin == -1:
+                morceaux.append(re.escape(c))
+                i += 1
+            else:
+                classe = motif[i + 1:fin]
+                if classe[0] in "!^":
+                    classe = "^" + classe[1:]
+                morceaux.append("[" + classe.replace("\\", "\\\\") + "]")
+                i = fin + 1
+        elif c == "\\" and i + 1 < len(motif):
+            morceaux.append(re.escape(motif[i + 1]))
+            i += 2
+        else:
+            morceaux.append(re.escape(c))
+            i += 1
+    return "".join(morceaux)
+
+
+def compiler_motif(ligne: str) -> Optional[Tuple[str, bool, bool]]:
+    """
+    Compile une ligne de fichier d'ignore en (regex, negation, dossier_seulement).
+
+    Retourne None pour une ligne vide ou un commentaire. Un motif sans `/`
+    (hors `/` final) s'applique au nom à toute profondeur ; sinon il est
+    ancré au dossier du fichier d'ignore.
+    """
+    ligne = ligne.rstrip("\r\n")
+    if not ligne.endswith("\\ "):
+        ligne = ligne.rstrip(" ")
+    if not ligne or ligne.startswith("#"):
+        return None
+    negation = ligne.startswith("!")
+    if negation or ligne.startswith("\\!") or ligne.startswith("\\#"):
+        ligne = ligne[1:]
+    dossier_seulement = ligne.endswith("/")
+    ligne = ligne.rstrip("/")
+    if not ligne:
+        return None
+    ancre = "/" in ligne
+    corps = _traduire_glob(ligne.lstrip("/"))
+    return ("^" if ancre else "(?:^|.*/)") + corps + "$", negation, dossier_seulement
+
+
+class _Regles:
+    """Motifs d'un fichier d'ignore (ou de la ligne de commande), relatifs à un dossier de base."""
+
+    def __init__(self, prefixe: str, motifs: List[Tuple[str, bool, bool]]):
+        # prefixe : chemin du dossier de base relatif à la racine, terminé par '/' (ou vide)
+        self.prefixe = prefixe
+        self.motifs = [(re.compile(regex), negation, dossier_seulement) for regex, negation, dossier_seulement in motifs]
+        # Sans négation, une seule regex par type d'entrée suffit
+        self.combinees = None
+        if not any(negation for _, negation, _ in motifs):
+            self.combinees = (
+                re.compile("|".join(f"(?:{regex})" for regex, _, dossier_seulement in motifs if not dossier_seulement) or "(?!)"),
+                re.compile("|".join(f"(?:{regex})" for regex, _, _ in motifs) or "(?!)"),
+            )
+
+    def decision(self, chemin_relatif: str, est_dossier: bool) -> Optional[bool]:
+        """True (exclu), False (réinclus par `!`) ou None (aucun motif ne s'applique)."""
+        chemin = chemin_relatif[len(self.prefixe):]
+        if self.combinees is not None:
+            return True if self.combinees[est_dossier].match(chemin) else None
+        for regex, negation, dossier_seulement in reversed(self.motifs):
+            if dossier_seulement and not est_dossier:
+                continue
+            if regex.match(chemin):
+                return not negation
+        return None
+
+
+def _lire_motifs(chemin_fichier: str) -> List[Tuple[str, bool, bool]]:
+    try:
+        with open(chemin_fichier, 'r', encoding='utf-8', errors='replace') as f:
+            return [motif for motif in map(compiler_motif, f) if motif is not None]
+    except OSError:
+        return []
+
+
+class FiltreChemins:
+    """
+    Décide quels dossiers élaguer et quels fichiers ignorer pendant le parcours.
+
+    Les règles héritées d'un dossier sont passées à ses sous-dossiers par le
+    parcours (`regles_dossier`), de sorte que chaque fichier d'ignore n'est
+    lu qu'une fois. Le dernier motif qui s'applique l'emporte, les fichiers
+    d'ignore les plus profonds ayant priorité.
+    """
+
+    def __init__(self, racine: str, exclusions: Iterable[str] = (), inclusions: Iterable[str] = (),
+                 dossiers_exclus: Iterable[str] = DOSSIERS_EXCLUS, respecter_gitignore: bool = False):
+        self.racine = racine
+        self.dossiers_exclus = frozenset(dossiers_exclus)
+        self.fichiers_ignore = (FICHIER_GITIGNORE, FICHIER_SECRETSIGNORE) if respecter_gitignore else (FICHIER_SECRETSIGNORE,)
+        motifs_exclusion = [motif for motif in map(compiler_motif, exclusions) if motif is not None]
+        self.regles_racine = (_Regles("", motifs_exclusion),) if motifs_exclusion else ()
+        motifs_inclusion = [motif for motif in map(compiler_motif, inclusions) if motif is not None]
+        self.inclusions = _Regles("", motifs_inclusion) if motifs_inclusion else None
+        # Décision d'inclusion déjà calculée pour chaque dossier parent
+        self._dossiers_inclus = {}
+        self.dossiers_elagues = 0
+        self.fichiers_exclus = 0
+        self.fichiers_acceptes = 0
+
+    def regles_dossier(self, chemin_dossier: str, chemin_relatif: str, regles_parent: tuple) -> tuple:
+        """Règles applicables aux entrées de `chemin_dossier` (héritées + fichiers d'ignore locaux)."""
+        prefixe = chemin_relatif + "/" if chemin_relatif else ""
+        motifs = []
+        for nom in self.fichiers_ignore:
+            motifs.extend(_lire_motifs(os.path.join(chemin_dossier, nom)))
+        if not motifs:
+            return regles_parent
+        return regles_parent + (_Regles(prefixe, motifs),)
+
+    def _exclu(self, chemin_relatif: str, est_dossier: bool, regles: tuple) -> bool:
+        for ensemble in reversed(regles):
+            decision = ensemble.decision(chemin_relatif, est_dossier)
+            if decision is not None:
+                return decision
+        return False
+
+    def accepter_dossier(self, nom: str, chemin_relatif: str, regles: tuple) -> bool:
+        """Faux si le dossier (et donc tout son sous-arbre) doit être élagué."""
+        if nom in self.dossiers_exclus or self._exclu(chemin_relatif, True, regles):
+            self.dossiers_elagues += 1
+            return False
+        return True
+
+    def _dossier_inclus(self, chemin_relatif: str) -> bool:
+        if not chemin_relatif:
+            return False
+        decision = self._dossiers_inclus.get(chemin_relatif)
+        if decision is None:
+            decision = self.inclusions.decision(chemin_relatif, True)
+            if decision is None:
+                decision = self._dossier_inclus(chemin_relatif.rpartition("/")[0])
+            self._dossiers_inclus[chemin_relatif] = decision
+        return decision
+
+    def _inclus(self, chemin_relatif: str) -> bool:
+        """Vrai si le fichier ou l'un de ses dossiers parents correspond à un glob `--include` (le plus profond l'emporte)."""
+        decision = self.inclusions.decision(chemin_relatif, False)
+        if decision is not None:
+            return decision
+        return self._dossier_inclus(chemin_relatif.rpartition("/")[0])
+
+    def accepter_fichier(self, chemin_relatif: str, regles: tuple) -> bool:
+        """Faux si le fichier est exclu ou ne correspond à aucun glob `--include`."""
+        if self._exclu(chemin_relatif, False, regles) or (self.inclusions is not None and not self._inclus(chemin_relatif)):
+            self.fichiers_exclus += 1
+            return False
+        self.fichiers_acceptes += 1
+        return True
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""
+Rapport de progression limité en fréquence. Les boucles de scan signalent
+chaque élément traité (fichier, commit, essai) au rapporteur, qui ne
+transmet une mise à jour qu'au plus `frequence` fois par seconde : via
+`progress_callback(courant, total, message)` pour l'interface, sinon sous
+forme d'une ligne réécrite sur la sortie standard. Chaque mise à jour
+indique le débit (éléments/s, Mo/s) et le temps restant estimé.
+"""
+import sys
+import time
+from typing import Callable, Optional, Union
+
+# --- CONSTANTES ---
+FREQUENCE_DEFAUT = 10.0
+
+
+def formater_duree(secondes: float) -> str:
+    """Durée au format H:MM:SS (ou M:SS sous une heure)."""
+    minutes, secondes = divmod(int(secondes), 60)
+    heures, minutes = divmod(minutes, 60)
+    return f"{heures}:{minutes:02d}:{secondes:02d}" if heures else f"{minutes}:{secondes:02d}"
+
+
+class RapporteurProgression:
+    """
+    Agrège les avancées d'une tâche et les rapporte à fréquence bornée.
+
+    `total` peut être un entier ou une fonction appelée seulement au moment
+    d'émettre (ex. l'estimation du parcours de fichiers, qui évolue).
+    `frequence` <= 0 désactive la limitation.
+    """
+
+    def __init__(self, progress_callback: Optional[Callable] = None, total: Union[int, Callable[[], int]] = 0, libelle: str = "", unite: str = "fichiers",
+                 frequence: float = FREQUENCE_DEFAUT):
+        self.progress_callback = progress_callback
+        self.total = total
+        self.libelle = libelle
+        self.unite = unite
+        self.intervalle = 1.0 / frequence if frequence > 0 else 0.0
+        self.courant = 0
+        self.octets = 0
+        self.debut = time.monotonic()
+        self._derniere_emission = float("-inf")
+        self._dernier_message = ""
+        self._largeur_ligne = 0
+        self._termine = False
+
+    def avancer(self, message: str = "", n: int = 1, octets: int = 0):
+        """Compte `n` éléments (et `octets` lus) ; émet si l'intervalle minimal est écoulé."""
+        self.courant += n
+        self.octets += octets
+        self._dernier_message = message
+        maintenant = time.monotonic()
+        if maintenant - self._derniere_emission < self.intervalle:
+            return
+        self._derniere_emission = maintenant
+        self._emettre(message, maintenant)
+
+    def _total(self) -> int:
+        total = self.total() if callable(self.total) else self.total
+        return max(total or 0, self.courant)
+
+    def statistiques(self, maintenant: Optional[float] = None) -> str:
+        """Débit moyen depuis le début et temps restant estimé, ex. '850 fichiers/s, 12.4 Mo/s, reste 0:42'."""
+        ecoule = max((maintenant or time.monotonic()) - self.debut, 1e-6)
+        debit = self.courant / ecoule
+        elements = [f"{debit:.0f} {self.unite}/s" if debit >= 10 else f"{debit:.1f} {self.unite}/s"]
+        if self.octets:
+            elements.append(f"{self.octets / ecoule / (1 << 20):.1f} Mo/s")
+        restants = self._total() - self.courant
+        if restants > 0 and debit > 0:
+            elements.append(f"reste {formater_duree(restants / debit)}")
+        return ", ".join(elements)
+
+    def _emettre(self, message: str, maintenant: float):
+        statistiques = self.statistiques(maintenant)
+        if self.progress_callback:
+            self.progress_callback(self.courant, self._total(), f"{message} — {statistiques}" if message else statistiques)
+            return
+        ligne = f"[*] {self.libelle} {self.courant}/{self._total()}{f' : {message}' if message else ''} ({statistiques})"
+        # Efface la fin d'une ligne précédente plus longue
+        sys.stdout.write("\r" + ligne.ljust(self._largeur_ligne))
+        sys.stdout.flush()
+        self._largeur_ligne = len(ligne)
+
+    def annoncer(self, message: str, niveau: str = "*"):
+        """Message ponctuel (ex. statistiques de fin de scan) : transmis au callback avec l'avancement courant, sinon affiché avec le préfixe '[niveau]'."""
+        if self.progress_callback:
+            self.progress_callback(self.courant, self._total(), message)
+        else:
+            print(f"[{niveau}] {message}")
+
+    def terminer(self):
+        """Émet l'état final puis termine la ligne sur la sortie standard (sans effet si rien n'a avancé)."""
+        if self._termine or not self.courant:
+            return
+        self._termine = True
+        self._emettre(self._dernier_message, time.monotonic())
+        if not self.progress_callback:
+            sys.stdout.write("\n")
+            sys.stdout.flush()
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""
+Canal borné entre les threads de scan et le consommateur des résultats
+(typiquement l'interface). Les scanners déposent chaque résultat dans une
+file de taille fixe sans attendre l'affichage ; un thread consommateur la
+vide par lots, à intervalle régulier. Si le consommateur ne suit pas et que
+la file est pleine, la politique choisie s'applique : bloquer les
+producteurs (contre-pression) ou écarter le résultat et n'en transmettre
+que le nombre. Le canal ne concerne que l'affichage : les résultats sont
+enregistrés dans le stockage indépendamment.
+"""
+import collections
+import threading
+from typing import Callable, List
+
+# --- CONSTANTES ---
+POLITIQUE_BLOQUER = "bloquer"
+POLITIQUE_RESUMER = "resumer"
+POLITIQUES = (POLITIQUE_BLOQUER, POLITIQUE_RESUMER)
+TAILLE_FILE_DEFAUT = 10000
+TAILLE_LOT_DEFAUT = 500
+# Intervalle entre deux livraisons au consommateur, en secondes
+INTERVALLE_DEFAUT = 0.1
+
+
+class CanalResultats:
+    """
+    File bornée de résultats, vidée par lots vers `consommateur(resultats, ecartes)`.
+
+    `resultats` est la liste des résultats du lot (au plus `taille_lot`) et
+    `ecartes` le nombre de résultats écartés depuis la livraison précédente
+    (toujours 0 avec POLITIQUE_BLOQUER). L'instance est appelable et peut
+    être passée directement comme `result_callback` aux modes de scan.
+    """
+
+    def __init__(self, consommateur: Callable[[List[dict], int], None], taille_max: int = TAILLE_FILE_DEFAUT, taille_lot: int = TAILLE_LOT_DEFAUT,
+                 intervalle: float = INTERVALLE_DEFAUT, politique: str = POLITIQUE_RESUMER):
+        if politique not in POLITIQUES:
+            raise ValueError(f"Politique inconnue : {politique} (attendu : {', '.join(POLITIQUES)})")
+        self.consommateur = consommateur
+        self.taille_max = max(1, taille_max)
+        self.taille_lot = max(1, taille_lot)
+        self.intervalle = intervalle
+        self.politique = politique
+        self._file = collections.deque()
+        self._condition = threading.Condition()
+        self._ferme = False
+        self._ecartes_lot = 0
+        self.ecartes = 0
+        self.livres = 0
+        self._thread = threading.Thread(target=self._consommer, daemon=True)
+        self._thread.start()
+
+    def publier(self, resultat: dict) -> bool:
+        """Dépose un résultat ; retourne False s'il a été écarté (file pleine ou canal fermé)."""
+        with self._condition:
+            while len(self._file) >= self.taille_max and not self._ferme:
+                if self.politique == POLITIQUE_RESUMER:
+                    self._ecartes_lot += 1
+                    self.ecartes += 1
+                    return False
+                self._condition.wait()
+            if self._ferme:
+                return False
+            self._file.append(resultat)
+            return True
+
+    __call__ = publier
+
+    def _consommer(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._ferme, timeout=self.intervalle)
+                lot = [self._file.popleft() for _ in range(min(self.taille_lot, len(self._file)))]
+                ecartes, self._ecartes_lot = self._ecartes_lot, 0
+                termine = self._ferme and not self._file
+                # Des places se sont libérées pour les producteurs bloqués
+                self._condition.notify_all()
+            if lot or ecartes:
+                try:
+                    self.consommateur(lot, ecartes)
+                except Exception as e:
+                    print(f"[!] Erreur du consommateur de résultats : {e}")
+                self.livres += len(lot)
+            if termine:
+                return
+
+    def fermer(self, timeout: float = None):
+        """Livre les résultats encore en file puis arrête le thread consommateur."""
+        with self._condition:
+            self._ferme = True
+            self._condition.notify_all()
+        self._thread.join(timeout)
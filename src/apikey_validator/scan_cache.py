@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+"""
+Cache persistant des scans de fichiers (SQLite). Pour chaque fichier sont
+conservés sa taille, son mtime, son inode, l'empreinte de son contenu et les
+correspondances trouvées : un fichier inchangé n'est pas rescanné, ses
+correspondances sont rejouées depuis le cache. Le cache est vidé
+automatiquement lorsque l'ensemble des patterns change.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+from typing import Optional
+
+from . import DOSSIER_STOCKAGE
+from .streaming import empreinte_fichier
+
+# --- CONSTANTES ---
+CHEMIN_CACHE_DEFAUT = os.path.join(DOSSIER_STOCKAGE, "scan_cache.sqlite3")
+LOT_ECRITURE = 500
+
+
+def empreinte_patterns(patterns: dict) -> str:
+    """Empreinte stable de l'ensemble des patterns (noms, motifs et drapeaux)."""
+    h = hashlib.sha256()
+    for nom in sorted(patterns):
+        regex = patterns[nom]["regex"]
+        h.update(json.dumps([nom, regex.pattern, regex.flags]).encode('utf-8'))
+    return h.hexdigest()
+
+
+class ScanCache:
+    """Cache SQLite des correspondances par fichier, lié à une empreinte de patterns."""
+
+    def __init__(self, chemin_db: str, empreinte: str):
+        dossier = os.path.dirname(chemin_db)
+        if dossier:
+            os.makedirs(dossier, exist_ok=True)
+        self.empreinte = empreinte
+        self.connexion = sqlite3.connect(chemin_db)
+        self.connexion.execute("PRAGMA journal_mode=WAL")
+        self.connexion.execute("CREATE TABLE IF NOT EXISTS meta (cle TEXT PRIMARY KEY, valeur TEXT)")
+        self.connexion.execute(
+            "CREATE TABLE IF NOT EXISTS fichiers ("
+            "chemin TEXT PRIMARY KEY, taille INTEGER, mtime_ns INTEGER, inode INTEGER, "
+            "empreinte_contenu TEXT, trouvailles TEXT)"
+        )
+        ligne = self.connexion.execute("SELECT valeur FROM meta WHERE cle = 'patterns'").fetchone()
+        if ligne is None or ligne[0] != empreinte:
+            # Les patterns ont changé : toutes les entrées sont invalidées
+            self.connexion.execute("DELETE FROM fichiers")
+            self.connexion.execute("INSERT OR REPLACE INTO meta VALUES ('patterns', ?)", (empreinte,))
+        self.connexion.commit()
+        self._stats = {}
+        self._en_attente = 0
+        self.rejoues = 0
+
+    def consulter(self, chemin: str) -> Optional[list]:
+        """
+        Retourne les correspondances en cache d'un fichier inchangé, sinon None.
+
+        Si seules les métadonnées ont changé (taille identique), l'empreinte du
+        contenu est recalculée : un contenu identique est encore un succès.
+        """
+        try:
+            st = os.stat(chemin)
+        except OSError:
+            return None
+        self._stats[chemin] = st
+        ligne = self.connexion.execute(
+            "SELECT taille, mtime_ns, inode, empreinte_contenu, trouvailles FROM fichiers WHERE chemin = ?", (os.path.abspath(chemin),)
+        ).fetchone()
+        if ligne is None or ligne[0] != st.st_size:
+            return None
+        taille, mtime_ns, inode, empreinte_contenu, trouvailles = ligne
+        if (mtime_ns, inode) != (st.st_mtime_ns, st.st_ino):
+            try:
+                if empreinte_fichier(chemin) != empreinte_contenu:
+                    return None
+            except OSError:
+                return None
+            self._ecrire(chemin, st, empreinte_contenu, trouvailles)
+        self._stats.pop(chemin, None)
+        self.rejoues += 1
+        return [tuple(t) for t in json.loads(trouvailles)]
+
+    def enregistrer(self, chemin: str, trouvailles: list, empreinte_contenu: Optional[str]):
+        """Mémorise les correspondances d'un fichier qui vient d'être scanné."""
+        st = self._stats.pop(chemin, None)
+        if st is None or empreinte_contenu is None:
+            return
+        self._ecrire(chemin, st, empreinte_contenu, json.dumps(trouvailles))
+
+    def _ecrire(self, chemin, st, empreinte_contenu, trouvailles_json):
+        self.connexion.execute(
+            "INSERT OR REPLACE INTO fichiers VALUES (?, ?, ?, ?, ?, ?)",
+            (os.path.abspath(chemin), st.st_size, st.st_mtime_ns, st.st_ino, empreinte_contenu, trouvailles_json),
+        )
+        self._en_attente += 1
+        if self._en_attente >= LOT_ECRITURE:
+            self.connexion.commit()
+            self._en_attente = 0
+
+    def fermer(self):
+        self.connexion.commit()
+        self.connexion.close()
+
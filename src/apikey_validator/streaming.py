@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""
+Lecture en flux des fichiers à scanner : le contenu est lu par blocs de
+taille fixe qui se chevauchent de la longueur maximale d'une correspondance,
+de sorte qu'aucun secret n'est manqué à la frontière de deux blocs et que la
+mémoire consommée par fichier reste bornée quelle que soit sa taille.
+"""
+import hashlib
+from typing import Callable, Iterator, List, Tuple
+
+# --- CONSTANTES ---
+TAILLE_BLOC = 1 << 20  # 1 Mio
+
+
+def nouvelle_empreinte():
+    """Objet de hachage utilisé pour l'empreinte du contenu des fichiers."""
+    return hashlib.blake2b(digest_size=16)
+
+
+def lire_blocs(fichier, chevauchement: int, taille_bloc: int = TAILLE_BLOC, empreinte=None) -> Iterator[Tuple[int, bytes, bool]]:
+    """
+    Génère des tuples (offset, bloc, est_dernier) depuis un fichier binaire.
+
+    Chaque bloc commence par les `chevauchement` derniers octets du bloc
+    précédent ; `offset` est la position en octets du début du bloc.
+    Si `empreinte` est fourni, il est mis à jour avec chaque octet lu une fois.
+    """
+    offset = 0
+    queue = b""
+    donnees = fichier.read(taille_bloc)
+    while donnees:
+        if empreinte is not None:
+            empreinte.update(donnees)
+        suivantes = fichier.read(taille_bloc)
+        bloc = queue + donnees
+        yield offset, bloc, not suivantes
+        if chevauchement and len(bloc) > chevauchement:
+            queue = bloc[-chevauchement:]
+        else:
+            queue = bloc if chevauchement else b""
+        offset += len(bloc) - len(queue)
+        donnees = suivantes
+
+
+def decoder_match(valeur) -> str:
+    """Décode uniquement le texte d'une correspondance trouvée."""
+    if isinstance(valeur, str):
+        return valeur
+    return valeur.decode('utf-8', errors='ignore')
+
+
+def rechercher_dans_flux(flux, finditer: Callable, chevauchement: int, taille_bloc: int = TAILLE_BLOC, empreinte=None) -> Iterator[Tuple[object, int, str]]:
+    """
+    Applique `finditer` bloc par bloc et génère (etiquette, offset, texte).
+
+    `flux` est tout objet binaire exposant `read(n)` (fichier, blob Git...).
+    `finditer(bloc)` reçoit directement les octets du bloc et doit générer
+    des tuples (etiquette, match) ; les positions des matchs sont donc des
+    offsets en octets. Seul le texte des correspondances est décodé en UTF-8.
+
+    Une correspondance qui démarre dans la zone de chevauchement d'un bloc
+    n'est rapportée qu'avec le bloc suivant, où elle est complète.
+    """
+    fins_derniers_matchs = {}
+    for offset, bloc, est_dernier in lire_blocs(flux, chevauchement, taille_bloc, empreinte):
+        limite = len(bloc) if est_dernier else len(bloc) - chevauchement
+        for etiquette, match in finditer(bloc):
+            debut = offset + match.start()
+            # Différée au bloc suivant, ou déjà rapportée par le bloc précédent
+            if match.start() >= limite or debut < fins_derniers_matchs.get(etiquette, 0):
+                continue
+            fins_derniers_matchs[etiquette] = offset + match.end()
+            yield etiquette, debut, decoder_match(match.group(0))
+
+
+def rechercher_dans_fichier(chemin: str, finditer: Callable, chevauchement: int, taille_bloc: int = TAILLE_BLOC, empreinte=None) -> Iterator[Tuple[object, int, str]]:
+    """Variante de `rechercher_dans_flux` qui ouvre le fichier `chemin`."""
+    with open(chemin, 'rb') as f:
+        yield from rechercher_dans_flux(f, finditer, chevauchement, taille_bloc, empreinte)
+
+
+def scanner_fichier(chemin: str, finditer: Callable, chevauchement: int, taille_bloc: int = TAILLE_BLOC, empreinte=None) -> Tuple[List[Tuple[object, int, str]], int]:
+    """Correspondances de `rechercher_dans_fichier` et nombre d'octets effectivement lus (pour le débit)."""
+    with open(chemin, 'rb') as f:
+        trouvailles = list(rechercher_dans_flux(f, finditer, chevauchement, taille_bloc, empreinte))
+        return trouvailles, f.tell()
+
+
+def empreinte_fichier(chemin: str, taille_bloc: int = TAILLE_BLOC) -> str:
+    """Calcule l'empreinte du contenu d'un fichier sans le scanner."""
+    empreinte = nouvelle_empreinte()
+    with open(chemin, 'rb') as f:
+        for donnees in iter(lambda: f.read(taille_bloc), b""):
+            empreinte.update(donnees)
+    return empreinte.hexdigest()
@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+"""
+Cache des résultats de validation des clés trouvées. Une même clé présente
+dans des centaines de fichiers ou de commits n'est testée qu'une fois auprès
+de l'API : le résultat est conservé sous la clé (service, SHA-256 de la clé),
+avec une durée de vie distincte pour les résultats positifs et négatifs. Les
+validations concurrentes d'une même clé attendent l'appel déjà en cours au
+lieu d'en lancer un autre. Le cache peut être persisté dans SQLite ; la clé
+elle-même n'y est jamais écrite, seulement son empreinte.
+"""
+import collections
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Callable, Optional
+
+from . import DOSSIER_STOCKAGE
+
+# --- CONSTANTES ---
+CHEMIN_CACHE_VALIDATION_DEFAUT = os.path.join(DOSSIER_STOCKAGE, "validation_cache.sqlite3")
+TTL_POSITIF = 24 * 3600
+# Un échec peut venir d'une erreur réseau passagère : durée de vie plus courte
+TTL_NEGATIF = 15 * 60
+TAILLE_MAX = 100000
+
+
+class _EnCours:
+    """Validation en cours pour une clé : les autres threads attendent son résultat."""
+
+    __slots__ = ("termine", "resultat", "reussi")
+
+    def __init__(self):
+        self.termine = threading.Event()
+        self.resultat = None
+        self.reussi = False
+
+
+class CacheValidation:
+    """Cache thread-safe (service, sha256(clé)) -> résultat, avec TTL positif et négatif."""
+
+    def __init__(self, ttl_positif: float = TTL_POSITIF, ttl_negatif: float = TTL_NEGATIF, taille_max: int = TAILLE_MAX, chemin_db: Optional[str] = None):
+        self.ttl_positif = ttl_positif
+        self.ttl_negatif = ttl_negatif
+        self.taille_max = taille_max
+        self._entrees = collections.OrderedDict()
+        self._en_cours = {}
+        self._lock = threading.Lock()
+        self.succes = 0
+        self.appels = 0
+        self.connexion = None
+        if chemin_db:
+            self.activer_persistance(chemin_db)
+
+    def activer_persistance(self, chemin_db: str):
+        """Conserve les résultats sur disque pour les scans suivants."""
+        dossier = os.path.dirname(chemin_db)
+        if dossier:
+            os.makedirs(dossier, exist_ok=True)
+        with self._lock:
+            self.connexion = sqlite3.connect(chemin_db, check_same_thread=False)
+            self.connexion.execute("PRAGMA journal_mode=WAL")
+            self.connexion.execute(
+                "CREATE TABLE IF NOT EXISTS validations ("
+                "service TEXT, empreinte TEXT, resultat INTEGER, expiration REAL, PRIMARY KEY (service, empreinte))"
+            )
+            self.connexion.execute("DELETE FROM validations WHERE expiration < ?", (time.time(),))
+            self.connexion.commit()
+
+    @staticmethod
+    def _cle(service: str, cle: str) -> tuple:
+        return service, hashlib.sha256(cle.encode('utf-8', errors='surrogatepass')).hexdigest()
+
+    def _lire(self, cle_cache: tuple):
+        """Résultat encore valide pour la clé, ou None (appelé sous le verrou)."""
+        entree = self._entrees.get(cle_cache)
+        if entree is None and self.connexion is not None:
+            ligne = self.connexion.execute(
+                "SELECT resultat, expiration FROM validations WHERE service = ? AND empreinte = ?", cle_cache
+            ).fetchone()
+            if ligne is not None:
+                entree = (bool(ligne[0]), ligne[1])
+                self._entrees[cle_cache] = entree
+        if entree is None:
+            return None
+        if entree[1] < time.time():
+            del self._entrees[cle_cache]
+            return None
+        self._entrees.move_to_end(cle_cache)
+        return entree
+
+    def _ecrire(self, cle_cache: tuple, resultat: bool):
+        expiration = time.time() + (self.ttl_positif if resultat else self.ttl_negatif)
+        self._entrees[cle_cache] = (resultat, expiration)
+        self._entrees.move_to_end(cle_cache)
+        while len(self._entrees) > self.taille_max:
+            self._entrees.popitem(last=False)
+        if self.connexion is not None:
+            with self.connexion:
+                self.connexion.execute("INSERT OR REPLACE INTO validations VALUES (?, ?, ?, ?)", cle_cache + (int(bool(resultat)), expiration))
+
+    def valider(self, service: str, cle: str, validateur: Callable, silencieux: bool = False) -> bool:
+        """Retourne le résultat en cache, sinon appelle `validateur(cle, silencieux)` une seule fois."""
+        cle_cache = self._cle(service, cle)
+        while True:
+            with self._lock:
+                entree = self._lire(cle_cache)
+                if entree is not None:
+                    self.succes += 1
+                    if not silencieux:
+                        print(f"[*] Résultat en cache pour la clé ({service}) : {cle[:4]}...{cle[-4:]}")
+                    return entree[0]
+                en_cours = self._en_cours.get(cle_cache)
+                if en_cours is None:
+                    en_cours = self._en_cours[cle_cache] = _EnCours()
+                    responsable = True
+                else:
+                    responsable = False
+            if not responsable:
+                en_cours.termine.wait()
+                if en_cours.reussi:
+                    with self._lock:
+                        self.succes += 1
+                    return en_cours.resultat
+                # Le validateur a levé une exception : nouvelle tentative
+                continue
+            try:
+                with self._lock:
+                    self.appels += 1
+                resultat = validateur(cle, silencieux=silencieux)
+                with self._lock:
+                    self._ecrire(cle_cache, resultat)
+                en_cours.resultat, en_cours.reussi = resultat, True
+                return resultat
+            finally:
+                with self._lock:
+                    self._en_cours.pop(cle_cache, None)
+                en_cours.termine.set()
+
+    def fermer(self):
+        with self._lock:
+            if self.connexion is not None:
+                self.connexion.close()
+                self.connexion = None
+
+
+# Cache partagé par la vérification des clés trouvées par les scans (voir verification.py)
+cache_validation = CacheValidation()
@@ -1,14 +1,36 @@
 # -*- coding: utf-8 -*-
 """
 Module contenant les fonctions de validation spécifiques pour chaque service API.
+
+Les appels HTTP passent par une `requests.Session` propre à chaque thread :
+les connexions (TCP + TLS) sont conservées et réutilisées d'une validation
+à l'autre, dans un pool borné par hôte.
 """
+import threading
 import time
 import requests
 import re
+from requests.adapters import HTTPAdapter
 
 # --- CONSTANTES ---
 GEMINI_API_URL = "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent"
 GITHUB_API_URL = "https://api.github.com/user"
+# Connexions conservées par hôte et nombre d'hôtes gardés en pool, pour chaque thread
+TAILLE_POOL_PAR_HOTE = 4
+NOMBRE_POOLS_HOTES = 8
+
+_sessions = threading.local()
+
+def obtenir_session() -> requests.Session:
+    """Retourne la session HTTP (keep-alive) du thread courant, créée au premier appel."""
+    session = getattr(_sessions, "session", None)
+    if session is None:
+        session = requests.Session()
+        adaptateur = HTTPAdapter(pool_connections=NOMBRE_POOLS_HOTES, pool_maxsize=TAILLE_POOL_PAR_HOTE, pool_block=True)
+        session.mount("https://", adaptateur)
+        session.mount("http://", adaptateur)
+        _sessions.session = session
+    return session
 
 # --- FONCTIONS DE VALIDATION SPÉCIFIQUES ---
 
@@ -43,7 +65,7 @@ def tester_cle_api_gemini(api_key: str, silencieux: bool = False) -> bool:
     try:
         # Une petite pause pour éviter de surcharger les services
         time.sleep(0.1)
-        response = requests.post(GEMINI_API_URL, headers=headers, json=payload, timeout=10)
+        response = obtenir_session().post(GEMINI_API_URL, headers=headers, json=payload, timeout=10)
         
         if response.status_code == 200:
             return True
@@ -76,7 +98,7 @@ def tester_cle_github(api_key: str, silencieux: bool = False) -> bool:
     try:
         # Une petite pause pour éviter de surcharger les services
         time.sleep(0.1)
-        response = requests.get(GITHUB_API_URL, headers=headers, timeout=10)
+        response = obtenir_session().get(GITHUB_API_URL, headers=headers, timeout=10)
         return response.status_code == 200
     except requests.exceptions.RequestException:
         return False
\ No newline at end of file
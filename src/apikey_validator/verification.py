@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""
+Seconde phase des scans : vérification des clés trouvées. La détection
+enregistre les trouvailles sans les valider (`is_valid` à None), à la vitesse
+du scan ; les paires (service, clé) distinctes sont ensuite relues depuis le
+stockage des résultats et testées auprès des API avec leur propre limite de
+concurrence. Le résultat de chaque vérification est reporté sur toutes les
+occurrences de la paire.
+"""
+import concurrent.futures
+import sys
+import threading
+import time
+
+from .findings_store import FindingsStore
+from .progress import RapporteurProgression
+from .validation_cache import cache_validation
+
+# --- CONSTANTES ---
+MAX_WORKERS_VERIFICATION = 10
+# Vérifications soumises à l'avance par thread : la file reste bornée
+EN_VOL_PAR_WORKER = 2
+
+
+def _verifier_paire(service: str, validator, cle: str) -> bool:
+    try:
+        # Résultat réutilisé d'un scan précédent si encore valide (TTL)
+        return bool(cache_validation.valider(service, cle, validator, silencieux=True))
+    except Exception as e:
+        print(f"[!] Erreur lors de la vérification d'une clé : {e}")
+        return False
+
+
+def verifier_resultats(patterns: dict, magasin: FindingsStore, pause_event: threading.Event, cancel_event: threading.Event, progress_callback=None, result_callback=None,
+                       workers: int = MAX_WORKERS_VERIFICATION) -> int:
+    """
+    Vérifie chaque paire (service, clé) non encore vérifiée du magasin et retourne le nombre de clés valides.
+
+    Les services absents de `patterns` (sans validateur) restent non vérifiés.
+    Chaque paire vérifiée est rapportée une fois via `result_callback`, avec
+    pour source le nombre d'occurrences concernées.
+    """
+    total = magasin.compter_paires_non_verifiees()
+    if not total:
+        return 0
+    if not progress_callback: print(f"\n[*] Vérification de {total} clé(s) unique(s)...")
+
+    valides = 0
+    verifiees = 0
+    progression = RapporteurProgression(progress_callback, total, "Vérification", "clés")
+    workers = max(1, workers)
+    paires = magasin.paires_non_verifiees()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        en_vol = {}
+        paires_epuisees = False
+        try:
+            while en_vol or not paires_epuisees:
+                while not paires_epuisees and len(en_vol) < workers * EN_VOL_PAR_WORKER and not cancel_event.is_set():
+                    pause_event.wait()
+                    paire = next(paires, None)
+                    if paire is None:
+                        paires_epuisees = True
+                    elif paire[0] in patterns:
+                        service, cle, occurrences = paire
+                        en_vol[executor.submit(_verifier_paire, service, patterns[service]["validator"], cle)] = paire
+                    else:
+                        progression.avancer(paire[0])
+                if cancel_event.is_set() or not en_vol:
+                    break
+                faits, _ = concurrent.futures.wait(en_vol, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in faits:
+                    service, cle, occurrences = en_vol.pop(future)
+                    est_valide = future.result()
+                    magasin.marquer_validite(service, cle, est_valide)
+                    verifiees += 1
+                    valides += est_valide
+                    progression.avancer(service)
+                    if result_callback:
+                        result_callback({
+                            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                            "service": service,
+                            "key": cle,
+                            "is_valid": est_valide,
+                            "source_type": "verification",
+                            "source_info": f"{occurrences} occurrence(s)",
+                        })
+                    elif est_valide:
+                        print(f"\n[+] SUCCÈS ! Clé VALIDE ({service}, {occurrences} occurrence(s)) : {cle}")
+                        sys.stdout.flush()
+        finally:
+            progression.terminer()
+            paires.close()
+            for future in en_vol:
+                future.cancel()
+    if not progress_callback: print(f"[*] {valides} clé(s) valide(s) sur {verifiees} vérifiée(s).")
+    return valides
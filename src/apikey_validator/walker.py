@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""
+Parcours paresseux des répertoires à scanner. Les dossiers exclus sont
+élagués avant d'y descendre et les fichiers sont transmis au scanner via
+une file bornée alimentée par un thread dédié : le scan commence dès le
+premier fichier trouvé, sans attendre le listing complet de l'arborescence.
+Un `FiltreChemins` (fichiers d'ignore, globs) et un `FiltreBinaires`
+optionnels écartent les chemins dans ce même thread, avant qu'ils
+n'atteignent le scanner.
+"""
+import os
+import queue
+import threading
+from typing import Iterable, Iterator
+
+from .path_filter import DOSSIERS_EXCLUS, FiltreChemins
+
+# --- CONSTANTES ---
+TAILLE_FILE = 1024
+_FIN = object()
+
+
+class ParcoursFichiers:
+    """
+    Itérable sur les fichiers d'une arborescence, produit en arrière-plan.
+
+    Pendant le parcours, `estimation_total()` extrapole le nombre total de
+    fichiers à partir de la moyenne de fichiers par dossier déjà visité et
+    du nombre de dossiers encore en attente.
+    """
+
+    def __init__(self, racine: str, dossiers_exclus: Iterable[str] = DOSSIERS_EXCLUS, taille_file: int = TAILLE_FILE, filtre_binaires=None, filtre_chemins=None):
+        self.racine = racine
+        self.filtre_binaires = filtre_binaires
+        self.filtre_chemins = filtre_chemins or FiltreChemins(racine, dossiers_exclus=dossiers_exclus)
+        self.fichiers_trouves = 0
+        self.dossiers_visites = 0
+        self.dossiers_en_attente = 0
+        self.termine = False
+        self._file = queue.Queue(maxsize=taille_file)
+        self._arret = threading.Event()
+        self._thread = None
+
+    def parcourir(self) -> Iterator[str]:
+        """Génère les chemins de fichiers en élaguant les dossiers exclus."""
+        filtre = self.filtre_chemins
+        # (dossier, chemin relatif à la racine avec '/', règles héritées du parent)
+        pile = [(self.racine, "", filtre.regles_racine)]
+        while pile and not self._arret.is_set():
+            dossier, relatif, regles_parent = pile.pop()
+            self.dossiers_en_attente = len(pile)
+            regles = filtre.regles_dossier(dossier, relatif, regles_parent)
+            prefixe = relatif + "/" if relatif else ""
+            try:
+                with os.scandir(dossier) as entrees:
+                    for entree in entrees:
+                        try:
+                            if entree.is_dir(follow_symlinks=False):
+                                if filtre.accepter_dossier(entree.name, prefixe + entree.name, regles):
+                                    pile.append((entree.path, prefixe + entree.name, regles))
+                            elif entree.is_file():
+                                if not filtre.accepter_fichier(prefixe + entree.name, regles):
+                                    continue
+                                if self.filtre_binaires is not None:
+                                    # Taille issue de scandir (sans appel stat supplémentaire sous Windows), seulement si une limite l'exige
+                                    taille = entree.stat().st_size if self.filtre_binaires.taille_max is not None else None
+                                    if not self.filtre_binaires.accepter(entree.path, taille):
+                                        continue
+                                self.fichiers_trouves += 1
+                                yield entree.path
+                        except OSError:
+                            continue
+            except OSError:
+                pass
+            self.dossiers_visites += 1
+            self.dossiers_en_attente = len(pile)
+
+    def estimation_total(self) -> int:
+        """Estimation courante du nombre total de fichiers."""
+        if self.termine or not self.dossiers_visites:
+            return self.fichiers_trouves
+        moyenne = self.fichiers_trouves / self.dossiers_visites
+        return self.fichiers_trouves + int(moyenne * self.dossiers_en_attente)
+
+    def _produire(self):
+        try:
+            for chemin in self.parcourir():
+                while not self._arret.is_set():
+                    try:
+                        self._file.put(chemin, timeout=0.1)
+                        break
+                    except queue.Full:
+                        continue
+        finally:
+            self.termine = True
+            while not self._arret.is_set():
+                try:
+                    self._file.put(_FIN, timeout=0.1)
+                    break
+                except queue.Full:
+                    continue
+
+    def fermer(self):
+        """Interrompt le parcours en arrière-plan."""
+        self._arret.set()
+
+    def __iter__(self) -> Iterator[str]:
+        self._thread = threading.Thread(target=self._produire, daemon=True)
+        self._thread.start()
+        try:
+            while True:
+                chemin = self._file.get()
+                if chemin is _FIN:
+                    return
+                yield chemin
+        finally:
+            self.fermer()
+
@@ -35,6 +35,7 @@ class APISecurityScannerApp:
     
     def __init__(self):
         self.patterns = None
+        self.regles_binaires = None
         self.task_manager = None
         self.page = None
     
@@ -49,6 +50,7 @@ class APISecurityScannerApp:
             base_dir = os.path.dirname(os.path.abspath(__file__))
             config_path = os.path.join(base_dir, 'apikey_validator', 'config.json')
             self.patterns = config.charger_patterns(config_path)
+            self.regles_binaires = config.charger_regles_binaires(config_path)
             return bool(self.patterns)
         except Exception as e:
             print(f"Erreur lors de l'initialisation des patterns : {e}")
@@ -83,7 +85,7 @@ class APISecurityScannerApp:
         tabs.append(create_validation_tab(self.patterns, self.page))
         
         # Onglet de scan de fichiers
-        tabs.append(create_scan_tab(self.patterns, self.task_manager, self.page))
+        tabs.append(create_scan_tab(self.patterns, self.task_manager, self.page, self.regles_binaires))
         
         # Onglet de brute force et dictionnaire
         tabs.append(create_brute_force_tab(self.patterns, self.task_manager, self.page))
@@ -92,7 +94,7 @@ class APISecurityScannerApp:
         tabs.append(create_git_scan_tab(self.patterns, self.task_manager, self.page))
         
         # Onglet de scan par entropie
-        tabs.append(create_entropy_scan_tab(self.patterns, self.task_manager, self.page))
+        tabs.append(create_entropy_scan_tab(self.patterns, self.task_manager, self.page, self.regles_binaires))
         
         # Onglet de génération de clés
         tabs.append(create_find_tab(self.patterns, self.task_manager, self.page))
@@ -1,34 +1,56 @@
 import json
 import os
 import logging
+import sqlite3
 from typing import List, Dict
 
+from apikey_validator import DOSSIER_STOCKAGE
+from apikey_validator.findings_store import CHEMIN_RESULTATS_DEFAUT, FindingsStore
+
 # Configuration du logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-STORAGE_DIR = "storage/data"
+STORAGE_DIR = DOSSIER_STOCKAGE
 STORAGE_PATH = os.path.join(STORAGE_DIR, "exposures.json")
+# Les expositions sont une session dédiée du stockage SQLite des résultats
+FINDINGS_PATH = CHEMIN_RESULTATS_DEFAUT
+SESSION_EXPOSURES = "exposures"
+
+def _ouvrir_store() -> FindingsStore:
+    store = FindingsStore(FINDINGS_PATH, session=SESSION_EXPOSURES)
+    # Migration unique de l'ancien fichier JSON
+    if os.path.exists(STORAGE_PATH) and not store.compter():
+        try:
+            with open(STORAGE_PATH, "r") as f:
+                data = json.load(f)
+            if isinstance(data, list):
+                store.ajouter_lot(data)
+            os.replace(STORAGE_PATH, STORAGE_PATH + ".migrated")
+        except (json.JSONDecodeError, IOError) as e:
+            logger.error(f"Erreur lors de la migration des expositions JSON : {e}")
+    return store
 
 def save_exposures(exposures: List[Dict]):
-    """Sauvegarde la liste des expositions dans le fichier JSON."""
+    """Remplace les expositions enregistrées par la liste fournie."""
     try:
-        os.makedirs(STORAGE_DIR, exist_ok=True)
-        with open(STORAGE_PATH, "w") as f:
-            json.dump(exposures, f, indent=4)
-    except Exception as e:
+        store = _ouvrir_store()
+        try:
+            store.effacer()
+            store.ajouter_lot(exposures)
+        finally:
+            store.fermer()
+    except (sqlite3.Error, OSError) as e:
         logger.error(f"Erreur lors de la sauvegarde des expositions : {e}")
 
 def load_exposures() -> List[Dict]:
-    """Charge la liste des expositions depuis le fichier JSON."""
-    if not os.path.exists(STORAGE_PATH):
-        return []
-    
+    """Charge la liste des expositions depuis le stockage SQLite."""
     try:
-        with open(STORAGE_PATH, "r") as f:
-            data = json.load(f)
-            # S'assurer que les données sont bien une liste
-            return data if isinstance(data, list) else []
-    except (json.JSONDecodeError, IOError) as e:
-        logger.error(f"Erreur lors du chargement des expositions (le fichier est peut-être corrompu) : {e}")
+        store = _ouvrir_store()
+        try:
+            return list(store.iterer())
+        finally:
+            store.fermer()
+    except (sqlite3.Error, OSError) as e:
+        logger.error(f"Erreur lors du chargement des expositions : {e}")
         return []
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""Fixtures communes : patterns de test et dépôts Git temporaires."""
+import json
+import subprocess
+import threading
+
+import pytest
+
+from apikey_validator import config
+
+JETON_A = "ghp_" + "a" * 36
+JETON_B = "ghp_" + "b" * 36
+JETON_C = "ghp_" + "c" * 36
+
+
+def git(depot, *arguments):
+    """Exécute une commande git dans `depot` et retourne sa sortie."""
+    return subprocess.run(["git", "-C", str(depot)] + list(arguments), capture_output=True, check=True, text=True).stdout
+
+
+def commiter(depot, fichiers: dict, message: str = "commit"):
+    """Écrit `fichiers` (chemin relatif -> contenu) puis commite tout le dépôt."""
+    for chemin, contenu in fichiers.items():
+        cible = depot / chemin
+        cible.parent.mkdir(parents=True, exist_ok=True)
+        cible.write_text(contenu)
+    git(depot, "add", "-A")
+    git(depot, "commit", "-q", "-m", message)
+
+
+def evenements():
+    """Événements (pause, annulation) d'un scan qui n'est ni en pause ni annulé."""
+    pause_event, cancel_event = threading.Event(), threading.Event()
+    pause_event.set()
+    return pause_event, cancel_event
+
+
+@pytest.fixture
+def patterns(tmp_path):
+    chemin = tmp_path / "config.json"
+    chemin.write_text(json.dumps({"GHToken": {"pattern": "ghp_[A-Za-z0-9]{36}"}}))
+    return config.charger_patterns(str(chemin))
+
+
+@pytest.fixture
+def depot(tmp_path):
+    chemin = tmp_path / "depot"
+    chemin.mkdir()
+    git(chemin, "init", "-q", "-b", "main")
+    git(chemin, "config", "user.email", "test@example.com")
+    git(chemin, "config", "user.name", "test")
+    return chemin
+
+
+@pytest.fixture
+def magasin(tmp_path, monkeypatch):
+    """Stockage des résultats de la session redirigé vers un fichier temporaire."""
+    from apikey_validator import core
+    from apikey_validator.findings_store import FindingsStore
+    store = FindingsStore(str(tmp_path / "findings.sqlite3"))
+    monkeypatch.setattr(core, "_magasin_resultats", store)
+    yield store
+    store.fermer()
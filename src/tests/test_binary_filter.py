@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+"""Tests de la détection des fichiers binaires et de ses règles configurables."""
+import json
+
+import pytest
+
+from apikey_validator import config, core
+from apikey_validator.binary_filter import RATIO_NUL_MAX, FiltreBinaires, raison_contenu_binaire, regles_binaires
+
+from .conftest import JETON_A, evenements
+
+
+@pytest.mark.parametrize("echantillon, raison", [
+    (b"\x89PNG\r\n\x1a\n" + b"x" * 100, "magique"),
+    (b"PK\x03\x04" + b"x" * 100, "magique"),
+    (b"\x7fELF\x02\x01\x01", "magique"),
+    (b"a" * 1000 + b"\0" * 20, "nul"),
+    (b"a" * 1000 + b"\0" * 5, None),
+    ("clé = 'valeur' ✓\n".encode() * 50, None),
+    (b"", None),
+])
+def test_contenu_binaire(echantillon, raison):
+    assert raison_contenu_binaire(echantillon, RATIO_NUL_MAX) == raison
+
+
+def test_raisons_exclusion(tmp_path):
+    fichiers = {
+        "image.PNG": b"texte",
+        "gros.txt": b"x" * 2000,
+        "archive.dat": b"\x1f\x8b\x08" + b"x" * 100,
+        "donnees.dat": b"\0\1\2\3" * 100,
+        "source.py": f"TOKEN = '{JETON_A}'\n".encode(),
+    }
+    for nom, contenu in fichiers.items():
+        (tmp_path / nom).write_bytes(contenu)
+    filtre = FiltreBinaires(taille_max=1000)
+    raisons = {nom: filtre.raison_exclusion(str(tmp_path / nom)) for nom in fichiers}
+    assert raisons == {"image.PNG": "extension", "gros.txt": "taille", "archive.dat": "magique", "donnees.dat": "nul", "source.py": None}
+    assert [filtre.accepter(str(tmp_path / nom)) for nom in fichiers] == [False, False, False, False, True]
+    assert filtre.ignores == {"extension": 1, "taille": 1, "magique": 1, "nul": 1}
+    assert filtre.octets_ignores == sum(len(c) for n, c in fichiers.items() if n != "source.py")
+
+
+def test_filtre_inactif_garde_la_limite_de_taille(tmp_path):
+    (tmp_path / "image.png").write_bytes(b"\x89PNG" + b"\0" * 10)
+    (tmp_path / "gros.bin").write_bytes(b"\0" * 2000)
+    filtre = FiltreBinaires(actif=False, taille_max=1000)
+    assert filtre.accepter(str(tmp_path / "image.png"))
+    assert not filtre.accepter(str(tmp_path / "gros.bin"))
+
+
+def test_regles_personnalisees(tmp_path):
+    (tmp_path / "export.CSV").write_text("a,b\n")
+    (tmp_path / "doc.pdf").write_text("texte\n")
+    (tmp_path / "dump.txt").write_bytes(b"a" * 100 + b"\0" * 5)
+    regles = regles_binaires(extensions_ajoutees=["csv"], extensions_retirees=["*.PDF"], ratio_nul_max=0.02)
+    filtre = FiltreBinaires(**regles)
+    assert filtre.raison_exclusion(str(tmp_path / "export.CSV")) == "extension"
+    assert filtre.raison_exclusion(str(tmp_path / "doc.pdf")) is None
+    assert filtre.raison_exclusion(str(tmp_path / "dump.txt")) == "nul"
+    with pytest.raises(ValueError):
+        regles_binaires(ratio_nul_max=1.5)
+
+
+def test_regles_depuis_la_configuration(tmp_path, capsys):
+    chemin = tmp_path / "config.json"
+    chemin.write_text(json.dumps({
+        "GHToken": {"pattern": "ghp_[A-Za-z0-9]{36}"},
+        config.CLE_FILTRE_BINAIRES: {"add_extensions": [".log"], "remove_extensions": [".pdf"], "null_ratio": 0.5},
+    }))
+    # La section n'est pas un service
+    assert list(config.charger_patterns(str(chemin))) == ["GHToken"]
+    assert "pas de pattern" not in capsys.readouterr().out
+    regles = config.charger_regles_binaires(str(chemin), extensions_ajoutees=[".csv"], ratio_nul_max=0.1)
+    assert {".log", ".csv"} <= regles["extensions"] and ".pdf" not in regles["extensions"]
+    # La ligne de commande l'emporte sur la configuration
+    assert regles["ratio_nul_max"] == 0.1
+    chemin.write_text(json.dumps({config.CLE_FILTRE_BINAIRES: {"null_ratio": "beaucoup"}}))
+    assert config.charger_regles_binaires(str(chemin)) == regles_binaires()
+    assert "invalide" in capsys.readouterr().out
+
+
+def test_statistiques_transmises_au_callback(tmp_path, patterns, magasin):
+    arbre = tmp_path / "arbre"
+    arbre.mkdir()
+    (arbre / "a.txt").write_text(f"{JETON_A}\n")
+    (arbre / "image.png").write_bytes(b"\x89PNG" + b"\0" * 100)
+    (arbre / "export.csv").write_text(f"{JETON_A}\n")
+    messages = []
+    trouves = []
+    core.mode_scan(patterns, str(arbre), *evenements(), progress_callback=lambda courant, total, message: messages.append(message),
+                   result_callback=trouves.append, verifier=False, regles_binaires=regles_binaires(extensions_ajoutees=[".csv"]))
+    assert [r["source_info"] for r in trouves] == [str(arbre / "a.txt")]
+    assert any("2 fichier(s) binaire(s)" in m and "extension: 2" in m for m in messages)
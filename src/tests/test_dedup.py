@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+"""Tests de l'index de déduplication (ensemble exact et filtre de Bloom)."""
+import pytest
+
+from apikey_validator import core
+from apikey_validator.dedup import FiltreBloom, IndexDoublons, empreinte_resultat
+
+from .conftest import evenements
+
+
+@pytest.mark.parametrize("capacite", [None, 10000])
+def test_doublons_ecartes(capacite):
+    index = IndexDoublons(capacite_max=capacite)
+    assert all(index.ajouter(f"cle{i}", "a.txt") for i in range(5000))
+    assert not any(index.ajouter(f"cle{i}", "a.txt") for i in range(5000))
+    # Même clé, autre source : ce n'est pas un doublon
+    assert index.ajouter("cle0", "b.txt")
+    assert not index.sature
+
+
+def test_taux_de_faux_positifs_borne():
+    bloom = FiltreBloom(20000, taux_faux_positifs=1e-3)
+    for i in range(20000):
+        bloom.ajouter(empreinte_resultat(f"cle{i}", "a.txt"))
+    assert bloom.taux_estime() == pytest.approx(1e-3, rel=0.2)
+    # Éléments jamais ajoutés pris pour des doublons (le filtre ne dépasse pas 1,1 fois sa capacité)
+    faux_positifs = sum(not bloom.ajouter(empreinte_resultat(f"cle{i}", "b.txt")) for i in range(2000))
+    assert faux_positifs <= 2000 * 5e-3
+
+
+def test_saturation_signalee(capsys):
+    index = IndexDoublons(capacite_max=100)
+    for i in range(150):
+        index.ajouter(f"cle{i}", "a.txt")
+    assert index.sature
+    assert capsys.readouterr().out.count("Index de doublons saturé") == 1
+
+
+def test_scan_entropie_avec_filtre_de_bloom(tmp_path, magasin):
+    arbre = tmp_path / "arbre"
+    arbre.mkdir()
+    secret = "aZ3kP9qW2xL7mN4bV8cR1tY6uI0oE5sD"
+    (arbre / "a.txt").write_text(f"{secret}\n{secret}\n")
+    (arbre / "b.txt").write_text(f"{secret}\n")
+    trouves = []
+    core.mode_scan_entropy(str(arbre), 4.0, *evenements(), result_callback=trouves.append, capacite_doublons=1000)
+    assert sorted(r["source_info"] for r in trouves) == [f"file: {arbre / 'a.txt'}", f"file: {arbre / 'b.txt'}"]
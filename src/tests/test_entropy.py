@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+"""Tests du calcul d'entropie et des seuils par alphabet."""
+import math
+import random
+
+import pytest
+
+from apikey_validator import entropy
+from apikey_validator.entropy import SEUILS_ALPHABET_DEFAUT, calculer_entropie, classer_alphabet, entropies_lot, seuil_candidat
+
+
+@pytest.mark.parametrize("candidat, alphabet", [
+    (b"12345678901234567890123", "digits"),
+    (b"deadbeef0123456789abcdef", "hex"),
+    (b"DEADBEEF0123456789", "hex"),
+    (b"aZ3kP9qW2xL7mN4bV8cR", "alnum"),
+    (b"aZ3kP9qW2xL7+mN4b/V8c=", "base64"),
+    (b"aZ3kP9qW2xL7-mN4b_V8c=", "base64url"),
+    (b"aZ3kP9qW2xL7+mN4b_V8c", None),
+    (b"pas un secret", None),
+])
+def test_classer_alphabet(candidat, alphabet):
+    assert classer_alphabet(candidat) == alphabet
+
+
+def test_seuil_candidat():
+    assert seuil_candidat(b"deadbeef", 4.0, None) == (None, 4.0)
+    assert seuil_candidat(b"deadbeef", 4.0, SEUILS_ALPHABET_DEFAUT) == ("hex", 3.0)
+    # Hors alphabet connu : seuil par défaut
+    assert seuil_candidat(b"a.b,c;d", 4.0, SEUILS_ALPHABET_DEFAUT) == (None, 4.0)
+    assert seuil_candidat(b"deadbeef", 4.0, {"alnum": 4.2}) == ("hex", 4.0)
+
+
+def test_identifiant_numerique_non_signale():
+    identifiant = b"31415926535897932384626"
+    alphabet, seuil = seuil_candidat(identifiant, 4.0, SEUILS_ALPHABET_DEFAUT)
+    assert alphabet == "digits"
+    # Plus élevée que le seuil hex, mais jamais au-delà de log2(10)
+    assert SEUILS_ALPHABET_DEFAUT["hex"] < calculer_entropie(identifiant) <= math.log2(10) < seuil
+
+
+def test_plafond_de_longueur_base64():
+    # Tous les caractères distincts : entropie maximale log2(n), sous 4.5 jusqu'à 22 caractères
+    assert calculer_entropie(b"ABCDEFGHIJKLMNOPQRSTUV") == pytest.approx(math.log2(22))
+    assert calculer_entropie(b"ABCDEFGHIJKLMNOPQRSTUV") < SEUILS_ALPHABET_DEFAUT["base64"] < calculer_entropie(b"ABCDEFGHIJKLMNOPQRSTUVW")
+
+
+@pytest.mark.parametrize("numpy", [True, False])
+def test_entropies_lot_identiques_au_calcul_unitaire(monkeypatch, numpy):
+    if numpy:
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(entropy, "np", None)
+    alea = random.Random(0)
+    alphabets = [b"01", b"0123456789abcdef", bytes(range(33, 127)), bytes(range(256))]
+    candidats = [bytes(alea.choices(alea.choice(alphabets), k=alea.randint(0, 80))) for _ in range(500)]
+    candidats += [b"a" * 30, b""]
+    assert entropies_lot(candidats) == pytest.approx([calculer_entropie(c) for c in candidats], abs=1e-9)
+    # Sous la taille minimale, pas de vectorisation : même résultat
+    assert entropies_lot(candidats[:3]) == pytest.approx([calculer_entropie(c) for c in candidats[:3]], abs=1e-9)
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+"""Tests du stockage des résultats : permissions, rétention des sessions, base temporaire."""
+import os
+import stat
+import sys
+
+import pytest
+
+from apikey_validator import core
+from apikey_validator.findings_store import FindingsStore
+
+from .conftest import JETON_A, JETON_B
+
+
+def resultat(cle: str) -> dict:
+    return {"timestamp": "2026-01-01T00:00:00Z", "service": "GHToken", "key": cle, "is_valid": None, "source_type": "file", "source_info": "a.txt"}
+
+
+def session(chemin, cle: str, **options) -> FindingsStore:
+    store = FindingsStore(str(chemin), **options)
+    store.ajouter_lot([resultat(cle)])
+    return store
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="permissions POSIX")
+def test_fichier_lisible_par_le_proprietaire_seulement(tmp_path):
+    chemin = tmp_path / "findings.sqlite3"
+    session(chemin, JETON_A).fermer()
+    assert stat.S_IMODE(os.stat(chemin).st_mode) == 0o600
+
+
+def test_sessions_anciennes_purgees(tmp_path):
+    chemin = tmp_path / "findings.sqlite3"
+    expositions = session(chemin, JETON_A, session="exposures")
+    expositions.fermer()
+    for _ in range(3):
+        session(chemin, JETON_A, sessions_conservees=2).fermer()
+    courante = session(chemin, JETON_B, sessions_conservees=2)
+    try:
+        sessions = {ligne[0] for ligne in courante.connexion.execute("SELECT DISTINCT session FROM resultats")}
+        # La session courante et la précédente ; les sessions nommées ne sont jamais purgées
+        assert len(sessions) == 3 and "exposures" in sessions and courante.session in sessions
+    finally:
+        courante.fermer()
+
+
+def test_sans_stockage_rien_ne_reste_sur_disque(tmp_path, monkeypatch):
+    monkeypatch.setattr(core, "_magasin_resultats", None)
+    core.configurer_stockage_resultats(persistant=False)
+    try:
+        magasin = core.obtenir_magasin_resultats(str(tmp_path / "findings.sqlite3"))
+        core.ajouter_resultat(resultat(JETON_A))
+        assert magasin.compter() == 1
+        core.fermer_magasin_resultats()
+    finally:
+        core.configurer_stockage_resultats()
+    assert not os.path.exists(magasin.chemin_db)
+    assert not (tmp_path / "findings.sqlite3").exists()
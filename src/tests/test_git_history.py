@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+"""Tests du parcours de l'historique (`git log -p` et `cat-file --batch`)."""
+import os
+import threading
+
+import pytest
+
+from apikey_validator import core
+from apikey_validator.git_history import ErreurParcoursGit, GitWatermark, ScannerHistorique, decoder_chemin, lister_commits
+from apikey_validator.parallel import scanner_historique_en_processus
+from apikey_validator.matcher import obtenir_matcher
+from apikey_validator.scan_cache import empreinte_patterns
+
+from .conftest import JETON_A, JETON_B, JETON_C, commiter, evenements, git
+
+
+def scanner(depot, patterns):
+    """Retourne {(chemin, ligne, clé)} pour tout l'historique du dépôt."""
+    historique = ScannerHistorique(git(depot, "rev-parse", "--absolute-git-dir").strip(), obtenir_matcher(patterns))
+    try:
+        return {(chemin, ligne, cle) for _, resultats in historique.parcourir(["--all"])
+                for chemin, trouvailles in resultats for _, ligne, _, cle in trouvailles}
+    finally:
+        historique.fermer()
+
+
+def test_lignes_ajoutees_seulement(depot, patterns):
+    commiter(depot, {"f.txt": f"x\n{JETON_A}\n"})
+    commiter(depot, {"f.txt": f"x\n{JETON_A}\ny\n{JETON_B}\n"})
+    assert scanner(depot, patterns) == {("f.txt", 2, JETON_A), ("f.txt", 4, JETON_B)}
+
+
+@pytest.mark.skipif(not hasattr(os, "symlink"), reason="liens symboliques indisponibles")
+def test_changement_de_type_dans_un_commit(depot, patterns):
+    # Un changement de type (lien -> fichier) produit deux sections de patch pour une entrée --raw
+    os.symlink("cible", depot / "lien")
+    commiter(depot, {"a.txt": "x\n"})
+    os.remove(depot / "lien")
+    commiter(depot, {"lien": f"{JETON_A}\n", "z.txt": f"{JETON_B}\n"})
+    assert scanner(depot, patterns) == {("lien", 1, JETON_A), ("z.txt", 1, JETON_B)}
+
+
+def test_chemins_echappes_par_git(depot, patterns):
+    commiter(depot, {'a"b.txt': f"{JETON_A}\n", "x\\y.txt": f"{JETON_B}\n", "tab\tc.txt": f"{JETON_C}\n"})
+    assert scanner(depot, patterns) == {('a"b.txt', 1, JETON_A), ("x\\y.txt", 1, JETON_B), ("tab\tc.txt", 1, JETON_C)}
+
+
+def test_decoder_chemin():
+    assert decoder_chemin(b'"a\\"b\\\\c\\td"') == 'a"b\\c\td'
+    assert decoder_chemin(b'"\\303\\251t\\303\\251"') == "été"
+    assert decoder_chemin(b"sans guillemets.txt") == "sans guillemets.txt"
+
+
+def test_ordre_identique_entre_backends(depot, patterns):
+    # Historique avec fusion : l'ordre par date et l'ordre topologique diffèrent
+    commiter(depot, {"base.txt": "x\n"})
+    git(depot, "checkout", "-q", "-b", "branche")
+    commiter(depot, {"b1.txt": f"{JETON_A}\n"})
+    git(depot, "checkout", "-q", "main")
+    commiter(depot, {"m1.txt": f"{JETON_B}\n"})
+    git(depot, "checkout", "-q", "branche")
+    commiter(depot, {"b2.txt": f"{JETON_C}\n"})
+    git(depot, "checkout", "-q", "main")
+    git(depot, "merge", "-q", "--no-edit", "branche")
+    commiter(depot, {"m2.txt": "y\n"})
+    git_dir = git(depot, "rev-parse", "--absolute-git-dir").strip()
+
+    historique = ScannerHistorique(git_dir, obtenir_matcher(patterns))
+    try:
+        ordre_serie = [sha for sha, _ in historique.parcourir(["--all"])]
+    finally:
+        historique.fermer()
+    pause_event, cancel_event = threading.Event(), threading.Event()
+    pause_event.set()
+    commits = lister_commits(git_dir, ["--all"])
+    ordre_processus = [sha for sha, _ in scanner_historique_en_processus(git_dir, commits, patterns, 2, pause_event, cancel_event)]
+    assert ordre_serie == commits == ordre_processus
+
+
+def test_depot_sha256(tmp_path, patterns):
+    depot = tmp_path / "sha256"
+    depot.mkdir()
+    git(depot, "init", "-q", "-b", "main", "--object-format=sha256")
+    git(depot, "config", "user.email", "test@example.com")
+    git(depot, "config", "user.name", "test")
+    commiter(depot, {"f.txt": f"{JETON_A}\n"})
+    commiter(depot, {"f.txt": f"{JETON_A}\n{JETON_B}\n"})
+    assert scanner(depot, patterns) == {("f.txt", 1, JETON_A), ("f.txt", 2, JETON_B)}
+
+
+def test_objet_manquant_interrompt_le_parcours(tmp_path, depot, patterns, magasin, capsys):
+    commiter(depot, {"a.txt": f"{JETON_A}\n"})
+    commiter(depot, {"b.txt": f"{JETON_B}\n"})
+    # Dépôt corrompu : le blob ajouté par le dernier commit a disparu
+    sha_blob = git(depot, "rev-parse", "HEAD:b.txt").strip()
+    os.remove(depot / ".git" / "objects" / sha_blob[:2] / sha_blob[2:])
+    with pytest.raises(ErreurParcoursGit):
+        scanner(depot, patterns)
+
+    watermark_path = str(tmp_path / "watermark.sqlite3")
+    core.mode_scan_git(patterns, str(depot), *evenements(), result_callback=lambda _: None, watermark_path=watermark_path, verifier=False)
+    assert "[!] Erreur lors du parcours de l'historique" in capsys.readouterr().out
+    # Parcours incomplet : le scan suivant reprend tout l'historique
+    watermark = GitWatermark(watermark_path, os.path.abspath(depot / ".git"), empreinte_patterns(patterns))
+    try:
+        assert watermark.sommets_scannes() == []
+    finally:
+        watermark.fermer()
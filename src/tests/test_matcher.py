@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""Tests du matcher combiné, comparé à un `finditer` par motif."""
+import random
+import re
+
+import pytest
+
+from apikey_validator.matcher import CombinedMatcher, compiler_version_octets
+from apikey_validator.streaming import rechercher_dans_fichier
+
+MOTIFS = {
+    "Hex32": r"[a-f0-9]{32}",
+    "SHA40": r"[a-f0-9]{40}",
+    "GHToken": r"ghp_[A-Za-z0-9]{36}",
+    "AWS": r"(?<![A-Z0-9])AKIA[A-Z0-9]{16}(?![A-Z0-9])",
+    "Mot": r"\bsecret[a-z]*\b",
+}
+
+
+def compiler(motifs: dict) -> dict:
+    return {nom: {"regex": re.compile(motif), "regex_bytes": compiler_version_octets(motif)} for nom, motif in motifs.items()}
+
+
+def reference(patterns: dict, contenu) -> list:
+    """Résultats attendus : chaque motif évalué seul, comme avant la fusion."""
+    cle = "regex_bytes" if isinstance(contenu, bytes) else "regex"
+    return sorted((nom, m.start(), m.end(), m.group(0)) for nom, details in patterns.items() for m in details[cle].finditer(contenu))
+
+
+def combines(matcher: CombinedMatcher, contenu) -> list:
+    return sorted((nom, m.start(), m.end(), m.group(0)) for nom, m in matcher.finditer(contenu))
+
+
+def contenu_aleatoire(graine: int) -> str:
+    alea = random.Random(graine)
+    morceaux = []
+    for _ in range(200):
+        choix = alea.random()
+        if choix < 0.3:
+            morceaux.append("".join(alea.choice("0123456789abcdef") for _ in range(alea.randint(20, 90))))
+        elif choix < 0.4:
+            morceaux.append("ghp_" + "".join(alea.choice("abcXYZ0123456789") for _ in range(alea.randint(30, 40))))
+        elif choix < 0.5:
+            morceaux.append(alea.choice(["", "X"]) + "AKIA" + "".join(alea.choice("ABC123") for _ in range(alea.randint(14, 18))))
+        elif choix < 0.6:
+            morceaux.append(alea.choice(["secret", "secrets", "nosecret", "secret_key"]))
+        else:
+            morceaux.append("".join(alea.choice("xyz -=\n") for _ in range(alea.randint(1, 10))))
+    return alea.choice(["", " ", "\n"]).join(morceaux)
+
+
+def test_motifs_chevauchants_tous_rapportes():
+    patterns = compiler({"Hex32": MOTIFS["Hex32"], "SHA40": MOTIFS["SHA40"]})
+    jeton = "0123456789abcdef0123456789abcdef01234567"
+    assert {nom for nom, _ in CombinedMatcher(patterns).finditer(jeton)} == {"Hex32", "SHA40"}
+
+
+@pytest.mark.parametrize("graine", range(20))
+@pytest.mark.parametrize("prefiltre", [True, False])
+def test_identique_a_un_finditer_par_motif(graine, prefiltre):
+    patterns = compiler(MOTIFS)
+    matcher = CombinedMatcher(patterns, prefiltre=prefiltre)
+    texte = contenu_aleatoire(graine)
+    assert combines(matcher, texte) == reference(patterns, texte)
+    octets = texte.encode("ascii")
+    assert combines(matcher, octets) == reference(patterns, octets)
+
+
+def test_mot_cle_non_ascii(capsys):
+    # Un mot-clé déclaré non ASCII ne doit ni faire échouer la configuration ni faire manquer de correspondance
+    patterns = compiler({"Hex32": MOTIFS["Hex32"], "Jeton": r"(?:tok|jet)_[0-9]{8}"})
+    patterns["Jeton"]["keywords"] = ["tok_", "jét"]
+    matcher = CombinedMatcher(patterns)
+    assert "préfiltre désactivé" in capsys.readouterr().out
+    assert [m.group(0) for _, m in matcher.finditer(b"jet_12345678 tok_87654321")] == [b"jet_12345678", b"tok_87654321"]
+
+
+@pytest.mark.parametrize("taille_bloc", [64, 100, 1 << 20])
+def test_prefiltre_sans_effet_sur_les_resultats_d_un_fichier(tmp_path, taille_bloc):
+    patterns = compiler(MOTIFS)
+    avec, sans = CombinedMatcher(patterns, prefiltre=True), CombinedMatcher(patterns, prefiltre=False)
+    # Les motifs à littéraux (ghp_, AKIA) passent bien par le préfiltre
+    assert avec.prefiltre and not sans.prefiltre
+    chemin = tmp_path / "melange.txt"
+    chemin.write_text("\n".join(contenu_aleatoire(graine) for graine in range(5)))
+    # Les services préfiltrés sont rapportés à part, avant les autres, dans chaque bloc : seul l'ensemble compte
+    resultats = [sorted(rechercher_dans_fichier(str(chemin), m.finditer, m.longueur_max, taille_bloc)) for m in (avec, sans)]
+    assert resultats[0] == resultats[1]
+    assert {nom for nom, _, _ in resultats[0]} >= {"GHToken", "AWS", "Hex32"}
+
+
+def test_contenu_binaire_et_motif_non_ascii():
+    # Le motif non ASCII n'a pas de version octets : il est évalué sur le texte décodé, positions ramenées en octets
+    patterns = compiler({"GHToken": MOTIFS["GHToken"], "Clé": r"clé_[0-9]{6}"})
+    assert patterns["Clé"]["regex_bytes"] is None
+    jeton = "ghp_" + "a" * 36
+    contenu = b"\xff\xfe\x00" + "clé_123456 ".encode() + b"\x80" + jeton.encode() + " clé_654321".encode()
+    resultats = sorted((m.start(), m.end(), m.group(0), nom) for nom, m in CombinedMatcher(patterns).finditer(contenu))
+    assert [(debut, valeur, nom) for debut, _, valeur, nom in resultats] == [
+        (3, "clé_123456".encode(), "Clé"), (16, jeton.encode(), "GHToken"), (57, "clé_654321".encode(), "Clé")]
+    for debut, fin, valeur, _ in resultats:
+        assert contenu[debut:fin] == valeur
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+"""Tests du filtrage des chemins (`--exclude`, `--include`, fichiers d'ignore)."""
+import os
+
+import pytest
+
+from apikey_validator.path_filter import FiltreChemins
+from apikey_validator.walker import ParcoursFichiers
+
+FICHIERS = ("a.py", "README.md", "src/b.py", "src/notes.md", "src/tests/t.py", "lib/src/c.py", "docs/d.md")
+
+
+@pytest.fixture
+def arbre(tmp_path):
+    for chemin in FICHIERS:
+        cible = tmp_path / chemin
+        cible.parent.mkdir(parents=True, exist_ok=True)
+        cible.write_text("x\n")
+    return tmp_path
+
+
+def parcourir(racine, **options):
+    fichiers = ParcoursFichiers(str(racine), filtre_chemins=FiltreChemins(str(racine), **options))
+    return sorted(os.path.relpath(chemin, racine).replace(os.sep, "/") for chemin in fichiers)
+
+
+@pytest.mark.parametrize("inclusions, attendus", [
+    # Nom de dossier seul ou avec '/' final : tout le sous-arbre, à toute profondeur
+    (["src"], ["lib/src/c.py", "src/b.py", "src/notes.md", "src/tests/t.py"]),
+    (["src/"], ["lib/src/c.py", "src/b.py", "src/notes.md", "src/tests/t.py"]),
+    # Motif ancré : seulement à la racine
+    (["/src"], ["src/b.py", "src/notes.md", "src/tests/t.py"]),
+    (["src/**"], ["src/b.py", "src/notes.md", "src/tests/t.py"]),
+    (["**/tests"], ["src/tests/t.py"]),
+    (["*.md"], ["README.md", "docs/d.md", "src/notes.md"]),
+    # Négation : le motif le plus profond l'emporte
+    (["/src", "!*.md"], ["src/b.py", "src/tests/t.py"]),
+    (["/src", "!src/tests/"], ["src/b.py", "src/notes.md"]),
+])
+def test_inclusions(arbre, inclusions, attendus):
+    assert parcourir(arbre, inclusions=inclusions) == attendus
+
+
+@pytest.mark.parametrize("exclusions, attendus", [
+    (["src"], ["README.md", "a.py", "docs/d.md"]),
+    (["/src/"], ["README.md", "a.py", "docs/d.md", "lib/src/c.py"]),
+    (["**/*.md"], ["a.py", "lib/src/c.py", "src/b.py", "src/tests/t.py"]),
+    (["*.md", "!docs/d.md"], ["a.py", "docs/d.md", "lib/src/c.py", "src/b.py", "src/tests/t.py"]),
+])
+def test_exclusions(arbre, exclusions, attendus):
+    assert parcourir(arbre, exclusions=exclusions) == attendus
+
+
+def test_fichiers_ignore(arbre):
+    (arbre / ".secretsignore").write_text("# commentaire\ndocs/\n*.md\n")
+    (arbre / "src" / ".secretsignore").write_text("!notes.md\ntests\n")
+    # Le fichier d'ignore le plus profond a priorité et ne concerne que son dossier
+    assert parcourir(arbre, exclusions=[".secretsignore"]) == ["a.py", "lib/src/c.py", "src/b.py", "src/notes.md"]
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""Tests du scan de dépôts distants, avec un dépôt nu local servi en `file://`."""
+import pytest
+
+from apikey_validator import core
+from apikey_validator.git_history import ScannerHistorique, chemin_miroir, est_clone_partiel
+from apikey_validator.matcher import obtenir_matcher
+
+from .conftest import JETON_A, JETON_B, JETON_C, commiter, evenements, git
+
+pytestmark = pytest.mark.skipif(core.git is None, reason="GitPython non installé")
+
+
+@pytest.fixture
+def distant(tmp_path, depot):
+    """Dépôt nu à trois commits (un secret chacun), acceptant les clones partiels."""
+    commiter(depot, {"a.txt": f"{JETON_A}\n"})
+    commiter(depot, {"b.txt": f"{JETON_B}\n"})
+    commiter(depot, {"a.txt": f"{JETON_A}\n{JETON_C}\n"})
+    nu = tmp_path / "distant.git"
+    git(tmp_path, "clone", "-q", "--bare", str(depot), str(nu))
+    git(nu, "config", "uploadpack.allowFilter", "true")
+    git(nu, "config", "uploadpack.allowAnySHA1InWant", "true")
+    return nu
+
+
+def scanner_distant(patterns, url, **options):
+    trouves = []
+    core.mode_scan_remote_git(patterns, url, *evenements(), result_callback=trouves.append, verifier=False, **options)
+    return sorted((r["key"], r["source_info"].split(", ", 1)[1]) for r in trouves)
+
+
+ATTENDUS = [(JETON_A, "file: a.txt, line: 1"), (JETON_B, "file: b.txt, line: 1"), (JETON_C, "file: a.txt, line: 2")]
+
+
+def test_clone_nu(patterns, magasin, distant):
+    assert scanner_distant(patterns, distant.as_uri()) == sorted(ATTENDUS)
+
+
+def test_clone_superficiel(patterns, magasin, distant):
+    # Seul le dernier commit est récupéré : tout son contenu apparaît comme ajouté
+    assert scanner_distant(patterns, distant.as_uri(), profondeur=1) == sorted(ATTENDUS)
+
+
+def test_clone_partiel_blobs_exclus_ignores(tmp_path, patterns, distant):
+    clone = tmp_path / "partiel.git"
+    git(tmp_path, "clone", "-q", "--bare", "--filter=blob:none", distant.as_uri(), str(clone))
+    assert est_clone_partiel(str(clone))
+    historique = ScannerHistorique(str(clone), obtenir_matcher(patterns))
+    try:
+        resultats = [trouvailles for _, fichiers in historique.parcourir(["--all"]) for _, trouvailles in fichiers]
+    finally:
+        historique.fermer()
+    # Aucun blob n'est téléchargé à la demande : les trois versions ajoutées sont ignorées
+    assert resultats == []
+    assert historique.blobs_ignores == 3
+    assert "missing" not in git(clone, "cat-file", "--batch-check", "--batch-all-objects")
+
+
+def test_clone_partiel_blobs_presents_scannes(patterns, magasin, distant):
+    assert scanner_distant(patterns, distant.as_uri(), filtre="blob:limit=1m") == sorted(ATTENDUS)
+
+
+def test_miroir_mis_a_jour(tmp_path, patterns, magasin, depot, distant):
+    miroirs = tmp_path / "miroirs"
+    assert scanner_distant(patterns, distant.as_uri(), dossier_miroirs=str(miroirs)) == sorted(ATTENDUS)
+    # Nouveau commit côté distant : le miroir existant est seulement mis à jour
+    jeton_d = "ghp_" + "d" * 36
+    commiter(depot, {"d.txt": f"{jeton_d}\n"})
+    git(depot, "push", "-q", str(distant), "main")
+    miroir = chemin_miroir(str(miroirs), distant.as_uri())
+    avant = git(miroir, "rev-parse", "--absolute-git-dir")
+    assert (jeton_d, "file: d.txt, line: 1") in scanner_distant(patterns, distant.as_uri(), dossier_miroirs=str(miroirs))
+    assert git(miroir, "rev-parse", "--absolute-git-dir") == avant
+    assert git(miroir, "rev-parse", "main").strip() == git(depot, "rev-parse", "main").strip()
+
+
+@pytest.fixture
+def distant_remplacement(tmp_path, depot):
+    """Dépôt nu dont le second commit retire la clé A et ajoute la clé B."""
+    commiter(depot, {"a.txt": f"{JETON_A}\n"})
+    commiter(depot, {"a.txt": f"{JETON_B}\n"})
+    nu = tmp_path / "remplacement.git"
+    git(tmp_path, "clone", "-q", "--bare", str(depot), str(nu))
+    return nu
+
+
+@pytest.mark.parametrize("miroir", [False, True])
+def test_scan_superficiel_puis_complet(tmp_path, patterns, magasin, distant_remplacement, miroir):
+    options = {"watermark_path": str(tmp_path / "watermark.sqlite3")}
+    if miroir:
+        options["dossier_miroirs"] = str(tmp_path / "miroirs")
+    url = distant_remplacement.as_uri()
+    assert [cle for cle, _ in scanner_distant(patterns, url, profondeur=1, **options)] == [JETON_B]
+    # Le scan superficiel n'a pas lu le premier commit : le scan complet doit encore le parcourir
+    assert JETON_A in [cle for cle, _ in scanner_distant(patterns, url, **options)]
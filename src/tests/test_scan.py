@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+"""Tests des modes de scan de fichiers (`mode_scan`, `mode_scan_entropy`)."""
+import sqlite3
+
+import pytest
+
+from apikey_validator import core, validators, verification
+from apikey_validator.matcher import obtenir_matcher
+from apikey_validator.parallel import scanner_en_processus
+from apikey_validator.scan_cache import ScanCache, empreinte_patterns
+from apikey_validator.validation_cache import CacheValidation
+
+from .conftest import JETON_A, JETON_B, evenements
+
+
+def test_scans_successifs_rapportent_les_memes_resultats(tmp_path, patterns, magasin):
+    arbre = tmp_path / "arbre"
+    arbre.mkdir()
+    (arbre / "a.txt").write_text(f"{JETON_A}\n{JETON_B}\n")
+    for _ in range(2):
+        trouves = []
+        core.mode_scan(patterns, str(arbre), *evenements(), result_callback=trouves.append, verifier=False)
+        assert sorted(r["key"] for r in trouves) == [JETON_A, JETON_B]
+
+
+def test_scan_entropie_repete(tmp_path, magasin):
+    arbre = tmp_path / "arbre"
+    arbre.mkdir()
+    (arbre / "a.txt").write_text("aZ3kP9qW2xL7mN4bV8cR1tY6uI0oE5sD\n")
+    for _ in range(2):
+        trouves = []
+        core.mode_scan_entropy(str(arbre), 4.0, *evenements(), result_callback=trouves.append)
+        assert len(trouves) == 1
+
+
+def test_resultats_ecrits_a_la_fin_du_scan(tmp_path, patterns, magasin):
+    arbre = tmp_path / "arbre"
+    arbre.mkdir()
+    (arbre / "a.txt").write_text(f"{JETON_A}\n")
+    core.mode_scan(patterns, str(arbre), *evenements(), result_callback=lambda r: None, verifier=False)
+    # Relu par une autre connexion : rien ne doit rester en attente dans le tampon
+    lecture = sqlite3.connect(magasin.chemin_db)
+    try:
+        assert lecture.execute("SELECT key, is_valid FROM resultats").fetchall() == [(JETON_A, None)]
+    finally:
+        lecture.close()
+
+
+
+def test_verification_par_paire_unique(tmp_path, patterns, magasin, monkeypatch):
+    monkeypatch.setattr(verification, "cache_validation", CacheValidation())
+    appels = []
+    def validateur(cle, silencieux=False):
+        appels.append(cle)
+        return cle == JETON_A
+    patterns["GHToken"]["validator"] = validateur
+    arbre = tmp_path / "arbre"
+    arbre.mkdir()
+    (arbre / "a.txt").write_text(f"{JETON_A}\n{JETON_B}\n")
+    (arbre / "b.txt").write_text(f"{JETON_A}\n")
+    core.mode_scan(patterns, str(arbre), *evenements(), result_callback=lambda r: None)
+    assert sorted(appels) == [JETON_A, JETON_B]
+    assert sorted((r["key"], r["is_valid"]) for r in magasin.iterer()) == [(JETON_A, True), (JETON_A, True), (JETON_B, False)]
+
+
+def test_validateurs_configures_sans_cache(patterns, monkeypatch):
+    # La validation manuelle d'une clé doit toujours interroger le validateur
+    monkeypatch.setattr(verification, "cache_validation", CacheValidation())
+    appels = []
+    monkeypatch.setattr(validators, "validate_regex", lambda cle, pattern, silencieux=False: appels.append(cle) or False)
+    for _ in range(2):
+        patterns["GHToken"]["validator"](JETON_A, silencieux=True)
+    assert appels == [JETON_A, JETON_A]
+
+
+def test_fenetre_entropie_inaccessible(tmp_path, magasin, capsys):
+    arbre = tmp_path / "arbre"
+    arbre.mkdir()
+    (arbre / "a.txt").write_text("aZ3kP9qW2xL7mN4bV8cR1tY6uI0oE5sD\n")
+    trouves = []
+    # log2(16) = 4 : un seuil de 4.0 ne peut jamais être dépassé
+    core.mode_scan_entropy(str(arbre), 4.0, *evenements(), result_callback=trouves.append, fenetre=16)
+    assert trouves == [] and "aucun seuil n'est atteignable" in capsys.readouterr().out
+    core.mode_scan_entropy(str(arbre), 4.0, *evenements(), result_callback=trouves.append, fenetre=-3)
+    assert trouves == [] and "[!] Erreur" in capsys.readouterr().out
+    core.mode_scan_entropy(str(arbre), 4.0, *evenements(), result_callback=trouves.append, fenetre=24, seuils_alphabet={"alnum": 4.2, "hex": 4.8})
+    assert "seuils inaccessibles : hex (4.8)" in capsys.readouterr().out
+    assert len(trouves) == 1
+
+
+@pytest.mark.parametrize("backend", ["thread", "process"])
+def test_octets_lus_hors_cache(tmp_path, patterns, backend):
+    arbre = tmp_path / "arbre"
+    arbre.mkdir()
+    contenus = {"a.txt": f"{JETON_A}\n", "b.txt": "rien\n" * 100}
+    for nom, contenu in contenus.items():
+        (arbre / nom).write_text(contenu)
+    fichiers = sorted(str(arbre / nom) for nom in contenus)
+
+    def scanner(cache):
+        if backend == "process":
+            resultats = scanner_en_processus(fichiers, patterns, 1, *evenements(), cache=cache)
+        else:
+            resultats = core._scanner_fichiers_localement(fichiers, obtenir_matcher(patterns), cache)
+        return {chemin: (trouvailles, octets) for chemin, trouvailles, octets in resultats}
+
+    for passage in range(2):
+        cache = ScanCache(str(tmp_path / "cache.sqlite3"), empreinte_patterns(patterns))
+        resultats = scanner(cache)
+        cache.fermer()
+        # Les fichiers rejoués depuis le cache n'ont pas été lus : ils ne comptent pas dans le débit
+        assert {chemin: octets for chemin, (_, octets) in resultats.items()} == {str(arbre / nom): (len(c) if passage == 0 else 0) for nom, c in contenus.items()}
+        assert [len(t) for t, _ in resultats.values()] == [1, 0]
+
+
+def test_backends_thread_et_process_identiques(tmp_path, patterns, magasin):
+    arbre = tmp_path / "arbre"
+    for i in range(30):
+        dossier = arbre / f"d{i % 3}"
+        dossier.mkdir(parents=True, exist_ok=True)
+        (dossier / f"f{i}.txt").write_bytes(b"\xff" * i + f"x {JETON_A if i % 2 else JETON_B} y\n".encode())
+    resultats = {}
+    for backend in ("thread", "process"):
+        trouves = []
+        core.mode_scan(patterns, str(arbre), *evenements(), result_callback=trouves.append, verifier=False, backend=backend, workers=2)
+        resultats[backend] = sorted((r["key"], r["source_info"], r["offset"]) for r in trouves)
+    assert len(resultats["thread"]) == 30
+    assert resultats["thread"] == resultats["process"]
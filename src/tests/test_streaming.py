@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""Tests de la lecture en flux par blocs chevauchants."""
+import io
+import re
+
+import pytest
+
+from apikey_validator.matcher import obtenir_matcher
+from apikey_validator.streaming import empreinte_fichier, lire_blocs, nouvelle_empreinte, rechercher_dans_fichier, rechercher_dans_flux, scanner_fichier
+
+from .conftest import JETON_A, JETON_B
+
+MOTIF = re.compile(rb"SECRET_[0-9]{8}")
+LONGUEUR = len(b"SECRET_00000000")
+
+
+def finditer(bloc):
+    for match in MOTIF.finditer(bloc):
+        yield "motif", match
+
+
+def positions(contenu: bytes, taille_bloc: int):
+    return [(offset, texte) for _, offset, texte in rechercher_dans_flux(io.BytesIO(contenu), finditer, LONGUEUR, taille_bloc)]
+
+
+@pytest.mark.parametrize("taille_bloc", [16, 17, 20, 32, 64, 1 << 20])
+def test_correspondances_a_cheval_sur_les_blocs(taille_bloc):
+    # Un secret tous les 23 octets : de nombreux secrets chevauchent une frontière de bloc
+    contenu = b"".join(b"xxxxxxxx" + b"SECRET_%08d" % i for i in range(40))
+    attendu = [(m.start(), m.group().decode()) for m in MOTIF.finditer(contenu)]
+    assert positions(contenu, taille_bloc) == attendu
+
+
+def test_secret_coupe_exactement_a_la_frontiere():
+    contenu = b"a" * 10 + b"SECRET_12345678" + b"b" * 10
+    # Frontière au milieu du secret, puis juste avant et juste après
+    for taille_bloc in (17, 10, 25):
+        assert positions(contenu, taille_bloc) == [(10, "SECRET_12345678")]
+
+
+def test_blocs_et_empreinte(tmp_path):
+    contenu = bytes(range(256)) * 10
+    chemin = tmp_path / "donnees"
+    chemin.write_bytes(contenu)
+    empreinte = nouvelle_empreinte()
+    blocs = list(lire_blocs(io.BytesIO(contenu), 8, 100, empreinte))
+    # Chaque bloc reprend les 8 derniers octets du précédent ; seul le dernier est marqué
+    assert [est_dernier for _, _, est_dernier in blocs] == [False] * (len(blocs) - 1) + [True]
+    for offset, bloc, _ in blocs:
+        assert contenu[offset:offset + len(bloc)] == bloc
+    # Les octets chevauchants ne sont hachés qu'une fois
+    assert empreinte.hexdigest() == empreinte_fichier(str(chemin))
+
+
+def test_fichier_en_octets(tmp_path, patterns):
+    # Contenu non UTF-8 : les offsets sont des positions en octets
+    prefixe = "é".encode("utf-8") * 3 + b"\xff\xfe"
+    chemin = tmp_path / "melange.bin"
+    chemin.write_bytes(prefixe + JETON_A.encode() + b"\n\x00" + JETON_B.encode())
+    matcher = obtenir_matcher(patterns)
+    trouvailles = list(rechercher_dans_fichier(str(chemin), matcher.finditer, matcher.longueur_max, taille_bloc=32))
+    assert [(offset, cle) for _, offset, cle in trouvailles] == [(len(prefixe), JETON_A), (len(prefixe) + len(JETON_A) + 2, JETON_B)]
+    assert scanner_fichier(str(chemin), matcher.finditer, matcher.longueur_max, taille_bloc=32) == (trouvailles, chemin.stat().st_size)
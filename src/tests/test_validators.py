@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+"""Tests des validateurs HTTP contre un serveur local simulant l'API GitHub."""
+import concurrent.futures
+import http.server
+import socketserver
+import threading
+
+import pytest
+
+from apikey_validator import validators
+
+from .conftest import JETON_A, JETON_B
+
+
+class _ServeurGithub(socketserver.ThreadingMixIn, http.server.HTTPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _GestionnaireGithub)
+        self.connexions = set()
+        self.requetes = 0
+        self.verrou = threading.Lock()
+
+
+class _GestionnaireGithub(http.server.BaseHTTPRequestHandler):
+    # Keep-alive : plusieurs requêtes par connexion
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        with self.server.verrou:
+            self.server.connexions.add(self.client_address)
+            self.server.requetes += 1
+        statut = 200 if self.headers.get("Authorization") == f"token {JETON_A}" else 401
+        self.send_response(statut)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"{}")
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def serveur(monkeypatch):
+    serveur = _ServeurGithub()
+    thread = threading.Thread(target=serveur.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setattr(validators, "GITHUB_API_URL", f"http://127.0.0.1:{serveur.server_address[1]}/user")
+    monkeypatch.setattr(validators.time, "sleep", lambda _: None)
+    yield serveur
+    serveur.shutdown()
+    serveur.server_close()
+
+
+def test_resultats_de_validation(serveur):
+    assert validators.tester_cle_github(JETON_A, silencieux=True)
+    assert not validators.tester_cle_github(JETON_B, silencieux=True)
+
+
+def test_connexions_reutilisees(serveur):
+    cles = [JETON_A, JETON_B] * 50
+    with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
+        resultats = list(executor.map(lambda cle: validators.tester_cle_github(cle, silencieux=True), cles))
+    assert resultats == [cle == JETON_A for cle in cles]
+    assert serveur.requetes == len(cles)
+    # Une session par thread, chacune gardant sa connexion ouverte
+    assert len(serveur.connexions) <= 4
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""Tests du parcours paresseux des répertoires (`ParcoursFichiers`)."""
+import os
+
+import pytest
+
+from apikey_validator.binary_filter import FiltreBinaires
+from apikey_validator.walker import ParcoursFichiers
+
+
+@pytest.fixture
+def arbre(tmp_path):
+    """20 dossiers de 20 fichiers, plus des dossiers exclus par défaut."""
+    racine = tmp_path / "arbre"
+    for i in range(20):
+        dossier = racine / f"d{i:02d}" / "sous"
+        dossier.mkdir(parents=True)
+        for j in range(20):
+            (dossier / f"f{j:02d}.txt").write_text("x")
+    for exclu in ("node_modules", ".git"):
+        (racine / exclu).mkdir()
+        (racine / exclu / "ignore.txt").write_text("x")
+    return racine
+
+
+def test_parcours_complet(arbre):
+    parcours = ParcoursFichiers(str(arbre), taille_file=8)
+    fichiers = list(parcours)
+    attendus = {os.path.join(dossier, nom) for dossier, _, noms in os.walk(arbre) for nom in noms
+                if "node_modules" not in dossier and ".git" not in dossier}
+    assert len(fichiers) == len(attendus) == 400
+    assert set(fichiers) == attendus
+    assert parcours.termine and parcours.estimation_total() == 400
+
+
+def test_annulation_en_cours_de_parcours(arbre):
+    parcours = ParcoursFichiers(str(arbre), taille_file=4)
+    iterateur = iter(parcours)
+    premiers = [next(iterateur) for _ in range(5)]
+    # Le producteur est bloqué sur la file bornée : il n'a pas tout listé
+    assert parcours.fichiers_trouves < 400
+    iterateur.close()
+    parcours._thread.join(timeout=5)
+    assert not parcours._thread.is_alive()
+    assert len(set(premiers)) == 5 and parcours.fichiers_trouves < 400
+
+
+def test_fermer_interrompt_le_producteur(arbre):
+    parcours = ParcoursFichiers(str(arbre), taille_file=2)
+    iterateur = iter(parcours)
+    next(iterateur)
+    # Fermeture depuis le consommateur (ex. annulation du scan) sans épuiser l'itérateur
+    parcours.fermer()
+    parcours._thread.join(timeout=5)
+    assert not parcours._thread.is_alive()
+
+
+def test_filtre_binaires_dans_le_parcours(tmp_path):
+    (tmp_path / "a.txt").write_text("texte")
+    (tmp_path / "b.png").write_bytes(b"\x89PNG")
+    (tmp_path / "c.log").write_text("x" * 500)
+    filtre = FiltreBinaires(taille_max=100)
+    assert list(ParcoursFichiers(str(tmp_path), filtre_binaires=filtre)) == [str(tmp_path / "a.txt")]
+    assert filtre.ignores == {"extension": 1, "taille": 1}
+    assert filtre.octets_ignores == 504
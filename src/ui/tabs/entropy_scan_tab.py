@@ -19,7 +19,7 @@ from ui_extensions import MaterialIcons
 from apikey_validator import core
 
 
-def create_entropy_scan_tab(patterns: dict, task_manager, page: ft.Page) -> ft.Tab:
+def create_entropy_scan_tab(patterns: dict, task_manager, page: ft.Page, regles_binaires: dict = None) -> ft.Tab:
     """
     Crée l'onglet de scan par entropie
     
@@ -27,6 +27,7 @@ def create_entropy_scan_tab(patterns: dict, task_manager, page: ft.Page) -> ft.T
         patterns: Dictionnaire des patterns de validation
         task_manager: Gestionnaire de tâches
         page: Page Flet
+        regles_binaires: Règles de détection des binaires (section _binary_filter de config.json)
         
     Returns:
         Tab configuré pour le scan par entropie
@@ -96,7 +97,8 @@ def create_entropy_scan_tab(patterns: dict, task_manager, page: ft.Page) -> ft.T
         'error_message': "Veuillez sélectionner un répertoire valide et un seuil d'entropie numérique.",
         'get_core_args': lambda: {
             'scan_path': entropy_scan_path_text.data,
-            'threshold': float(entropy_threshold_input.value) if entropy_threshold_input.value.replace('.', '').isdigit() else 4.0
+            'threshold': float(entropy_threshold_input.value) if entropy_threshold_input.value.replace('.', '').isdigit() else 4.0,
+            'regles_binaires': regles_binaires
         }
     }
     
@@ -19,6 +19,7 @@ from ui_theme import (
     create_responsive_row, create_text, create_progress_bar, create_action_button
 )
 from ui_extensions import MaterialIcons
+from apikey_validator.entropy import calculer_entropie
 
 
 def create_find_tab(patterns: dict, task_manager, page: ft.Page) -> ft.Tab:
@@ -139,7 +140,7 @@ def create_find_tab(patterns: dict, task_manager, page: ft.Page) -> ft.Tab:
             analysis.append("🎯 Format : Non reconnu ou personnalisé")
         
         # Analyse de l'entropie
-        entropy = calculate_entropy(key)
+        entropy = calculer_entropie(key)
         analysis.append(f"📈 Entropie : {entropy:.2f} bits")
         
         if entropy > 4.5:
@@ -162,28 +163,6 @@ def create_find_tab(patterns: dict, task_manager, page: ft.Page) -> ft.Tab:
         analyze_result_text.color = Colors.ON_SURFACE
         page.update()
     
-    def calculate_entropy(s):
-        """Calcule l'entropie de Shannon d'une chaîne"""
-        if not s:
-            return 0
-        
-        import math
-        
-        # Compter les fréquences
-        freq = {}
-        for char in s:
-            freq[char] = freq.get(char, 0) + 1
-        
-        # Calculer l'entropie
-        entropy = 0
-        length = len(s)
-        for count in freq.values():
-            p = count / length
-            if p > 0:
-                entropy -= p * math.log2(p)
-        
-        return entropy
-    
     def generate_format_examples(e):
         """Génère des exemples de format pour tests"""
         service = service_dropdown.value
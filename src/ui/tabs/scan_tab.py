@@ -19,7 +19,7 @@ from ui_extensions import MaterialIcons
 from apikey_validator import core
 
 
-def create_scan_tab(patterns: dict, task_manager, page: ft.Page) -> ft.Tab:
+def create_scan_tab(patterns: dict, task_manager, page: ft.Page, regles_binaires: dict = None) -> ft.Tab:
     """
     Crée l'onglet de scan de fichiers
     
@@ -27,6 +27,7 @@ def create_scan_tab(patterns: dict, task_manager, page: ft.Page) -> ft.Tab:
         patterns: Dictionnaire des patterns de validation
         task_manager: Gestionnaire de tâches
         page: Page Flet
+        regles_binaires: Règles de détection des binaires (section _binary_filter de config.json)
         
     Returns:
         Tab configuré pour le scan de fichiers
@@ -79,7 +80,7 @@ def create_scan_tab(patterns: dict, task_manager, page: ft.Page) -> ft.Tab:
         'cancel_button': cancel_scan_button,
         'pre_check': lambda: scan_path_text.value and os.path.isdir(scan_path_text.value),
         'error_message': "Veuillez sélectionner un répertoire valide.",
-        'get_core_args': lambda: {'scan_path': scan_path_text.value}
+        'get_core_args': lambda: {'scan_path': scan_path_text.value, 'regles_binaires': regles_binaires}
     }
     
     # Liaison des événements
@@ -14,14 +14,25 @@ import os
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
 from ui_theme import Colors
+from apikey_validator.result_channel import CanalResultats, POLITIQUE_RESUMER, TAILLE_FILE_DEFAUT, INTERVALLE_DEFAUT
 
 
 class TaskManager:
     """Gestionnaire centralisé pour les tâches asynchrones de l'application"""
     
-    def __init__(self, page: ft.Page):
+    def __init__(
+        self, 
+        page: ft.Page, 
+        result_policy: str = POLITIQUE_RESUMER, 
+        result_queue_size: int = TAILLE_FILE_DEFAUT, 
+        result_interval: float = INTERVALLE_DEFAUT
+    ):
         self.page = page
         self.active_tasks = {}
+        # Canal des résultats : les scanners n'attendent jamais le rendu de la page
+        self.result_policy = result_policy
+        self.result_queue_size = result_queue_size
+        self.result_interval = result_interval
     
     def create_task_runner(
         self, 
@@ -107,8 +118,18 @@ class TaskManager:
             task_config['status_text']
         )
         
-        result_callback_func = task_config.get('result_callback_func', self.ui_result_callback)
-        result_cb = partial(result_callback_func, task_config['result_log'])
+        # Les résultats passent par un canal borné, affiché par lots (une mise à jour de page par lot)
+        result_callback_func = task_config.get('result_callback_func')
+        if result_callback_func is None:
+            consumer = partial(self.ui_results_batch_callback, task_config['result_log'])
+        else:
+            consumer = partial(self._deliver_results, result_callback_func, task_config['result_log'])
+        result_cb = CanalResultats(
+            consumer, 
+            taille_max=task_config.get('result_queue_size', self.result_queue_size), 
+            intervalle=self.result_interval, 
+            politique=task_config.get('result_policy', self.result_policy)
+        )
         
         # Préparation des arguments pour la fonction core
         core_args = task_config['get_core_args']()
@@ -132,7 +153,13 @@ class TaskManager:
             **core_args
         )
         
-        task_thread = threading.Thread(target=task, daemon=True)
+        def task_with_channel():
+            try:
+                task()
+            finally:
+                result_cb.fermer()
+
+        task_thread = threading.Thread(target=task_with_channel, daemon=True)
         self.active_tasks[task_config['name']] = task_thread
         task_thread.start()
 
@@ -194,17 +221,35 @@ class TaskManager:
         status_text.value = message
         self.page.update()
 
-    def ui_result_callback(self, result_log: ft.TextField, result: dict):
-        """Callback pour afficher les résultats"""
-        status = "VALIDE" if result.get('is_valid') else "INVALIDE"
+    def format_result(self, result: dict) -> str:
+        """Ligne de journal d'un résultat"""
+        # is_valid vaut None tant que la clé n'a pas été vérifiée (scan en deux phases)
+        status = {True: "VALIDE", None: "NON VÉRIFIÉE"}.get(result.get('is_valid'), "INVALIDE")
         
         # Tronquer la clé pour la sécurité
         key_display = f"{result['key'][:4]}...{result['key'][-4:]}" if len(result['key']) > 8 else result['key']
         
-        log_entry = f"[{result['timestamp']}] {result['service']} - {status} - Clé: {key_display} (Source: {result['source_type']} @ {result['source_info']})\\n"
-        
-        result_log.value += log_entry
+        return f"[{result['timestamp']}] {result['service']} - {status} - Clé: {key_display} (Source: {result['source_type']} @ {result['source_info']})\\n"
+
+    def ui_results_batch_callback(self, result_log: ft.TextField, results: list, dropped: int):
+        """Affiche un lot de résultats du canal avec une seule mise à jour de la page"""
+        log_entries = "".join(self.format_result(result) for result in results)
+        result_log.value += log_entries + self.format_dropped(dropped)
         self.page.update()
+
+    def format_dropped(self, dropped: int) -> str:
+        """Ligne de journal signalant les résultats écartés par le canal (vide s'il n'y en a pas)"""
+        if not dropped:
+            return ""
+        return f"[!] {dropped} résultat(s) non affiché(s) : l'interface ne suivait pas (ils restent enregistrés)\\n"
+
+    def _deliver_results(self, result_callback: Callable, result_log: ft.TextField, results: list, dropped: int):
+        """Transmet un lot du canal à un callback qui traite les résultats un par un, puis signale les résultats écartés"""
+        for result in results:
+            result_callback(result_log, result)
+        if dropped:
+            result_log.value += self.format_dropped(dropped)
+            self.page.update()
     
     def get_active_tasks(self) -> Dict[str, threading.Thread]:
         """Retourne la liste des tâches actives"""